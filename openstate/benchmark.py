@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""Headless microbenchmarks for the game's hot paths.
+
+Examples:
+    python benchmark.py                               # run everything, print a table
+    python benchmark.py --output results.json         # also save machine-readable results
+    python benchmark.py --baseline baseline.json      # fail if anything got slower than the threshold
+    python benchmark.py --alloc-budget 512            # fail if a frame phase allocates more than 512 bytes
+    python benchmark.py --alloc-check                 # fail if a phase is over its budget in ALLOCATION_BUDGETS
+"""
+import os
+import sys
+import json
+import time
+import random
+import heapq
+import argparse
+import platform
+import statistics
+import tracemalloc
+from array import array
+
+# Run without a window or audio device
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from src.maze_generator import MazeGenerator
+from src.level import Level
+from src.player import Player
+from src.ui import UI
+from src.game import Game, GameState
+from src.profiler import FrameProfiler
+from src.simulation import BlendedSnapshot
+from src.tile import Tile
+
+# Grid sizes (in tiles) for the generated fixtures
+SIZES = {
+    'small': (25, 18),    # The regular 800x600 screen
+    'medium': (50, 36),
+    'large': (100, 75),
+    'huge': (300, 300),     # Past any real level, for how pathfinding scales
+}
+
+SEED = 1234
+
+# Median bytes each frame phase may allocate (tracemalloc peak; CPython has no
+# per-allocation counter). Checked by --alloc-check and tests/test_allocations.py.
+# Sprite lists and (image, position) pairs are reused between frames, but these
+# phases still allocate every frame and are not zero:
+#   player, moving_walls, guards, scrolls: pixel coordinates above 256 are new
+#     int objects (CPython only caches small ints), as are float positions and
+#     the guards' vision cone bounds
+#   level_render, ui: the iterator screen.blits takes over its list, and the
+#     ui's score and timer text
+#   snapshot: every tick publishes a new immutable render snapshot
+#     (SimulationThread and interpolation need the previous one intact), so its
+#     container tuples are new even when the sprites in them are not
+#   interpolation: blends into reused [image, [x, y]] slots, leaving only the
+#     loop's range iterator and the blended coordinates above 256
+ALLOCATION_BUDGETS = {
+    'input': 0,
+    'player': 64,
+    'moving_walls': 128,
+    'guards': 192,
+    'detection': 64,
+    'scrolls': 64,
+    'level_render': 64,
+    'guard_render': 64,
+    'player_render': 64,
+    'ui': 160,
+    'present': 64,
+    'snapshot': 512,
+    'interpolation': 128,
+}
+
+def make_level(size, level_number=5):
+    random.seed(SEED)
+    grid_width, grid_height = SIZES[size]
+    return Level(level_number, grid_width * 32, grid_height * 32)
+
+def bench_generate_maze(size):
+    grid_width, grid_height = SIZES[size]
+    random.seed(SEED)
+    
+    def run():
+        MazeGenerator(grid_width, grid_height).generate_maze()
+    return run
+
+def bench_level_init(size):
+    grid_width, grid_height = SIZES[size]
+    random.seed(SEED)
+    
+    def run():
+        Level(5, grid_width * 32, grid_height * 32)
+    return run
+
+def bench_move_with_collision(size):
+    level = make_level(size)
+    player = Player(level.player_start_pos)
+    player.vel_x = player.speed
+    player.vel_y = player.speed
+    
+    def run():
+        # Step back and forth so the player stays in the same area of the map
+        player.move_with_collision(level)
+        player.vel_x = -player.vel_x
+        player.vel_y = -player.vel_y
+    return run
+
+def _guard_and_target(level):
+    # Put a player a few tiles away from the first guard so LOS has a real distance to walk
+    guard = level.guards[0]
+    target = Player((guard.rect.x + 2 * level.tile_size, guard.rect.y + level.tile_size))
+    return guard, target
+
+def bench_line_of_sight(size):
+    level = make_level(size)
+    guard, target = _guard_and_target(level)
+    
+    def run():
+        guard.is_line_of_sight_blocked(target, level)
+    return run
+
+def bench_detect_player(size):
+    level = make_level(size)
+    guard, target = _guard_and_target(level)
+    guard.update_vision(level)
+    pursuit_state = (guard.is_alerted, guard.alert_timer, guard.is_pursuing, guard.pursuit_timer, guard.pursuit_target)
+    
+    def run():
+        guard.detect_player(target, level)
+        # Detection flips the guard into pursuit; undo it so every call does the same work
+        (guard.is_alerted, guard.alert_timer, guard.is_pursuing,
+         guard.pursuit_timer, guard.pursuit_target) = pursuit_state
+    return run
+
+def bench_vision_cone(size):
+    level = make_level(size)
+    guard = level.guards[0]
+    
+    def run():
+        # Force a full recompute of the shadowcast field of view
+        guard.vision_key = None
+        guard.update_vision(level)
+    return run
+
+def bench_corridor_path(size):
+    # Start to exit, the longest route the level is built around
+    level = make_level(size)
+    graph = level.get_corridor_graph()
+    start = level.analysis.start_tile
+    goal = level.analysis.exit_tile
+    
+    def run():
+        graph.find_path(start, goal)
+    return run
+
+def grid_path(grid, start, goal):
+    # Plain A* over the tile grid, the baseline corridor_path is compared with
+    width = len(grid[0])
+    height = len(grid)
+    goal_x, goal_y = goal
+    cost_to = {start: 0}
+    came_from = {start: None}
+    heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, start)]
+    while heap:
+        _, cost, tile = heapq.heappop(heap)
+        if tile == goal:
+            break
+        if cost > cost_to[tile]:
+            continue
+        x, y = tile
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < width and 0 <= ny < height and grid[ny][nx] != Tile.WALL:
+                total = cost + 1
+                if total < cost_to.get((nx, ny), total + 1):
+                    cost_to[(nx, ny)] = total
+                    came_from[(nx, ny)] = tile
+                    heapq.heappush(heap, (total + abs(nx - goal_x) + abs(ny - goal_y), total, (nx, ny)))
+    if goal not in came_from:
+        return []
+    path = []
+    tile = goal
+    while tile is not None:
+        path.append(tile)
+        tile = came_from[tile]
+    path.reverse()
+    return path
+
+def bench_grid_path(size):
+    # Same query as corridor_path, with grid A*
+    level = make_level(size)
+    start = level.analysis.start_tile
+    goal = level.analysis.exit_tile
+    
+    def run():
+        grid_path(level.grid, start, goal)
+    return run
+
+def bench_update_moving_elements(size):
+    level = make_level(size)
+    
+    def run():
+        level.update_moving_elements()
+    return run
+
+def bench_level_render(size):
+    level = make_level(size)
+    surface = pygame.Surface((level.width, level.height))
+    
+    def run():
+        level.render_map(surface)
+    return run
+
+def bench_guard_render(size):
+    level = make_level(size)
+    surface = pygame.Surface((level.width, level.height))
+    
+    def run():
+        level.render_guards(surface)
+    return run
+
+def bench_ui_render(size):
+    grid_width, grid_height = SIZES[size]
+    ui = UI(grid_width * 32, grid_height * 32)
+    surface = pygame.Surface((grid_width * 32, grid_height * 32))
+    
+    def run():
+        ui.render(surface, 3, 2, 75.0, False, 0, True)
+    return run
+
+BENCHMARKS = {
+    'generate_maze': bench_generate_maze,
+    'level_init': bench_level_init,
+    'move_with_collision': bench_move_with_collision,
+    'line_of_sight': bench_line_of_sight,
+    'detect_player': bench_detect_player,
+    'vision_cone': bench_vision_cone,
+    'corridor_path': bench_corridor_path,
+    'grid_path': bench_grid_path,
+    'update_moving_elements': bench_update_moving_elements,
+    'level_render': bench_level_render,
+    'guard_render': bench_guard_render,
+    'ui_render': bench_ui_render,
+}
+
+def measure(run, min_time, repeats):
+    # Calibrate the loop count so a single repeat takes at least min_time seconds
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        timings.append((time.perf_counter() - start) / loops * 1e6)
+    
+    return {
+        'median_us': statistics.median(timings),
+        'min_us': min(timings),
+        'loops': loops,
+        'repeats': repeats,
+    }
+
+def run_benchmarks(names, sizes, min_time, repeats):
+    results = {}
+    for name in names:
+        for size in sizes:
+            key = f'{name}[{size}]'
+            run = BENCHMARKS[name](size)
+            results[key] = measure(run, min_time, repeats)
+            print(f'{key:<36} {results[key]["median_us"]:12.2f} us', flush=True)
+    return results
+
+def compare(results, baseline, threshold):
+    # Returns the list of benchmarks that are slower than baseline by more than threshold
+    regressions = []
+    print()
+    print(f'{"benchmark":<36} {"baseline":>12} {"current":>12} {"change":>8}')
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key)
+        if previous is None:
+            print(f'{key:<36} {"-":>12} {current["median_us"]:12.2f} {"new":>8}')
+            continue
+        ratio = current['median_us'] / previous['median_us'] if previous['median_us'] else 1.0
+        flag = ''
+        if ratio > 1.0 + threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(f'{key:<36} {previous["median_us"]:12.2f} {current["median_us"]:12.2f} {ratio - 1.0:+8.1%}{flag}')
+    return regressions
+
+class AllocationTracker(FrameProfiler):
+    """Uses the game's profiler hooks to measure Python allocations per phase.
+    
+    Each phase gets the tracemalloc peak above the memory in use when it
+    started: the most it had allocated at once, freed or not. The tracker's
+    own bookkeeping is measured with empty phases and subtracted. Memory
+    still held at the end of each frame is recorded too, to catch leaks.
+    Results go into arrays sized for the run up front, so recording them
+    doesn't show up as memory held by the game.
+    
+    Taking the render snapshot and blending it with the previous tick are
+    tracked as phases of their own, as the game loop does them between
+    ticks and drawing.
+    """
+    
+    PHASES = FrameProfiler.PHASES + ('snapshot', 'interpolation')
+    
+    def __init__(self, frames):
+        super().__init__()
+        self.enabled = True
+        self.phase_index = {phase: i for i, phase in enumerate(self.PHASES)}
+        self.allocated = {phase: array('q', bytes(8 * frames)) for phase in self.PHASES}
+        self.frame_allocated = array('q', bytes(8 * len(self.PHASES)))
+        self.retained = array('q', bytes(8 * frames))
+        self.frames = 0
+        self.frame_start = 0
+        self.last_current = 0
+        self.overhead = 0
+    
+    def calibrate(self):
+        samples = []
+        for _ in range(100):
+            self.begin_frame()
+            self.mark('input')
+            samples.append(self.frame_allocated[0])
+        self.overhead = min(samples)
+    
+    def begin_frame(self):
+        for i in range(len(self.frame_allocated)):
+            self.frame_allocated[i] = 0
+        self.last_current = self.frame_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    
+    def mark(self, phase):
+        current, peak = tracemalloc.get_traced_memory()
+        self.frame_allocated[self.phase_index[phase]] += max(0, peak - self.last_current - self.overhead)
+        self.last_current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    
+    def end_frame(self):
+        frame = self.frames
+        for i, phase in enumerate(self.PHASES):
+            self.allocated[phase][frame] = self.frame_allocated[i]
+        self.retained[frame] = tracemalloc.get_traced_memory()[0] - self.frame_start
+        self.frames = frame + 1
+
+def measure_allocations(frames, warmup):
+    # Plays a seeded level headless with a fixed input pattern; returns the tracker
+    random.seed(SEED)
+    screen = pygame.display.get_surface()
+    game = Game(screen, GameState.MENU)
+    game.sound_enabled = False
+    game.current_level = 5
+    game.state = GameState.PLAYING
+    game.restart_level()
+    # One key state per move, built up front so reading keys allocates nothing
+    keys = (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_LCTRL, pygame.K_RCTRL)
+    moves = []
+    for held in (pygame.K_d, pygame.K_s, pygame.K_a, pygame.K_w):
+        state = dict.fromkeys(keys, False)
+        state[held] = True
+        moves.append(state)
+    
+    # Draw each frame halfway between the last two ticks, as at 120 Hz
+    blended = BlendedSnapshot()
+    previous = None
+    
+    tracker = AllocationTracker(frames)
+    tracemalloc.start()
+    tracker.calibrate()
+    for frame in range(warmup + frames):
+        if game.state != GameState.PLAYING:
+            game.state = GameState.PLAYING
+            game.restart_level()
+        game.input_keys = moves[frame // 45 % 4]
+        
+        # Measure only once caches are warm
+        game.profiler = tracker if frame >= warmup else FrameProfiler()
+        tracker.begin_frame()
+        game.update()
+        snapshot = game.take_snapshot()
+        tracker.mark('snapshot')
+        drawn = blended.interpolate(previous, snapshot, 0.5)
+        tracker.mark('interpolation')
+        game.render(drawn)
+        tracker.mark('present')
+        previous = snapshot
+        if frame >= warmup:
+            tracker.end_frame()
+    tracemalloc.stop()
+    return tracker
+
+def check_allocations(tracker, budgets):
+    # Prints per-phase allocations; returns the phases whose median is over
+    # their budget (budgets maps phase -> bytes)
+    over = []
+    print(f'{"phase":<16} {"p50 B":>8} {"p95 B":>8} {"max B":>8}')
+    for phase in tracker.PHASES:
+        allocated = sorted(tracker.allocated[phase])
+        if not allocated:
+            continue
+        p50 = allocated[len(allocated) // 2]
+        p95 = allocated[min(len(allocated) - 1, len(allocated) * 95 // 100)]
+        flag = ''
+        if p50 > budgets.get(phase, 0):
+            over.append(phase)
+            flag = '  OVER BUDGET'
+        print(f'{phase:<16} {p50:8d} {p95:8d} {allocated[-1]:8d}{flag}')
+    
+    # Memory still held at the end of frames, on average (should stay near zero)
+    kept = sum(tracker.retained) / max(1, len(tracker.retained))
+    print(f'\nretained per frame: {kept:.1f} bytes')
+    return over
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Openstate hot-path microbenchmarks")
+    parser.add_argument('--bench', action='append', choices=sorted(BENCHMARKS),
+                        help="only run this benchmark (can be repeated)")
+    parser.add_argument('--size', action='append', choices=list(SIZES),
+                        help="only use this fixture size (can be repeated)")
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help="minimum seconds per repeat (default: 0.05)")
+    parser.add_argument('--repeats', type=int, default=5,
+                        help="number of timed repeats per benchmark (default: 5)")
+    parser.add_argument('--output', metavar='PATH', help="write results as JSON to PATH")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a previous results file")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown against the baseline as a fraction (default: 0.25)")
+    parser.add_argument('--alloc-budget', type=int, metavar='BYTES',
+                        help="instead of timing, play frames under tracemalloc and fail if any phase's "
+                             "median allocation per frame exceeds BYTES")
+    parser.add_argument('--alloc-check', action='store_true',
+                        help="like --alloc-budget, with the per-phase budgets in ALLOCATION_BUDGETS")
+    parser.add_argument('--alloc-frames', type=int, default=600,
+                        help="frames measured in allocation mode, after 120 warm-up frames (default: 600)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    
+    pygame.init()
+    
+    if args.alloc_budget is not None or args.alloc_check:
+        pygame.display.set_mode((800, 600))
+        if args.alloc_check:
+            budgets = ALLOCATION_BUDGETS
+        else:
+            budgets = dict.fromkeys(AllocationTracker.PHASES, args.alloc_budget)
+        over = check_allocations(measure_allocations(args.alloc_frames, 120), budgets)
+        if over:
+            print(f'\n{len(over)} phase(s) went over their allocation budget: {", ".join(over)}')
+        pygame.quit()
+        sys.exit(1 if over else 0)
+    
+    pygame.display.set_mode((1, 1))
+    
+    names = args.bench or list(BENCHMARKS)
+    sizes = args.size or list(SIZES)
+    results = run_benchmarks(names, sizes, args.min_time, args.repeats)
+    
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'seed': SEED,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}')
+            exit_code = 1
+    
+    pygame.quit()
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
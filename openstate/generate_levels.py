@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Offline level pack generator.
+
+Generates many levels from explicit seeds across worker processes, scores
+each one for difficulty (route length, how much of the optimal route the
+guards can see, bush density) and keeps the best levels of every difficulty
+tier in a JSON level pack.
+
+Examples:
+    python generate_levels.py --count 5000 --output pack.json
+    python generate_levels.py --count 20000 --levels 5-10 --per-tier 50 --workers 8
+"""
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Workers never open a window or an audio device
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from src.level import Level
+from src.tile import Tile
+from src.vision import vision_cone
+
+PACK_VERSION = 1
+
+# Difficulty tiers: name -> (lowest difficulty, highest difficulty). Levels are
+# ranked inside a tier by how close they are to its middle.
+TIERS = {
+    'easy': (0.0, 0.2),
+    'medium': (0.2, 0.4),
+    'hard': (0.4, 1.0),
+}
+
+# How much each metric contributes to the difficulty score (sums to 1)
+WEIGHTS = {
+    'route': 0.3,      # Detour of the optimal route over the straight start-exit distance
+    'coverage': 0.55,  # Fraction of the optimal route inside some guard's patrol vision
+    'cover': 0.15,     # Lack of bushes to hide in
+}
+
+# Metric values that count as maximally difficult (generated levels rarely
+# detour more than 50% or have more than half their route watched)
+MAX_DETOUR = 0.5
+MAX_COVERAGE = 0.5
+
+# Bush density (hiding spots per passable tile) at which cover stops helping
+FULL_COVER_DENSITY = 0.1
+
+# Seeds handed to a worker per task, so results don't cross the process
+# boundary one tiny message at a time
+BATCH_SIZE = 16
+
+def patrol_coverage(level):
+    # Tiles a guard can see at some point of its patrol, facing the way it walks
+    # (walls only; moving walls block a tile part of the time at most)
+    grid = level.grid
+    width = level.grid_width
+    height = level.grid_height
+    
+    def is_opaque(x, y):
+        return not (0 <= x < width and 0 <= y < height) or grid[y][x] == Tile.WALL
+    
+    seen = set()
+    tile_size = level.tile_size
+    for guard in level.guards:
+        points = [(x // tile_size, y // tile_size) for x, y in guard.patrol_points]
+        for i, (x0, y0) in enumerate(points):
+            x1, y1 = points[(i + 1) % len(points)]
+            dx = (x1 > x0) - (x1 < x0)
+            dy = (y1 > y0) - (y1 < y0)
+            if dx == 0 and dy == 0:
+                continue
+            direction = {(1, 0): 0, (0, 1): 90, (-1, 0): 180, (0, -1): 270}.get((dx, dy))
+            if direction is None:
+                # Diagonal leg: the guard faces along its larger axis
+                direction = (0 if dx > 0 else 180) if abs(x1 - x0) > abs(y1 - y0) else (90 if dy > 0 else 270)
+            
+            # Walk the leg one tile at a time
+            x, y = x0, y0
+            while True:
+                seen |= vision_cone(is_opaque, x, y, direction, guard.vision_range,
+                                    guard.vision_angle, tile_size)
+                if (x, y) == (x1, y1):
+                    break
+                if x != x1:
+                    x += dx
+                else:
+                    y += dy
+    return seen
+
+def score_level(level):
+    analysis = level.analysis
+    route = analysis.path_to_exit()
+    
+    # How much longer the route is than the Manhattan distance from start to exit
+    (start_x, start_y), (exit_x, exit_y) = analysis.start_tile, analysis.exit_tile
+    manhattan = max(1, abs(exit_x - start_x) + abs(exit_y - start_y))
+    detour = analysis.exit_path_length / manhattan - 1.0
+    route_factor = min(1.0, detour / MAX_DETOUR)
+    
+    seen = patrol_coverage(level)
+    coverage = sum(1 for tile in route if tile in seen) / len(route)
+    coverage_factor = min(1.0, coverage / MAX_COVERAGE)
+    
+    passable = sum(analysis.passable)
+    bush_density = len(level.hide_spots) / passable if passable else 0.0
+    cover_factor = 1.0 - min(1.0, bush_density / FULL_COVER_DENSITY)
+    
+    difficulty = (WEIGHTS['route'] * route_factor +
+                  WEIGHTS['coverage'] * coverage_factor +
+                  WEIGHTS['cover'] * cover_factor)
+    return {
+        'difficulty': round(difficulty, 4),
+        'route_length': analysis.exit_path_length,
+        'route_detour': round(detour, 4),
+        'route_coverage': round(coverage, 4),
+        'bush_density': round(bush_density, 4),
+    }
+
+def tier_of(difficulty):
+    for name, (low, high) in TIERS.items():
+        if low <= difficulty < high:
+            return name
+    return name  # difficulty == 1.0 belongs to the last tier
+
+def generate_batch(seeds, levels, screen_width, screen_height):
+    # Runs in a worker process; returns only plain data
+    results = []
+    for seed in seeds:
+        level_number = levels[seed % len(levels)]
+        random.seed(seed)
+        try:
+            level = Level(level_number, screen_width, screen_height)
+        except RuntimeError:
+            results.append((seed, None, None))
+            continue
+        data = level.to_data()
+        data['seed'] = seed
+        results.append((seed, data, score_level(level)))
+    return results
+
+def parse_levels(text):
+    # "5" or "3-8"
+    if '-' in text:
+        first, last = text.split('-', 1)
+        return list(range(int(first), int(last) + 1))
+    return [int(text)]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate and score an Openstate level pack")
+    parser.add_argument('--count', type=int, default=1000, help="number of levels to generate (default: 1000)")
+    parser.add_argument('--seed', type=int, default=0, help="first seed; levels use seed, seed+1, ...")
+    parser.add_argument('--levels', default='1-10', help="level number or range, e.g. 5 or 1-10 (default: 1-10)")
+    parser.add_argument('--per-tier', type=int, default=20, help="levels kept per difficulty tier (default: 20)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--width', type=int, default=800, help="screen width in pixels (default: 800)")
+    parser.add_argument('--height', type=int, default=600, help="screen height in pixels (default: 600)")
+    parser.add_argument('--output', metavar='PATH', default='level_pack.json',
+                        help="level pack file to write (default: level_pack.json)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    levels = parse_levels(args.levels)
+    seeds = list(range(args.seed, args.seed + args.count))
+    batches = [seeds[i:i + BATCH_SIZE] for i in range(0, len(seeds), BATCH_SIZE)]
+    
+    # Bounded min-heaps per tier: the root is the worst level kept so far
+    best = {name: [] for name in TIERS}
+    tier_counts = dict.fromkeys(TIERS, 0)
+    failed = 0
+    done = 0
+    start = time.perf_counter()
+    
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(generate_batch, batch, levels, args.width, args.height)
+                   for batch in batches]
+        for future in as_completed(futures):
+            for seed, data, score in future.result():
+                done += 1
+                if data is None:
+                    failed += 1
+                    continue
+                
+                tier = tier_of(score['difficulty'])
+                tier_counts[tier] += 1
+                low, high = TIERS[tier]
+                rank = -abs(score['difficulty'] - (low + high) / 2)
+                entry = (rank, -seed, score, data)
+                heap = best[tier]
+                if len(heap) < args.per_tier:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+            
+            elapsed = time.perf_counter() - start
+            sys.stderr.write(f'\r{done}/{len(seeds)} levels  {done / elapsed:7.1f}/s  ' +
+                             '  '.join(f'{name}: {tier_counts[name]}' for name in TIERS))
+            sys.stderr.flush()
+    sys.stderr.write('\n')
+    
+    pack = {
+        'version': PACK_VERSION,
+        'screen': [args.width, args.height],
+        'generated': len(seeds),
+        'failed': failed,
+        'weights': WEIGHTS,
+        'tiers': {},
+    }
+    for name in TIERS:
+        # Easiest first inside each tier
+        entries = sorted(best[name], key=lambda entry: (entry[2]['difficulty'], -entry[1]))
+        pack['tiers'][name] = [dict(data, score=score) for _, _, score, data in entries]
+    
+    with open(args.output, 'w') as f:
+        json.dump(pack, f)
+    
+    print(f'{len(seeds)} levels in {time.perf_counter() - start:.1f}s ({failed} failed), '
+          f'wrote {sum(len(t) for t in pack["tiers"].values())} to {args.output}')
+    for name in TIERS:
+        kept = pack['tiers'][name]
+        if kept:
+            print(f'  {name:<7} {len(kept):4d} kept of {tier_counts[name]:6d}  '
+                  f'difficulty {kept[0]["score"]["difficulty"]:.3f}-{kept[-1]["score"]["difficulty"]:.3f}')
+        else:
+            print(f'  {name:<7}    0 kept of {tier_counts[name]:6d}')
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,240 @@
 #!/usr/bin/env python3
+import time
+STARTUP_TIME = time.perf_counter()
+
 import pygame
 import sys
 import os
-from src.game import Game, GameState
+import argparse
+import contextlib
+from src.game import Game, GameState, SOUND_NAMES
+from src.assets import assets
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Openstate - Ninja Stealth")
+    parser.add_argument('--profile', action='store_true',
+                        help="start with the frame profiler and overlay enabled (toggle with F3)")
+    parser.add_argument('--profile-out', metavar='PATH',
+                        help="write the profiler trace to PATH on exit (.csv or .json)")
+    parser.add_argument('--telemetry', metavar='PATH',
+                        help="log gameplay events to PATH (binary records, flushed in the background)")
+    parser.add_argument('--heatmaps', metavar='PATH',
+                        help="with --telemetry, save per-level heatmaps to PATH on exit (.npz needs NumPy, else JSON)")
+    parser.add_argument('--record', metavar='PATH',
+                        help="record frames in the background: raw frames to a file, or a PNG sequence "
+                             "if PATH has no extension")
+    parser.add_argument('--record-command', metavar='CMD',
+                        help="pipe raw frames to CMD instead, e.g. \"ffmpeg -f rawvideo -pix_fmt bgra "
+                             "-s 800x600 -r 60 -i - out.mp4\"")
+    parser.add_argument('--record-every', type=int, default=1, metavar='N',
+                        help="record every Nth frame (default: 1)")
+    parser.add_argument('--spectate', metavar='ADDRESS',
+                        help="stream the game state to spectator clients (spectate.py) on a local TCP "
+                             "port, host:port or Unix socket path")
+    parser.add_argument('--threaded', action='store_true',
+                        help="run the simulation on its own thread at a fixed 60 ticks per second")
+    parser.add_argument('--renderer', choices=('surface', 'texture', 'software'), default='surface',
+                        help="draw with surface blits (default), SDL textures, or SDL textures on the "
+                             "software renderer; falls back to surfaces if SDL's renderer is unavailable")
+    parser.add_argument('--pacing', choices=('auto', 'vsync', 'busy', 'sleep'), default='auto',
+                        help="how frames are paced: sleep then spin until the frame is due (default), wait for "
+                             "the display's vsync, Clock.tick_busy_loop, or Clock.tick")
+    parser.add_argument('--fps', type=int, default=60, metavar='N',
+                        help="frames drawn per second, independent of the 60 Hz simulation (default: 60; "
+                             "with --pacing vsync the display's rate)")
+    parser.add_argument('--frame-histogram', action='store_true',
+                        help="print a histogram of frame times on exit")
+    parser.add_argument('--startup-timing', action='store_true',
+                        help="print how long each startup step took until the menu is on screen")
+    return parser.parse_args()
+
+def report_startup(timings):
+    # timings is a list of (step, perf_counter at the end of the step)
+    previous = STARTUP_TIME
+    parts = []
+    for step, at in timings:
+        parts.append(f"{step} {(at - previous) * 1000.0:.1f} ms")
+        previous = at
+    total = (timings[-1][1] - STARTUP_TIME) * 1000.0
+    print("startup: " + ", ".join(parts) + f" (boot to menu {total:.1f} ms)", file=sys.stderr)
+
+def handle_events(game, profiler):
+    # Returns False once the game should quit
+    running = True
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            running = False
+        
+        # Allow escape key to exit
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            if game.state == GameState.PLAYING:
+                game.state = GameState.MENU
+            else:
+                running = False
+        
+        # Toggle the profiler overlay
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            profiler.toggle()
+            if profiler.enabled:
+                profiler.begin_frame()
+        
+        # Pass events to game
+        game.handle_event(event)
+    return running
 
 def main():
-    # Initialize pygame
-    pygame.init()
-    pygame.mixer.init()
+    args = parse_args()
+    timings = [('imports', time.perf_counter())]
+    
+    # Initialize only the pygame subsystems the menu needs; the mixer is
+    # started by the asset manager when sounds are first loaded
+    pygame.display.init()
+    pygame.font.init()
+    timings.append(('init', time.perf_counter()))
     
     # Set up the display
     screen_width = 800
     screen_height = 600
-    screen = pygame.display.set_mode((screen_width, screen_height))
-    pygame.display.set_caption("Openstate - Ninja Stealth")
+    caption = "Openstate - Ninja Stealth"
+    texture_renderer = None
+    if args.renderer != 'surface':
+        from src.texture_renderer import create_texture_renderer
+        texture_renderer = create_texture_renderer((screen_width, screen_height), caption,
+                                                   software=args.renderer == 'software',
+                                                   vsync=args.pacing == 'vsync')
+    if texture_renderer:
+        # Drawing goes through the renderer; the game still lays out its menus on a surface
+        screen = pygame.Surface((screen_width, screen_height))
+    else:
+        screen = None
+        if args.pacing == 'vsync':
+            # SDL only honours vsync for windows it draws through a renderer
+            try:
+                screen = pygame.display.set_mode((screen_width, screen_height), pygame.SCALED, vsync=1)
+            except pygame.error as error:
+                print(f"vsync unavailable ({error}), pacing with timers", file=sys.stderr)
+                args.pacing = 'auto'
+        if screen is None:
+            screen = pygame.display.set_mode((screen_width, screen_height))
+        pygame.display.set_caption(caption)
+    timings.append(('display', time.perf_counter()))
+    
+    # Create game instance, starting with the menu (the level is built when PLAY is pressed)
+    game = Game(screen, GameState.MENU)
+    timings.append(('game', time.perf_counter()))
+    
+    # Frame profiler (F3 toggles it at runtime)
+    profiler = game.profiler
+    if args.profile or args.profile_out:
+        profiler.toggle()
+    
+    # Gameplay telemetry, written by a background thread
+    if args.telemetry:
+        from src.telemetry import Telemetry
+        game.telemetry = Telemetry(args.telemetry)
+        game.telemetry.start()
     
-    # Create game instance
-    game = Game(screen)
-    game.state = GameState.MENU  # Start with the menu
+    # Spectator stream, fanned out to viewers by a background thread
+    if args.spectate:
+        from src.spectator import SpectatorServer
+        game.spectators = SpectatorServer(args.spectate)
+        game.spectators.start()
     
-    # Create UI for menu
-    ui = game.ui
+    # Frame recording, written out by a background thread
+    recorder = None
+    if (args.record or args.record_command) and texture_renderer:
+        print("recording needs the surface renderer, not recording", file=sys.stderr)
+    elif args.record or args.record_command:
+        from src.capture import FrameRecorder
+        recorder = FrameRecorder((screen_width, screen_height), args.record, args.record_command,
+                                 every=args.record_every)
+        recorder.start(screen)
+    
+    # With --threaded the simulation ticks on its own thread and this loop
+    # only handles events and draws the latest snapshot
+    simulation = None
+    stepper = None
+    lock = contextlib.nullcontext()
+    if args.threaded:
+        from src.simulation import SimulationThread
+        simulation = SimulationThread(game)
+        lock = simulation.lock
+        simulation.start()
+    else:
+        # Ticks run from this loop, at a fixed rate however fast it draws
+        from src.simulation import FixedStep
+        stepper = FixedStep(game)
     
     # Main game loop
+    from src.frame_pacing import FramePacer
     running = True
-    clock = pygame.time.Clock()
+    pacer = FramePacer(args.pacing, args.fps)
+    first_frame = True
     
     while running:
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-                
-            # Allow escape key to exit
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                if game.state == GameState.PLAYING:
-                    game.state = GameState.MENU
-                else:
-                    running = False
-            
-            # Pass events to game
-            game.handle_event(event)
+        if profiler.enabled:
+            profiler.begin_frame()
+        
+        # Handle events (between simulation ticks)
+        with lock:
+            running = handle_events(game, profiler)
+            if simulation:
+                game.input_keys = pygame.key.get_pressed()
+        
+        if profiler.enabled:
+            profiler.mark('input')
+        
+        # Run the simulation ticks that are due
+        if stepper:
+            stepper.advance()
         
-        # Update game state
-        if game.state == GameState.PLAYING or game.state == GameState.LEVEL_COMPLETE:
-            game.update()
+        # Render the game between the last two ticks and update the display
+        snapshot = simulation.interpolated() if simulation else stepper.snapshot()
+        if texture_renderer:
+            texture_renderer.render(game, snapshot)
+            texture_renderer.present()
+        else:
+            game.render(snapshot)
+            pygame.display.flip()
+        if recorder:
+            recorder.capture(screen)
         
-        # Render the game
-        game.render()
+        if profiler.enabled:
+            profiler.mark('present')
+            profiler.end_frame()
         
-        # Update the display
-        pygame.display.flip()
+        if first_frame:
+            first_frame = False
+            timings.append(('first frame', time.perf_counter()))
+            if args.startup_timing:
+                report_startup(timings)
+            
+            # The menu is up; decode sounds in the background before PLAY is pressed
+            assets.preload(sounds=SOUND_NAMES)
         
-        # Cap the frame rate
-        clock.tick(60)
+        # Wait until the next frame is due
+        pacer.wait()
+    
+    if simulation:
+        simulation.stop()
+    if args.frame_histogram:
+        print(pacer.report(), file=sys.stderr)
+    
+    # Write the profiler trace before shutting down
+    if args.profile_out:
+        profiler.export(args.profile_out)
+    
+    # Write out the frames still queued
+    if recorder:
+        recorder.close()
+    
+    # Disconnect spectators
+    if game.spectators:
+        game.spectators.close()
+    
+    # Flush the last telemetry events
+    if game.telemetry:
+        game.telemetry.close(args.heatmaps)
     
     # Clean up
     pygame.quit()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Automated playtesting of generated levels.
+
+Runs the playtest bot on levels built from seeds (or on every level of a
+pack written by generate_levels.py) and reports whether each level can be
+finished without being caught, how long the bot took and the stars it got.
+Exits with status 1 if any level could not be finished.
+
+Examples:
+    python playtest.py --count 200 --levels 1-10
+    python playtest.py --pack pack.json --workers 8
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Run without a window or audio device
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from src.level import Level
+from src.bot import PlaytestBot
+from generate_levels import parse_levels
+
+def playtest(seed, level_number, screen_width, screen_height, max_ticks, replay):
+    # Runs in a worker process
+    random.seed(seed)
+    level = Level(level_number, screen_width, screen_height)
+    bot = PlaytestBot(level, max_ticks)
+    if replay:
+        result = bot.run()
+    else:
+        moves = bot.plan()
+        result = {
+            'completed': moves is not None,
+            'ticks': len(moves) * bot.step_ticks if moves else 0,
+            'stars': 3 if moves else 0,
+            'plan_ms': round(bot.plan_ms, 2),
+        }
+        result['seconds'] = round(result['ticks'] / 60.0, 2)
+        if moves is None:
+            result['failure'] = bot.failure
+    result['seed'] = seed
+    result['level_number'] = level_number
+    return result
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Openstate playtest bot")
+    parser.add_argument('--pack', metavar='PATH', help="playtest every level of a level pack")
+    parser.add_argument('--count', type=int, default=100, help="number of seeded levels (default: 100)")
+    parser.add_argument('--seed', type=int, default=0, help="first seed; levels use seed, seed+1, ...")
+    parser.add_argument('--levels', default='1-10', help="level number or range, e.g. 5 or 1-10 (default: 1-10)")
+    parser.add_argument('--width', type=int, default=800, help="screen width in pixels (default: 800)")
+    parser.add_argument('--height', type=int, default=600, help="screen height in pixels (default: 600)")
+    parser.add_argument('--max-seconds', type=float, default=180.0,
+                        help="give up on a level after this much game time (default: 180)")
+    parser.add_argument('--no-replay', action='store_true',
+                        help="only plan routes, don't replay them through the game rules")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--output', metavar='PATH', help="write per-level results as JSON to PATH")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.pack:
+        with open(args.pack) as f:
+            pack = json.load(f)
+        width, height = pack['screen']
+        jobs = [(entry['seed'], entry['level_number']) for tier in pack['tiers'].values() for entry in tier]
+    else:
+        width, height = args.width, args.height
+        levels = parse_levels(args.levels)
+        jobs = [(seed, levels[seed % len(levels)]) for seed in range(args.seed, args.seed + args.count)]
+    
+    max_ticks = int(args.max_seconds * 60)
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(playtest, seed, level_number, width, height, max_ticks, not args.no_replay)
+                   for seed, level_number in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if not result['completed']:
+                print(f"seed {result['seed']:>6} level {result['level_number']:>2}: FAILED ({result['failure']})")
+            for deviation in result.get('deviations', ()):
+                print(f"seed {result['seed']:>6} level {result['level_number']:>2}: "
+                      f"left the plan at tick {deviation['tick']}: {deviation['reason']}")
+            sys.stderr.write(f'\r{len(results)}/{len(jobs)} levels')
+            sys.stderr.flush()
+    sys.stderr.write('\n')
+    
+    results.sort(key=lambda result: result['seed'])
+    solved = [result for result in results if result['completed']]
+    print(f'{len(solved)}/{len(results)} levels finished without capture '
+          f'in {time.perf_counter() - start:.1f}s')
+    if solved:
+        seconds = sorted(result['seconds'] for result in solved)
+        plan_ms = sorted(result['plan_ms'] for result in results)
+        stars = [result['stars'] for result in solved]
+        print(f'  solution time: median {seconds[len(seconds) // 2]:.1f}s, max {seconds[-1]:.1f}s')
+        print(f'  stars: ' + ', '.join(f'{n} star(s) x{stars.count(n)}' for n in (3, 2, 1) if stars.count(n)))
+        print(f'  planning: median {plan_ms[len(plan_ms) // 2]:.1f}ms, max {plan_ms[-1]:.1f}ms')
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    
+    sys.exit(0 if len(solved) == len(results) else 1)
+
+if __name__ == "__main__":
+    main()
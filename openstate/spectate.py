@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Watch a game streamed by main.py --spectate.
+
+Connects to the game's spectator stream and draws the level from it: the
+game runs only once, however many viewers watch. With --headless nothing is
+drawn; the viewer only decodes the stream and reports what it received,
+which is handy for checking a stream over loopback.
+
+Examples:
+    python main.py --spectate 7777 &
+    python spectate.py 7777
+    python spectate.py /tmp/openstate.sock
+    python spectate.py 7777 --headless --ticks 600
+"""
+import os
+import sys
+import time
+import argparse
+
+import pygame
+
+from src.assets import assets
+from src.tile import Tile
+from src.vision import cone_polygon
+from src.spectator import SpectatorClient, PlayerFlag, GuardFlag
+
+# Entity sizes in the game (the stream carries positions only)
+ENTITY_SIZE = (24, 24)
+SCROLL_SIZE = (16, 16)
+
+TILE_COLORS = {
+    Tile.EMPTY: (50, 50, 50),
+    Tile.WALL: (100, 100, 100),
+    Tile.HIDE_SPOT: (0, 100, 0),
+    Tile.EXIT: (255, 215, 0),
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Openstate spectator")
+    parser.add_argument('address', nargs='?', default='7777',
+                        help="TCP port, host:port or Unix socket path the game streams to (default: 7777)")
+    parser.add_argument('--headless', action='store_true',
+                        help="don't open a window; decode the stream and print statistics")
+    parser.add_argument('--ticks', type=int, default=0, metavar='N',
+                        help="exit after N ticks (default: run until the game closes the stream)")
+    return parser.parse_args()
+
+class SpectatorRenderer:
+    def __init__(self, view):
+        self.view = view
+        self.background = None
+        self.background_for = -1
+        self.cone_layer = None
+        
+        size = ENTITY_SIZE
+        self.player_images = {
+            'normal': assets.image('player', size, (0, 0, 255)),
+            'crouching': assets.image('player_crouching', size, (0, 100, 255)),
+            'hidden': assets.image('player_hidden', size, (100, 100, 100)),
+        }
+        self.guard_images = {
+            'normal': assets.image('guard', size, (200, 0, 0)),
+            'pursuing': assets.image('guard_pursuing', size, (255, 0, 0)),
+            'alerted': assets.image('guard_alerted', size, (255, 255, 0)),
+            'returning': assets.image('guard_returning', size, (255, 165, 0)),
+        }
+        self.scroll_image = assets.image('scroll', SCROLL_SIZE, (255, 255, 0))
+    
+    def render(self, screen):
+        view = self.view
+        screen.fill((0, 0, 0))
+        if view.grid is None:
+            return
+        
+        # The tiles only change with a keyframe
+        if self.background_for != view.keyframes:
+            tile_size = view.tile_size
+            size = (view.grid_width * tile_size, view.grid_height * tile_size)
+            self.background = pygame.Surface(size)
+            self.cone_layer = pygame.Surface(size, pygame.SRCALPHA)
+            images = {tile: assets.image('tiles', (tile_size, tile_size), color, tile)
+                      for tile, color in TILE_COLORS.items()}
+            for y, row in enumerate(view.grid):
+                for x, tile in enumerate(row):
+                    self.background.blit(images[tile], (x * tile_size, y * tile_size))
+            self.background_for = view.keyframes
+        screen.blit(self.background, (0, 0))
+        
+        for i, position in enumerate(view.scroll_positions):
+            if view.scrolls >> i & 1:
+                screen.blit(self.scroll_image, position)
+        for (start, end, size), position in zip(view.wall_layouts, view.walls):
+            screen.blit(assets.image('moving_wall', size, (150, 50, 50)), position)
+        
+        # Guards and their vision cones (walls only, moving walls aren't drawn into them)
+        self.cone_layer.fill((0, 0, 0, 0))
+        for (points, vision_range, vision_angle), state in zip(view.patrols, view.guards):
+            if state is None:
+                continue
+            x, y, flags = state
+            if flags & GuardFlag.PURSUING:
+                image = self.guard_images['pursuing']
+            elif flags & GuardFlag.ALERTED:
+                image = self.guard_images['alerted']
+            elif flags & GuardFlag.RETURNING:
+                image = self.guard_images['returning']
+            else:
+                image = self.guard_images['normal']
+            if not flags & GuardFlag.PURSUING:
+                center = (x + ENTITY_SIZE[0] // 2, y + ENTITY_SIZE[1] // 2)
+                polygon = cone_polygon(view.is_opaque, center, (flags & 3) * 90,
+                                       vision_range, vision_angle, view.tile_size)
+                pygame.draw.polygon(self.cone_layer, (255, 0, 0, 50),
+                                    [(center[0] + px, center[1] + py) for px, py in polygon])
+            screen.blit(image, (x, y))
+        screen.blit(self.cone_layer, (0, 0))
+        
+        if view.player is not None:
+            x, y, flags = view.player
+            if flags & PlayerFlag.HIDDEN:
+                image = self.player_images['hidden']
+            elif flags & PlayerFlag.CROUCHING:
+                image = self.player_images['crouching']
+            else:
+                image = self.player_images['normal']
+            screen.blit(image, (x, y))
+
+def main():
+    args = parse_args()
+    if args.headless:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    
+    try:
+        client = SpectatorClient(args.address)
+    except OSError as error:
+        print(f"can't connect to {args.address}: {error}", file=sys.stderr)
+        sys.exit(1)
+    view = client.view
+    
+    pygame.display.init()
+    screen = None
+    renderer = None
+    if not args.headless:
+        pygame.display.set_caption("Openstate - Spectator")
+    
+    clock = pygame.time.Clock()
+    start = time.perf_counter()
+    ticks = 0
+    running = True
+    while running and not client.closed:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        
+        ticks += client.poll()
+        if args.ticks and ticks >= args.ticks:
+            running = False
+        
+        if not args.headless and view.grid is not None:
+            size = (view.grid_width * view.tile_size, view.grid_height * view.tile_size)
+            if screen is None or screen.get_size() != size:
+                screen = pygame.display.set_mode(size)
+                renderer = SpectatorRenderer(view)
+            renderer.render(screen)
+            pygame.display.flip()
+        clock.tick(60)
+    
+    elapsed = time.perf_counter() - start
+    client.close()
+    pygame.quit()
+    print(f"{ticks} ticks, {view.keyframes} keyframe(s), {client.bytes_received} bytes "
+          f"({client.bytes_received / max(1, ticks):.1f} bytes/tick) in {elapsed:.1f}s; "
+          f"last tick {view.tick}, level {view.level_number}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import os
+import json
+import threading
+import pygame
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets')
+
+# Resolved system font paths are cached here so startup doesn't rescan the font list
+FONT_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'openstate', 'fonts.json'
+)
+
+class AssetManager:
+    """Loads images and sounds from assets/ on first use and shares them.
+    
+    Images fall back to a solid placeholder of the requested color when their
+    file is missing, and every surface is converted to the display pixel format
+    once so blits don't pay for conversion. Sounds fall back to silence.
+    """
+    
+    def __init__(self, base_dir=ASSETS_DIR):
+        self.base_dir = base_dir
+        self.images = {}
+        self.sounds = {}
+        self.fonts = {}
+        self.font_paths = None  # Font name -> file path (or None for the default font)
+        self.files = {}  # Decoded image files, shared by every frame cut from them
+        
+        # Surfaces loaded before a display existed (or by the preload thread)
+        self.unconverted = set()
+        
+        self.lock = threading.Lock()
+        self.preload_thread = None
+    
+    def image(self, name, size, color=(255, 0, 255), frame=0):
+        # Sprite sheets are laid out horizontally, one frame per size[0] pixels
+        key = (name, size, color, frame)
+        surface = self.images.get(key)
+        if surface is None:
+            with self.lock:
+                surface = self.images.get(key)
+                if surface is None:
+                    surface = self.load_image(name, size, color, frame)
+                    self.images[key] = surface
+                    self.unconverted.add(key)
+        
+        # Conversion needs the display, so it always happens on the main thread
+        if (key in self.unconverted and pygame.display.get_surface() is not None
+                and threading.current_thread() is threading.main_thread()):
+            surface = self.convert(key)
+        return surface
+    
+    def load_image(self, name, size, color, frame):
+        sheet = self.load_file(name)
+        if sheet is None:
+            surface = pygame.Surface(size)
+            surface.fill(color)
+            return surface
+        
+        # Cut the frame out of the sheet and scale it if needed
+        frame_width = min(size[0], sheet.get_width())
+        if (frame + 1) * frame_width > sheet.get_width():
+            frame = 0  # Sheet doesn't have this frame, use the first one
+        area = pygame.Rect(frame * frame_width, 0, frame_width, min(size[1], sheet.get_height()))
+        surface = sheet.subsurface(area).copy()
+        if surface.get_size() != size:
+            surface = pygame.transform.scale(surface, size)
+        return surface
+    
+    def load_file(self, name):
+        if name not in self.files:
+            path = os.path.join(self.base_dir, 'images', name + '.png')
+            sheet = None
+            if os.path.isfile(path):
+                try:
+                    sheet = pygame.image.load(path)
+                except pygame.error:
+                    sheet = None
+            self.files[name] = sheet
+        return self.files[name]
+    
+    def convert(self, key):
+        with self.lock:
+            surface = self.images[key]
+            if key in self.unconverted:
+                if surface.get_flags() & pygame.SRCALPHA:
+                    surface = surface.convert_alpha()
+                else:
+                    surface = surface.convert()
+                self.images[key] = surface
+                self.unconverted.discard(key)
+        return surface
+    
+    def convert_pending(self):
+        # Converts every surface loaded off the main thread (with --threaded,
+        # levels after the first are built on the simulation thread). Returns
+        # {unconverted: converted} so whoever kept the old surfaces can swap them.
+        if pygame.display.get_surface() is None:
+            return {}
+        with self.lock:
+            pending = [(key, self.images[key]) for key in self.unconverted]
+        return {surface: self.convert(key) for key, surface in pending}
+    
+    def sound(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            with self.lock:
+                sound = self.sounds.get(name)
+                if sound is None:
+                    sound = self.load_sound(name)
+                    self.sounds[name] = sound
+        return sound
+    
+    def load_sound(self, name):
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        
+        path = os.path.join(self.base_dir, 'sounds', name + '.wav')
+        if os.path.isfile(path):
+            try:
+                return pygame.mixer.Sound(path)
+            except pygame.error:
+                pass
+        
+        # Missing or unreadable file: use a silent placeholder
+        return pygame.mixer.Sound(buffer=bytearray(44))
+    
+    def font(self, name, size):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = pygame.font.Font(self.font_path(name), size)
+            self.fonts[key] = font
+        return font
+    
+    def font_path(self, name):
+        # A bundled assets/fonts/<name>.ttf always wins over system fonts
+        bundled = os.path.join(self.base_dir, 'fonts', name.lower() + '.ttf')
+        if os.path.isfile(bundled):
+            return bundled
+        
+        if self.font_paths is None:
+            self.font_paths = self.load_font_cache()
+        
+        if name in self.font_paths:
+            path = self.font_paths[name]
+            if path is None or os.path.isfile(path):
+                return path
+        
+        # Not cached (or the file went away): do the slow system font lookup once
+        path = pygame.font.match_font(name)
+        self.font_paths[name] = path
+        self.save_font_cache()
+        return path
+    
+    def load_font_cache(self):
+        try:
+            with open(FONT_CACHE_PATH) as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+        except (OSError, ValueError):
+            pass
+        return {}
+    
+    def save_font_cache(self):
+        try:
+            os.makedirs(os.path.dirname(FONT_CACHE_PATH), exist_ok=True)
+            with open(FONT_CACHE_PATH, 'w') as f:
+                json.dump(self.font_paths, f, indent=2)
+        except OSError:
+            pass  # The cache is only an optimization
+    
+    def preload(self, sounds=(), images=(), background=True):
+        # images is a list of (name, size, color) tuples as passed to image()
+        def load_all():
+            for name in sounds:
+                self.sound(name)
+            for name, size, color in images:
+                self.image(name, size, color)
+        
+        if not background:
+            load_all()
+            return
+        
+        self.preload_thread = threading.Thread(target=load_all, name='asset-preload', daemon=True)
+        self.preload_thread.start()
+
+# Shared by every level and entity
+assets = AssetManager()
@@ -0,0 +1,138 @@
+import time
+from collections import namedtuple
+
+import pygame
+
+from .assets import assets
+
+# priority: who wins when every channel is busy (higher steals from lower)
+# cooldown: seconds before the same sound may start again
+# voices: how many copies of the sound may play at once
+# volume: relative to the master volume
+SoundSettings = namedtuple('SoundSettings', ('priority', 'cooldown', 'voices', 'volume'))
+
+DEFAULT_SETTINGS = SoundSettings(priority=1, cooldown=0.05, voices=2, volume=1.0)
+
+SOUND_SETTINGS = {
+    'game_over': SoundSettings(priority=3, cooldown=0.5, voices=1, volume=1.0),
+    'alert': SoundSettings(priority=3, cooldown=0.25, voices=2, volume=1.0),
+    'level_complete': SoundSettings(priority=3, cooldown=0.5, voices=1, volume=1.0),
+    'pickup': SoundSettings(priority=2, cooldown=0.05, voices=2, volume=1.0),
+    'footstep': SoundSettings(priority=0, cooldown=0.12, voices=1, volume=0.6),
+}
+
+class AudioManager:
+    """Plays the game's sounds on a fixed pool of reserved mixer channels.
+    
+    The pool is reserved with pygame.mixer.set_reserved, so nothing else
+    plays on it and at most `channels` voices are ever mixed. A sound that
+    retriggers within its cooldown is skipped, and a sound already playing
+    `voices` times restarts its oldest copy. When every channel is busy,
+    the oldest voice of the lowest priority below the new sound is stolen;
+    if there is none, the new sound is dropped. play() only looks at the
+    pool's own bookkeeping and never waits on the mixer.
+    
+    Muting is a single switch: it stops every channel and makes play()
+    return straight away, so a muted game does no mixing at all.
+    """
+    
+    def __init__(self, channels=8, master_volume=0.5, settings=SOUND_SETTINGS):
+        self.channel_count = channels
+        self.master_volume = master_volume
+        self.settings = settings
+        self.muted = False
+        
+        # Filled in by load(); the mixer isn't started until sounds are needed
+        self.loaded = False
+        self.sounds = {}
+        self.channels = []
+        self.voice_names = []  # Per channel: name of the last sound started on it
+        self.voice_priorities = []
+        self.voice_starts = []
+        self.last_played = {}
+        
+        # Counters for tuning the settings
+        self.played = 0
+        self.stolen = 0
+        self.throttled = 0
+        self.dropped = 0
+    
+    def load(self, names):
+        # Loads sounds through the asset manager (which starts the mixer) and
+        # reserves the channel pool
+        for name in names:
+            sound = assets.sound(name)
+            sound.set_volume(self.master_volume * self.settings.get(name, DEFAULT_SETTINGS).volume)
+            self.sounds[name] = sound
+        
+        if not self.channels:
+            if pygame.mixer.get_num_channels() < self.channel_count:
+                pygame.mixer.set_num_channels(self.channel_count)
+            pygame.mixer.set_reserved(self.channel_count)
+            self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+            self.voice_names = [None] * self.channel_count
+            self.voice_priorities = [-1] * self.channel_count
+            self.voice_starts = [0.0] * self.channel_count
+        self.loaded = True
+    
+    def set_muted(self, muted):
+        self.muted = muted
+        if muted and pygame.mixer.get_init():
+            pygame.mixer.stop()
+    
+    def play(self, name):
+        # Returns the channel the sound started on, or None if it was skipped
+        if self.muted or not self.loaded:
+            return None
+        settings = self.settings.get(name, DEFAULT_SETTINGS)
+        now = time.perf_counter()
+        if now - self.last_played.get(name, -settings.cooldown) < settings.cooldown:
+            self.throttled += 1
+            return None
+        
+        slot = self.find_slot(name, settings)
+        if slot is None:
+            self.dropped += 1
+            return None
+        
+        channel = self.channels[slot]
+        channel.play(self.sounds[name])
+        self.voice_names[slot] = name
+        self.voice_priorities[slot] = settings.priority
+        self.voice_starts[slot] = now
+        self.last_played[name] = now
+        self.played += 1
+        return channel
+    
+    def find_slot(self, name, settings):
+        # An idle channel, else the copy of this sound or lower-priority voice to steal
+        channels = self.channels
+        names = self.voice_names
+        starts = self.voice_starts
+        idle = None
+        copies = 0
+        oldest_copy = None
+        victim = None
+        for slot in range(len(channels)):
+            if not channels[slot].get_busy():
+                if idle is None:
+                    idle = slot
+                continue
+            if names[slot] == name:
+                copies += 1
+                if oldest_copy is None or starts[slot] < starts[oldest_copy]:
+                    oldest_copy = slot
+            elif self.voice_priorities[slot] < settings.priority:
+                if (victim is None or self.voice_priorities[slot] < self.voice_priorities[victim] or
+                        (self.voice_priorities[slot] == self.voice_priorities[victim] and
+                         starts[slot] < starts[victim])):
+                    victim = slot
+        
+        if copies >= settings.voices:
+            self.stolen += 1
+            return oldest_copy
+        if idle is not None:
+            return idle
+        if victim is not None:
+            self.stolen += 1
+        return victim
@@ -0,0 +1,373 @@
+import time
+from collections import defaultdict
+
+import pygame
+from .tile import Tile
+from .game import Game, GameState
+from .player import Player
+
+# Keys held for each move (the bot always crouches so bushes hide it)
+MOVE_KEYS = {
+    'wait': (),
+    'left': (pygame.K_a,),
+    'right': (pygame.K_d,),
+    'up': (pygame.K_w,),
+    'down': (pygame.K_s,),
+}
+
+class PlaytestBot:
+    """Plays a level headless without getting caught, for automated QA.
+    
+    Planning is a breadth-first search over (tile, collected scrolls, tick)
+    states in steps of the ticks it takes the player to cross one tile. A tile
+    is safe for a step if no patrolling guard may see it during that step
+    (from the level's danger map) or it is a bush, and no moving wall sweeps
+    over it. Each set of collected scrolls keeps its frontier as one bitmask
+    of tiles, so every state is expanded exactly once and a step costs a few
+    integer operations per set. Every scroll order is searched, so a level is
+    only reported unsolvable once no state is left or the time limit is hit.
+    
+    The plan is then replayed through Game.update with the real game rules,
+    and the result of that replay is what gets reported. The plan assumes
+    guards stay on patrol, so the replay stops at the first tick the game
+    leaves it (a guard reacts, or the player is held up), records why, keeps
+    out of sight until every guard is back on patrol, and plans the rest of
+    the level again from there.
+    """
+    
+    # Deviations from the plan a replay recovers from before giving up
+    MAX_REPLANS = 5
+    
+    def __init__(self, level, max_ticks=60 * 60 * 3):
+        self.level = level
+        self.max_ticks = max_ticks
+        self.width = level.grid_width
+        self.height = level.grid_height
+        
+        # One step moves the player exactly one tile
+        self.step_ticks = level.tile_size // Player(level.player_start_pos).speed
+        
+        # Tile bitmasks (bit y * width + x)
+        width = self.width
+        self.all_tiles = (1 << (width * self.height)) - 1
+        self.passable = 0
+        self.bushes = 0
+        for y, row in enumerate(level.grid):
+            for x, tile in enumerate(row):
+                if tile != Tile.WALL:
+                    self.passable |= 1 << (y * width + x)
+                if tile == Tile.HIDE_SPOT:
+                    self.bushes |= 1 << (y * width + x)
+        
+        # Masks that stop shifts from wrapping around to the next row
+        first_column = 0
+        last_column = 0
+        for y in range(self.height):
+            first_column |= 1 << (y * width)
+            last_column |= 1 << (y * width + width - 1)
+        self.not_first_column = self.all_tiles & ~first_column
+        self.not_last_column = self.all_tiles & ~last_column
+        
+        self.safe_masks = {}
+        self.start_tick = 0
+        self.route = None
+        self.plan_ms = 0.0
+        self.failure = None
+    
+    def index(self, x, y):
+        return y * self.width + x
+    
+    def safe_mask(self, step):
+        # Tiles the player can occupy during the whole step
+        mask = self.safe_masks.get(step)
+        if mask is not None:
+            return mask
+        
+        # The player is checked after each of the step's updates, at ticks t0+1..t0+step_ticks
+        t0 = self.start_tick + step * self.step_ticks
+        danger = 0
+        for tick in range(t0 + 1, t0 + self.step_ticks + 1):
+            danger |= self.danger_map.danger_mask(tick)
+        
+        mask = ((self.all_tiles & ~danger) | self.bushes) & ~self.wall_mask(t0) & self.passable
+        self.safe_masks[step] = mask
+        return mask
+    
+    def wall_mask(self, t0):
+        # Tiles a moving wall touches at any point of the step starting at tick t0
+        blocked = 0
+        tile_size = self.level.tile_size
+        for wall in self.level.moving_walls:
+            rect = wall.swept_rect(t0, t0 + self.step_ticks)
+            for y in range(max(0, rect.top // tile_size), min(self.height, (rect.bottom - 1) // tile_size + 1)):
+                for x in range(max(0, rect.left // tile_size), min(self.width, (rect.right - 1) // tile_size + 1)):
+                    blocked |= 1 << self.index(x, y)
+        return blocked
+    
+    def dilate(self, tiles):
+        # Every tile in the set plus its four neighbours
+        width = self.width
+        return (tiles |
+                ((tiles << 1) & self.not_first_column) |
+                ((tiles >> 1) & self.not_last_column) |
+                (tiles << width) |
+                (tiles >> width)) & self.all_tiles
+    
+    def plan(self, start_tile=None):
+        # Returns the list of moves (one per step) from a tile at the level's current
+        # tick (the player start by default), or None with self.failure set. The
+        # tiles the plan passes through are kept in self.route.
+        start = time.perf_counter()
+        self.failure = None
+        self.route = None
+        self.danger_map = self.level.get_danger_map()
+        if self.danger_map is None:
+            self.failure = "guards are not on patrol"
+            return None
+        self.start_tick = self.level.tick
+        self.safe_masks = {}
+        
+        tile_size = self.level.tile_size
+        exit_bit = 1 << self.index(self.level.exit_rect.x // tile_size, self.level.exit_rect.y // tile_size)
+        scrolls = 0
+        for scroll in self.level.scrolls:
+            scrolls |= 1 << self.index(scroll.rect.centerx // tile_size, scroll.rect.centery // tile_size)
+        
+        if start_tile is None:
+            start_tile = self.level.player_start_tile
+        moves = self.search(self.index(*start_tile), scrolls, exit_bit)
+        self.plan_ms = (time.perf_counter() - start) * 1000.0
+        return moves
+    
+    def search(self, start, scrolls, exit_bit):
+        # Time-layered BFS over (tile, collected scrolls) states. The frontier maps
+        # each set of collected scrolls (as a tile bitmask) to the tiles reachable
+        # with exactly those collected, so every scroll order is explored at once
+        # and the first layer that reaches the exit with every scroll is the
+        # earliest finish. Returns the moves, or None once the time limit is hit.
+        frontier = {0: 1 << start}
+        layers = []
+        best = 0
+        last_step = self.max_ticks // self.step_ticks
+        for step in range(last_step):
+            safe = self.safe_mask(step)
+            
+            # Stay off the exit until every scroll is collected, or the level would end early
+            layer = {}
+            for collected, tiles in frontier.items():
+                survivors = tiles & safe
+                if collected != scrolls:
+                    survivors &= ~exit_bit
+                if survivors:
+                    layer[collected] = survivors
+            if not layer:
+                break
+            layers.append(layer)
+            
+            frontier = {}
+            for collected, survivors in layer.items():
+                reachable = self.dilate(survivors) & safe
+                if collected == scrolls and reachable & exit_bit:
+                    return self.backtrack(exit_bit.bit_length() - 1, collected, layers)
+                
+                # Stepping onto a scroll collects it
+                found = reachable & scrolls & ~collected
+                reachable &= ~found
+                while found:
+                    bit = found & -found
+                    found ^= bit
+                    frontier[collected | bit] = frontier.get(collected | bit, 0) | bit
+                if reachable:
+                    frontier[collected] = frontier.get(collected, 0) | reachable
+            
+            for collected in frontier:
+                if bin(collected).count('1') > bin(best).count('1'):
+                    best = collected
+        
+        missing = bin(scrolls & ~best).count('1')
+        if missing:
+            self.failure = "no safe route to {} of {} scrolls".format(missing, bin(scrolls).count('1'))
+        else:
+            self.failure = "no safe route to the exit"
+        if len(layers) == last_step:
+            self.failure += " within {:.0f}s".format(self.max_ticks / 60.0)
+        return None
+    
+    def backtrack(self, goal, collected, layers):
+        # Walk back through the layers, preferring to stay put, and turn the tiles into moves
+        width = self.width
+        tiles = [goal]
+        current = goal
+        for layer in reversed(layers):
+            # The state before either had this tile's scroll already, or picked it up on this step
+            bit = 1 << current
+            options = [collected]
+            if collected & bit:
+                options.append(collected & ~bit)
+            for before in options:
+                survivors = layer.get(before, 0)
+                for candidate in (current, current - 1, current + 1, current - width, current + width):
+                    if candidate >= 0 and survivors >> candidate & 1 and (before == collected or candidate != current):
+                        break
+                else:
+                    continue
+                current = candidate
+                collected = before
+                break
+            tiles.append(current)
+        tiles.reverse()
+        self.route = [(tile % width, tile // width) for tile in tiles]
+        
+        moves = []
+        directions = {0: 'wait', -1: 'left', 1: 'right', -width: 'up', width: 'down'}
+        for a, b in zip(tiles, tiles[1:]):
+            moves.append(directions[b - a])
+        return moves
+    
+    def play(self, moves):
+        # Replay the plan through the real game rules, holding keys like a player would.
+        # The replay is checked against the plan every tick; when the game leaves it (a
+        # guard breaks off its patrol, or the player doesn't end a step on the planned
+        # tile) the deviation is recorded and the rest of the level is planned again.
+        level = self.level
+        game = Game(pygame.Surface((level.width, level.height)), GameState.MENU)
+        game.sound_enabled = False
+        game.level = level
+        game.player = Player(level.player_start_pos)
+        game.state = GameState.PLAYING
+        
+        keys = defaultdict(bool)
+        game.input_keys = keys
+        ticks = 0
+        deviations = []
+        failure = None
+        route = self.route
+        while moves is not None and game.state == GameState.PLAYING:
+            deviation = None
+            for step, move in enumerate(moves):
+                keys.clear()
+                keys[pygame.K_LCTRL] = True
+                for key in MOVE_KEYS[move]:
+                    keys[key] = True
+                # A guard reacting is noted on the tick it happens, but the step is
+                # finished so the player ends up on a whole tile to plan from
+                for _ in range(self.step_ticks):
+                    game.update()
+                    ticks += 1
+                    if game.state != GameState.PLAYING:
+                        break
+                    if deviation is None and level.danger_map is None:
+                        deviation = (level.tick, self.guard_deviation())
+                if game.state != GameState.PLAYING or deviation:
+                    break
+                tile = self.player_tile(game.player)
+                if tile != route[step + 1]:
+                    deviation = (level.tick, "player reached {} instead of {}".format(tile, route[step + 1]))
+                    break
+            if deviation is not None:
+                deviations.append({'tick': deviation[0], 'reason': deviation[1]})
+            if deviation is None or game.state != GameState.PLAYING:
+                break
+            if len(deviations) > self.MAX_REPLANS:
+                failure = "gave up after {} re-plans".format(self.MAX_REPLANS)
+                break
+            
+            # Keep out of sight until every guard is back on patrol, then plan again from here
+            while level.get_danger_map() is None and game.state == GameState.PLAYING and ticks < self.max_ticks:
+                keys.clear()
+                keys[pygame.K_LCTRL] = True
+                for key in MOVE_KEYS[self.evade(game.player)]:
+                    keys[key] = True
+                for _ in range(self.step_ticks):
+                    game.update()
+                    ticks += 1
+                    if game.state != GameState.PLAYING:
+                        break
+            if game.state != GameState.PLAYING:
+                break
+            if not self.on_tile(game.player):
+                failure = "player left the tile grid at tick {}".format(level.tick)
+                break
+            moves = self.plan(self.player_tile(game.player))
+            route = self.route
+            if moves is None:
+                failure = "re-plan at tick {} failed: {}".format(level.tick, self.failure)
+        
+        completed = game.state == GameState.LEVEL_COMPLETE
+        captured = game.state == GameState.GAME_OVER
+        if captured:
+            failure = "captured at tick {}".format(level.tick)
+        elif failure is None and not completed:
+            failure = "replay did not reach the exit"
+        result = {
+            'completed': completed,
+            'captured': captured,
+            'ticks': ticks,
+            'seconds': round(ticks / 60.0, 2),
+            'stars': game.stars if completed else 0,
+            'scrolls_left': len(level.scrolls),
+            'deviations': deviations,
+        }
+        if failure is not None:
+            result['failure'] = failure
+        return result
+    
+    def guard_deviation(self):
+        # Why the danger map was dropped: the first guard that left its patrol
+        for i, guard in enumerate(self.level.guards):
+            if guard.is_pursuing:
+                return "guard {} spotted the player".format(i)
+            if guard.is_alerted:
+                return "guard {} heard a footstep".format(i)
+            if guard.returning_to_patrol:
+                return "guard {} is returning to its patrol".format(i)
+        return "a guard left its patrol"
+    
+    def evade(self, player):
+        # A move for while guards are off patrol and there is nothing to plan with:
+        # out of every guard's cone (or in a bush) and as far as possible from the
+        # guards that left their patrol, who may be walking over to look
+        level = self.level
+        tile_size = level.tile_size
+        x, y = self.player_tile(player)
+        blocked = self.wall_mask(level.tick)
+        hunting = [(guard.rect.centerx // tile_size, guard.rect.centery // tile_size) for guard in level.guards
+                   if guard.is_pursuing or guard.is_alerted or guard.returning_to_patrol]
+        exit_tile = level.analysis.exit_tile
+        best = None
+        for move, (dx, dy) in (('wait', (0, 0)), ('left', (-1, 0)), ('right', (1, 0)),
+                               ('up', (0, -1)), ('down', (0, 1))):
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < self.width and 0 <= ny < self.height) or (nx, ny) == exit_tile:
+                continue
+            bit = 1 << self.index(nx, ny)
+            if not self.passable & bit or blocked & bit:
+                continue
+            hidden = bool(self.bushes & bit) or not any(guard.can_see_tile((nx, ny)) for guard in level.guards)
+            distance = min((abs(nx - gx) + abs(ny - gy) for gx, gy in hunting), default=0)
+            if best is None or (hidden, distance) > best[0]:
+                best = ((hidden, distance), move)
+        return best[1] if best else 'wait'
+    
+    def player_tile(self, player):
+        tile_size = self.level.tile_size
+        return player.rect.centerx // tile_size, player.rect.centery // tile_size
+    
+    def on_tile(self, player):
+        # True if the player sits where a step would leave it, so a new plan lines up
+        start_x, start_y = self.level.player_start_pos
+        tile_size = self.level.tile_size
+        return (player.x == player.rect.x and player.y == player.rect.y and
+                (player.rect.x - start_x) % tile_size == 0 and (player.rect.y - start_y) % tile_size == 0)
+    
+    def run(self):
+        moves = self.plan()
+        plan_ms = round(self.plan_ms, 2)
+        if moves is None:
+            return {'completed': False, 'captured': False, 'ticks': 0, 'seconds': 0.0, 'stars': 0,
+                    'scrolls_left': len(self.level.scrolls), 'deviations': [],
+                    'plan_ms': plan_ms, 'failure': self.failure}
+        
+        result = self.play(moves)
+        result['plan_ms'] = plan_ms
+        return result
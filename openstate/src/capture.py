@@ -0,0 +1,156 @@
+import os
+import sys
+import queue
+import shlex
+import threading
+import subprocess
+
+import pygame
+
+# pygame.image.frombuffer / ffmpeg names for 32-bit pixel layouts, keyed by
+# (red, green, blue) masks as they appear in memory on a little-endian machine
+PIXEL_FORMATS = {
+    (0xFF0000, 0xFF00, 0xFF): ('BGRA', 'bgra'),
+    (0xFF, 0xFF00, 0xFF0000): ('RGBA', 'rgba'),
+}
+
+class FrameRecorder:
+    """Records rendered frames without stalling the game loop.
+    
+    capture() copies the screen's pixels straight from its buffer into one of
+    a ring of preallocated frame buffers (a single memcpy, no new surfaces or
+    bytes objects) and hands it to a writer thread. The writer streams raw
+    frames to a file or to the stdin of a command (e.g. ffmpeg). For a PNG
+    sequence the command is this module run as a child process, so PNG
+    encoding doesn't hold the game's GIL. If every buffer is still waiting to
+    be written, the frame is dropped and counted instead of waiting.
+    """
+    
+    def __init__(self, size, output=None, command=None, buffers=8, every=1):
+        self.size = size
+        self.output = output
+        self.command = command
+        self.every = every
+        self.png = output is not None and not os.path.splitext(output)[1]
+        
+        # Screens in other pixel layouts are blitted to a 32-bit surface first
+        self.convert_surface = None
+        self.pitch = size[0] * 4
+        self.buffers = [bytearray(self.pitch * size[1]) for _ in range(buffers)]
+        self.free = queue.Queue()
+        for slot in range(buffers):
+            self.free.put(slot)
+        self.filled = queue.Queue()
+        
+        self.frame = 0
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        
+        self.image_format = None
+        self.pixel_format = None
+        self.sink = None
+        self.process = None
+        self.thread = None
+    
+    def start(self, screen):
+        masks = screen.get_masks()[:3]
+        if screen.get_bytesize() == 4 and screen.get_pitch() == self.pitch and masks in PIXEL_FORMATS:
+            self.image_format, self.pixel_format = PIXEL_FORMATS[masks]
+        else:
+            self.convert_surface = pygame.Surface(self.size, 0, 32, (0xFF0000, 0xFF00, 0xFF, 0))
+            self.image_format, self.pixel_format = PIXEL_FORMATS[(0xFF0000, 0xFF00, 0xFF)]
+        
+        width, height = self.size
+        if self.command or self.png:
+            # Raw frames go to the command's stdin, e.g.
+            # ffmpeg -f rawvideo -pix_fmt bgra -s 800x600 -r 60 -i - out.mp4
+            if self.command:
+                args = shlex.split(self.command)
+            else:
+                args = [sys.executable, '-m', 'src.capture', self.output,
+                        str(width), str(height), self.image_format]
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+            self.process = subprocess.Popen(args, stdin=subprocess.PIPE, cwd=root, env=env)
+            self.sink = self.process.stdin
+        else:
+            self.sink = open(self.output, 'wb')
+            print(f"recording raw {self.pixel_format} {width}x{height} frames to {self.output}", file=sys.stderr)
+        
+        self.thread = threading.Thread(target=self.run, name='frame-writer', daemon=True)
+        self.thread.start()
+    
+    def capture(self, screen):
+        # Called right after the frame is presented; never blocks
+        self.frame += 1
+        if self.frame % self.every:
+            return
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return
+        
+        surface = screen
+        if self.convert_surface is not None:
+            self.convert_surface.blit(screen, (0, 0))
+            surface = self.convert_surface
+        pixels = surface.get_buffer()
+        self.buffers[slot][:] = memoryview(pixels)
+        del pixels  # Unlocks the surface
+        self.captured += 1
+        self.filled.put(slot)
+    
+    def run(self):
+        while True:
+            slot = self.filled.get()
+            if slot is None:
+                return
+            try:
+                self.sink.write(self.buffers[slot])
+            except (OSError, ValueError) as error:
+                # The pipe closed (e.g. the encoder exited); keep the game running
+                print(f"frame recording stopped: {error}", file=sys.stderr)
+                self.free.put(slot)
+                return
+            self.written += 1
+            self.free.put(slot)
+    
+    def close(self):
+        # Write out the frames still queued, then stop the writer and report
+        if self.thread is not None:
+            self.filled.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.sink is not None:
+            try:
+                self.sink.close()
+            except OSError:
+                pass
+            self.sink = None
+        if self.process is not None:
+            self.process.wait()
+            self.process = None
+        print(f"recorded {self.written} frames ({self.dropped} dropped)", file=sys.stderr)
+
+def write_png_sequence(directory, size, image_format):
+    # Child process for FrameRecorder: raw frames on stdin -> numbered PNG files
+    os.makedirs(directory, exist_ok=True)
+    frame = bytearray(size[0] * size[1] * 4)
+    view = memoryview(frame)
+    stdin = sys.stdin.buffer
+    number = 0
+    while True:
+        filled = 0
+        while filled < len(frame):
+            count = stdin.readinto(view[filled:])
+            if not count:
+                return
+            filled += count
+        image = pygame.image.frombuffer(frame, size, image_format)
+        pygame.image.save(image, os.path.join(directory, f'frame_{number:06d}.png'))
+        number += 1
+
+if __name__ == "__main__":
+    write_png_sequence(sys.argv[1], (int(sys.argv[2]), int(sys.argv[3])), sys.argv[4])
@@ -0,0 +1,46 @@
+import pygame
+from .tile import Tile
+
+def merge_wall_rects(grid, tile_size, wall_tile=Tile.WALL):
+    """Cover the wall tiles of a grid with as few axis-aligned rects as possible.
+    
+    Greedy meshing: scanning rows top to bottom, each uncovered wall tile
+    starts a rect that is grown right as far as the row allows, then down for
+    as long as every tile of the next row's span is an uncovered wall. The
+    rects don't overlap and cover exactly the wall tiles.
+    """
+    height = len(grid)
+    width = len(grid[0]) if grid else 0
+    covered = [[False] * width for _ in range(height)]
+    rects = []
+    
+    for y in range(height):
+        row = grid[y]
+        x = 0
+        while x < width:
+            if row[x] != wall_tile or covered[y][x]:
+                x += 1
+                continue
+            
+            # Grow right
+            end = x + 1
+            while end < width and row[end] == wall_tile and not covered[y][end]:
+                end += 1
+            
+            # Grow down while the whole span is still uncovered wall
+            bottom = y + 1
+            while bottom < height and all(
+                grid[bottom][i] == wall_tile and not covered[bottom][i] for i in range(x, end)
+            ):
+                bottom += 1
+            
+            for cy in range(y, bottom):
+                covered_row = covered[cy]
+                for cx in range(x, end):
+                    covered_row[cx] = True
+            
+            rects.append(pygame.Rect(x * tile_size, y * tile_size,
+                                     (end - x) * tile_size, (bottom - y) * tile_size))
+            x = end
+    
+    return rects
@@ -0,0 +1,184 @@
+import copy
+import math
+from .tile import Tile
+from .vision import vision_cone
+
+class DangerMap:
+    """Where patrolling guards will be looking, indexed by tile and time.
+    
+    Guard patrols are deterministic, so each guard's patrol is simulated on a
+    copy of the guard until it repeats (after a short prefix while it still
+    faces its spawn direction). The tiles its cone covers are
+    recorded per tick, and ticks are grouped into buckets of bucket_ticks. A
+    bucket marks a tile as dangerous if the tile is covered at any tick in it.
+    Each bucket is stored as a bit-packed bytearray with one bit per tile
+    (bit index = y * width + x).
+    
+    Every guard is also folded into one combined map, so a query is a single
+    bit test. It spans the guards' common period when that is at most
+    max_period ticks, and the next max_period ticks otherwise; queries past
+    that horizon test each guard's own map. Cones use static
+    walls only, so moving walls never make a tile look safer than it is.
+    """
+    
+    def __init__(self, level, bucket_ticks=10, max_period=7200, max_lap=10000):
+        self.width = level.grid_width
+        self.height = level.grid_height
+        self.tile_size = level.tile_size
+        self.bucket_ticks = bucket_ticks
+        self.stride = (self.width * self.height + 7) // 8  # Bytes per bucket
+        
+        # Level tick the maps start at; tick origin + k is offset k of every lap
+        self.origin = level.tick
+        
+        grid = level.grid
+        width = self.width
+        height = self.height
+        
+        def is_opaque(x, y):
+            return not (0 <= x < width and 0 <= y < height) or grid[y][x] == Tile.WALL
+        
+        # Cone bitmasks (as Python ints) shared by every guard and tick
+        cones = {}
+        
+        def cone_mask(guard, tile, direction):
+            key = (tile, direction, guard.vision_range, guard.vision_angle)
+            mask = cones.get(key)
+            if mask is None:
+                mask = 0
+                for x, y in vision_cone(is_opaque, tile[0], tile[1], direction,
+                                        guard.vision_range, guard.vision_angle, self.tile_size):
+                    if 0 <= x < width and 0 <= y < height:
+                        mask |= 1 << (y * width + x)
+                cones[key] = mask
+            return mask
+        
+        # Per guard: the cone mask at every tick of its timeline, which is a
+        # transient prefix followed by the repeating lap
+        self.prefixes = []
+        self.laps = []
+        self.timelines = []
+        for guard in level.guards:
+            states, prefix = self.simulate_patrol(guard, max_lap)
+            self.prefixes.append(prefix)
+            self.laps.append(len(states) - prefix)
+            self.timelines.append([cone_mask(guard, tile, direction) for tile, direction in states])
+        
+        # Per-guard bucketed maps
+        self.layers = [self.pack(len(masks), lambda t, prefix=prefix, lap=lap, masks=masks:
+                                 masks[self.timeline_index(t, prefix, lap)])
+                       for prefix, lap, masks in zip(self.prefixes, self.laps, self.timelines)]
+        
+        # Combined map of all guards: over their common period if it is short
+        # enough, otherwise over the next max_period ticks only
+        self.prefix = max(self.prefixes, default=0)
+        self.period = 1
+        for lap in self.laps:
+            self.period = self.period * lap // math.gcd(self.period, lap)
+        if self.prefix + self.period <= max_period:
+            self.horizon = None
+            ticks = self.prefix + self.period
+        else:
+            self.horizon = max_period
+            ticks = max_period
+        
+        def combined(t):
+            mask = 0
+            for prefix, lap, masks in zip(self.prefixes, self.laps, self.timelines):
+                mask |= masks[self.timeline_index(t, prefix, lap)]
+            return mask
+        self.combined = self.pack(ticks, combined)
+        
+        # Unpacked buckets, filled by danger_mask()
+        self.mask_cache = {}
+    
+    def simulate_patrol(self, guard, max_lap):
+        # Run the real patrol code on a copy of the guard. Returns its (tile, direction)
+        # at every tick and the length of the prefix before the repeating lap.
+        ghost = copy.copy(guard)
+        ghost.rect = guard.rect.copy()
+        
+        # Guards snap onto patrol points, so the state right after reaching one
+        # fully determines everything that follows; the first repeat closes the lap
+        arrivals = {}
+        states = []
+        for tick in range(max_lap):
+            states.append(((ghost.rect.centerx // self.tile_size, ghost.rect.centery // self.tile_size),
+                           ghost.direction))
+            point = ghost.current_point
+            ghost.patrol()
+            if ghost.current_point != point:
+                key = (ghost.current_point, ghost.x, ghost.y, ghost.direction)
+                if key in arrivals:
+                    return states, arrivals[key]
+                arrivals[key] = tick + 1
+        
+        # Never repeated (shouldn't happen): treat the whole simulation as one lap
+        return states, 0
+    
+    def timeline_index(self, offset, prefix, lap):
+        # Ticks since the origin -> position in a prefix + repeating lap timeline
+        if offset < prefix + lap:
+            return max(0, offset)
+        return prefix + (offset - prefix) % lap
+    
+    def pack(self, ticks, mask_at):
+        # Bucketed bit-packed map of a timeline of the given length
+        bucket_ticks = self.bucket_ticks
+        stride = self.stride
+        buckets = (ticks + bucket_ticks - 1) // bucket_ticks
+        data = bytearray(buckets * stride)
+        for bucket in range(buckets):
+            mask = 0
+            for t in range(bucket * bucket_ticks, min(ticks, (bucket + 1) * bucket_ticks)):
+                mask |= mask_at(t)
+            data[bucket * stride:(bucket + 1) * stride] = mask.to_bytes(stride, 'little')
+        return data
+    
+    def is_dangerous(self, x, y, tick):
+        # True if a patrolling guard may see tile (x, y) at the given level tick
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        i = y * self.width + x
+        offset = tick - self.origin
+        if self.horizon is None or offset < self.horizon:
+            if self.horizon is None:
+                t = self.timeline_index(offset, self.prefix, self.period)
+            else:
+                t = max(0, offset)
+            base = t // self.bucket_ticks * self.stride
+            return self.combined[base + (i >> 3)] >> (i & 7) & 1 == 1
+        
+        # Past the horizon of the combined map: check each guard's own lap
+        for prefix, lap, layer in zip(self.prefixes, self.laps, self.layers):
+            base = self.timeline_index(offset, prefix, lap) // self.bucket_ticks * self.stride
+            if layer[base + (i >> 3)] >> (i & 7) & 1:
+                return True
+        return False
+    
+    def is_safe(self, x, y, tick):
+        return not self.is_dangerous(x, y, tick)
+    
+    def danger_mask(self, tick):
+        # Every tile that may be seen at the tick, as an int with bit y * width + x
+        # set; used to advance whole sets of tiles at once (see bot.py)
+        offset = tick - self.origin
+        if self.horizon is None or offset < self.horizon:
+            if self.horizon is None:
+                t = self.timeline_index(offset, self.prefix, self.period)
+            else:
+                t = max(0, offset)
+            return self.bucket_mask(-1, self.combined, t // self.bucket_ticks)
+        
+        mask = 0
+        for i, (prefix, lap, layer) in enumerate(zip(self.prefixes, self.laps, self.layers)):
+            mask |= self.bucket_mask(i, layer, self.timeline_index(offset, prefix, lap) // self.bucket_ticks)
+        return mask
+    
+    def bucket_mask(self, layer_id, data, bucket):
+        key = (layer_id, bucket)
+        mask = self.mask_cache.get(key)
+        if mask is None:
+            mask = int.from_bytes(data[bucket * self.stride:(bucket + 1) * self.stride], 'little')
+            self.mask_cache[key] = mask
+        return mask
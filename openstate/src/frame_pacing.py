@@ -0,0 +1,136 @@
+import time
+from array import array
+
+import pygame
+
+class FramePacer:
+    """Paces the render loop and keeps a histogram of frame times.
+    
+    Modes:
+    - vsync: presenting already waits for the display, so the pacer only
+      measures. If the first frames show the driver ignored vsync (frames
+      come back faster than any display refreshes), it falls back to auto.
+    - auto: sleeps until shortly before the next frame is due and spins the
+      rest of the way. The spin margin follows how late sleeps have actually
+      woken up, so it stays small on systems with precise timers.
+    - busy: Clock.tick_busy_loop, precise but keeps a core busy.
+    - sleep: Clock.tick, cheap but only as precise as the OS timer.
+    
+    Frames that take more than 1.5 frame intervals are counted as missed.
+    """
+    
+    # Frames measured before trusting vsync, and the fastest refresh rate it
+    # could mean
+    VSYNC_CHECK_FRAMES = 30
+    MAX_REFRESH_RATE = 250
+    
+    def __init__(self, mode='auto', fps=60, buckets=50):
+        self.mode = mode
+        self.fps = fps
+        self.interval = 1.0 / fps
+        self.clock = pygame.time.Clock()
+        
+        # 1 ms buckets; the last one holds everything slower
+        self.histogram = array('I', [0]) * (buckets + 1)
+        self.frames = 0
+        self.missed = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        
+        self.last_frame = None
+        self.next_frame = None
+        self.spin_margin = 0.002
+        self.vsync_samples = []
+    
+    def wait(self):
+        # Call once per frame after presenting; returns the frame time in seconds
+        mode = self.mode
+        if mode == 'auto':
+            self.wait_until_due()
+        elif mode == 'busy':
+            self.clock.tick_busy_loop(self.fps)
+        elif mode == 'sleep':
+            self.clock.tick(self.fps)
+        
+        now = time.perf_counter()
+        if self.last_frame is None:
+            self.last_frame = now
+            return 0.0
+        frame_time = now - self.last_frame
+        self.last_frame = now
+        
+        if mode == 'vsync' and len(self.vsync_samples) < self.VSYNC_CHECK_FRAMES:
+            self.check_vsync(frame_time)
+        self.record(frame_time)
+        return frame_time
+    
+    def check_vsync(self, frame_time):
+        self.vsync_samples.append(frame_time)
+        if len(self.vsync_samples) < self.VSYNC_CHECK_FRAMES:
+            return
+        median = sorted(self.vsync_samples)[len(self.vsync_samples) // 2]
+        if median < 1.0 / self.MAX_REFRESH_RATE:
+            self.mode = 'auto'
+        else:
+            # The display's own rate; misses are judged against it
+            self.fps = round(1.0 / median)
+            self.interval = 1.0 / self.fps
+    
+    def wait_until_due(self):
+        now = time.perf_counter()
+        if self.next_frame is None or now - self.next_frame > self.interval:
+            # First frame, or a frame was missed by a whole interval: start over
+            # from now instead of rushing frames out to catch up
+            self.next_frame = now
+        self.next_frame += self.interval
+        
+        sleep_for = self.next_frame - now - self.spin_margin
+        if sleep_for > 0:
+            intended = now + sleep_for
+            time.sleep(sleep_for)
+            late = time.perf_counter() - intended
+            # Widen quickly after a late wake-up, narrow slowly
+            self.spin_margin = min(0.004, max(0.0005, late * 1.5, self.spin_margin * 0.98))
+        while time.perf_counter() < self.next_frame:
+            pass
+    
+    def record(self, frame_time):
+        milliseconds = frame_time * 1000.0
+        bucket = min(int(milliseconds), len(self.histogram) - 1)
+        self.histogram[bucket] += 1
+        self.frames += 1
+        self.total += frame_time
+        if frame_time > self.slowest:
+            self.slowest = frame_time
+        if frame_time > self.interval * 1.5:
+            self.missed += 1
+    
+    def percentile(self, percent):
+        # Upper edge (ms) of the bucket the percentile falls in
+        target = self.frames * percent / 100.0
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return bucket + 1
+        return len(self.histogram)
+    
+    def report(self, width=40):
+        # Text histogram of frame times, one row per non-empty bucket
+        if not self.frames:
+            return "no frames"
+        lines = [
+            f"{self.frames} frames, {self.mode} pacing at {self.fps} FPS: "
+            f"mean {self.total / self.frames * 1000.0:.2f} ms, p50 <{self.percentile(50)} ms, "
+            f"p99 <{self.percentile(99)} ms, max {self.slowest * 1000.0:.2f} ms, "
+            f"{self.missed} missed"
+        ]
+        peak = max(self.histogram)
+        last = len(self.histogram) - 1
+        for bucket, count in enumerate(self.histogram):
+            if not count:
+                continue
+            label = f"{bucket:>3}+ ms" if bucket == last else f"{bucket:>3}-{bucket + 1:<3}ms"
+            bar = '#' * max(1, round(count / peak * width))
+            lines.append(f"  {label} {count:>7} {bar}")
+        return "\n".join(lines)
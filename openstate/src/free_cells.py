@@ -0,0 +1,98 @@
+import random
+from bisect import bisect_left, bisect_right
+from .tile import Tile
+
+class FreeCellIndex:
+    """Free tiles of a grid, bucketed per row, for placing entities.
+    
+    Each row keeps a sorted list of its free x coordinates, so the free cells
+    inside a rectangle can be counted with two bisects per row and sampled
+    uniformly without retrying against walls. Claimed cells are removed, so
+    the same cell is never handed out twice.
+    """
+    
+    def __init__(self, grid, free_tile=Tile.EMPTY):
+        self.width = len(grid[0]) if grid else 0
+        self.height = len(grid)
+        self.rows = [[x for x, tile in enumerate(row) if tile == free_tile] for row in grid]
+        self.count = sum(len(row) for row in self.rows)
+    
+    def is_free(self, x, y):
+        if not (0 <= y < self.height):
+            return False
+        row = self.rows[y]
+        i = bisect_left(row, x)
+        return i < len(row) and row[i] == x
+    
+    def claim(self, x, y):
+        # Remove a cell from the index; returns False if it wasn't free
+        if not (0 <= y < self.height):
+            return False
+        row = self.rows[y]
+        i = bisect_left(row, x)
+        if i < len(row) and row[i] == x:
+            del row[i]
+            self.count -= 1
+            return True
+        return False
+    
+    def sample(self, min_x, min_y, max_x, max_y, avoid=(), min_distance=0, claim=True):
+        """Pick a uniformly random free cell in the inclusive rectangle.
+        
+        Cells closer than min_distance (Manhattan, in tiles) to any cell in
+        avoid are skipped. Returns (x, y), or None if no cell qualifies.
+        """
+        min_x = max(0, min_x)
+        min_y = max(0, min_y)
+        max_x = min(self.width - 1, max_x)
+        max_y = min(self.height - 1, max_y)
+        
+        # Free cells of each row inside the rectangle, with running totals
+        spans = []
+        totals = []
+        total = 0
+        for y in range(min_y, max_y + 1):
+            row = self.rows[y]
+            lo = bisect_left(row, min_x)
+            hi = bisect_right(row, max_x)
+            if hi > lo:
+                spans.append((y, lo))
+                total += hi - lo
+                totals.append(total)
+        
+        if total == 0:
+            return None
+        
+        # Uniform draws from the rectangle's free cells; only the distance rule can reject
+        for _ in range(8):
+            k = random.randrange(total)
+            i = bisect_right(totals, k)
+            y, lo = spans[i]
+            x = self.rows[y][lo + k - (totals[i - 1] if i else 0)]
+            if self.far_enough(x, y, avoid, min_distance):
+                if claim:
+                    self.claim(x, y)
+                return x, y
+        
+        # Crowded area: enumerate the qualifying cells instead of guessing
+        candidates = []
+        for i, (y, lo) in enumerate(spans):
+            row = self.rows[y]
+            hi = lo + totals[i] - (totals[i - 1] if i else 0)
+            for x in row[lo:hi]:
+                if self.far_enough(x, y, avoid, min_distance):
+                    candidates.append((x, y))
+        
+        if not candidates:
+            return None
+        
+        x, y = random.choice(candidates)
+        if claim:
+            self.claim(x, y)
+        return x, y
+    
+    def far_enough(self, x, y, avoid, min_distance):
+        for ax, ay in avoid:
+            if abs(x - ax) + abs(y - ay) < min_distance:
+                return False
+        return True
@@ -1,9 +1,19 @@
 import pygame
 import time
+import threading
 from .player import Player
 from .guard import Guard
 from .level import Level
 from .ui import UI
+from .tile import Trigger
+from .profiler import FrameProfiler
+from .telemetry import Event
+from .ai_scheduler import AIScheduler
+from .simulation import RenderSnapshot
+from .audio import AudioManager
+from .assets import assets
+
+SOUND_NAMES = ('pickup', 'alert', 'level_complete', 'footstep', 'game_over')
 
 class GameState:
     MENU = 0
@@ -13,20 +23,20 @@ class GameState:
     TRANSITION = 4
 
 class Game:
-    def __init__(self, screen):
+    def __init__(self, screen, start_state=GameState.PLAYING):
         self.screen = screen
         self.screen_width = screen.get_width()
         self.screen_height = screen.get_height()
-        self.state = GameState.PLAYING
+        self.state = start_state
         self.current_level = 1
         self.max_levels = 10
         self.stars = 0
         self.total_stars = 0
         self.sound_enabled = True
         
-        # Initialize components
-        self.level = Level(self.current_level, self.screen_width, self.screen_height)
-        self.player = Player(self.level.player_start_pos)
+        # Initialize components (the level and player are built when play starts)
+        self.level = None
+        self.player = None
         self.ui = UI(self.screen_width, self.screen_height)
         
         # Game timing
@@ -37,22 +47,32 @@ class Game:
         # Game over reason
         self.game_over_reason = ""
         
-        # Load sounds
-        self.load_sounds()
+        # Key state override (e.g. set by the playtest bot); None reads the keyboard
+        self.input_keys = None
+        
+        # Picks which guards get a full update each tick
+        self.ai_scheduler = AIScheduler()
+        
+        # Gameplay event log (set up by main.py when enabled)
+        self.telemetry = None
+        
+        # State stream for spectator clients (set up by main.py when enabled)
+        self.spectators = None
+        
+        # Per-phase frame timing (off unless toggled)
+        self.profiler = FrameProfiler()
+        
+        # Sounds are loaded with the first level so the menu never waits for the mixer
+        self.audio = AudioManager()
+        
+        # Starting straight into play needs a level right away
+        if self.state != GameState.MENU:
+            self.restart_level()
         
     def load_sounds(self):
-        # Create empty sounds as placeholders
-        self.sounds = {
-            'pickup': pygame.mixer.Sound(buffer=bytearray(44)),
-            'alert': pygame.mixer.Sound(buffer=bytearray(44)),
-            'level_complete': pygame.mixer.Sound(buffer=bytearray(44)),
-            'footstep': pygame.mixer.Sound(buffer=bytearray(44)),
-            'game_over': pygame.mixer.Sound(buffer=bytearray(44))
-        }
-        
-        # Set default volume
-        for sound in self.sounds.values():
-            sound.set_volume(0.5)
+        # Load sounds from assets/sounds (silent placeholders for missing files)
+        self.audio.load(SOUND_NAMES)
+        self.audio.set_muted(not self.sound_enabled)
     
     def handle_event(self, event):
         # Handle menu events
@@ -81,12 +101,18 @@ class Game:
                     self.state = GameState.MENU
     
     def update(self):
+        # Only pay for the profiling hooks when the profiler is on (and the
+        # update runs on the thread that times frames)
+        profiler = None
+        if self.profiler.enabled and threading.current_thread() is threading.main_thread():
+            profiler = self.profiler
+        
         if self.state == GameState.PLAYING:
             # Update level time
             self.level_time = time.time() - self.level_start_time
             
             # Handle continuous key presses for smoother control
-            keys = pygame.key.get_pressed()
+            keys = self.input_keys if self.input_keys is not None else pygame.key.get_pressed()
             
             # Reset velocities - ninja should be stationary unless keys are pressed
             self.player.vel_x = 0
@@ -106,43 +132,64 @@ class Game:
                 
             # Crouching/hiding with Ctrl
             self.player.is_crouching = keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]
+            if profiler:
+                profiler.mark('input')
             
             # Update player
             self.player.update(self.level)
+            if self.player.footstep and not self.player.is_crouching:
+                self.audio.play('footstep')
+            telemetry = self.telemetry
+            tile_size = self.level.tile_size
+            if telemetry:
+                player_x = self.player.rect.centerx // tile_size
+                player_y = self.player.rect.centery // tile_size
+                telemetry.record(Event.PLAYER_TILE, self.level.tick, player_x, player_y)
+            if profiler:
+                profiler.mark('player')
             
             # Update moving maze elements
             self.level.update_moving_elements()
+            if profiler:
+                profiler.mark('moving_walls')
             
-            # Update guards
-            for guard in self.level.guards:
-                guard.update(self.level, self.player)
+            # Update guards (distant ones in time slices) and check for detection
+            detected = self.ai_scheduler.update(self.level, self.player, profiler)
+            if detected is not None:
+                if telemetry:
+                    telemetry.record(Event.DETECTION, self.level.tick, player_x, player_y,
+                                     self.level.guards.index(detected))
+                    telemetry.record(Event.DEATH, self.level.tick, player_x, player_y)
+                self.audio.play('alert')
+                self.audio.play('game_over')
                 
-                # Check if player is detected by guard
-                if guard.detect_player(self.player, self.level):
-                    if self.sound_enabled:
-                        self.sounds['alert'].play()
-                        self.sounds['game_over'].play()
-                    
-                    # Set game over state
-                    self.state = GameState.GAME_OVER
-                    self.game_over_reason = "Ninja Captured!"
-                    return
+                # Set game over state
+                self.state = GameState.GAME_OVER
+                self.game_over_reason = "Ninja Captured!"
+                if self.spectators:
+                    self.spectators.publish(self)
+                return
             
-            # Check if player collected a scroll - only if directly on it
-            for scroll in self.level.scrolls[:]:
+            # Check if player collected a scroll - only if directly on it. Scrolls sit in
+            # the middle of their tile, so only the tile under the player's center can match
+            player_center = self.player.rect.center
+            scroll = self.level.trigger_at((player_center[0] // tile_size, player_center[1] // tile_size),
+                                           Trigger.SCROLL)
+            if scroll is not None:
                 # Check for exact position overlap (center points within a small threshold)
-                player_center = self.player.rect.center
                 scroll_center = scroll.rect.center
                 distance_x = abs(player_center[0] - scroll_center[0])
                 distance_y = abs(player_center[1] - scroll_center[1])
                 
                 if distance_x < 12 and distance_y < 12:  # Smaller threshold for more precise collection
-                    self.level.scrolls.remove(scroll)
-                    if self.sound_enabled:
-                        self.sounds['pickup'].play()
+                    self.level.remove_scroll(scroll)
+                    if telemetry:
+                        telemetry.record(Event.SCROLL, self.level.tick, scroll.rect.centerx // tile_size,
+                                         scroll.rect.centery // tile_size)
+                    self.audio.play('pickup')
             
             # Check if player reached the exit
-            if self.player.rect.colliderect(self.level.exit_rect):
+            if self.level.find_trigger(self.player.rect, Trigger.EXIT) is not None:
                 if len(self.level.scrolls) == 0:
                     # All scrolls collected
                     self.stars = 3
@@ -151,50 +198,104 @@ class Game:
                     self.stars = 1
                 
                 self.total_stars += self.stars
-                if self.sound_enabled:
-                    self.sounds['level_complete'].play()
+                if telemetry:
+                    telemetry.record(Event.EXIT, self.level.tick, self.level.exit_rect.x // tile_size,
+                                     self.level.exit_rect.y // tile_size, self.stars)
+                self.audio.play('level_complete')
                 self.state = GameState.LEVEL_COMPLETE
                 self.transition_time = time.time()
+            if profiler:
+                profiler.mark('scrolls')
+            
+            if self.spectators:
+                self.spectators.publish(self)
         
         elif self.state == GameState.LEVEL_COMPLETE:
             # Wait for 2 seconds before transitioning to next level
             if time.time() - self.transition_time > 2.0:
                 self.next_level()
     
-    def render(self):
+    def take_snapshot(self):
+        # Immutable copy of what render() draws, taken at the end of a tick
+        level = self.level
+        if level is None or self.state == GameState.MENU:
+            return RenderSnapshot(self.state, None, (), (), (), None, self.game_over_reason, self.sound_enabled)
+        hud = (self.current_level, len(level.scrolls), self.level_time,
+               self.state == GameState.LEVEL_COMPLETE, self.stars, self.sound_enabled)
+        return RenderSnapshot(self.state, level, tuple(level.map_sprites()), tuple(level.guard_sprites()),
+                              tuple(self.player.sprites()), hud, self.game_over_reason, self.sound_enabled)
+    
+    def render(self, snapshot=None):
+        # Draws a snapshot: the latest one published by the simulation thread,
+        # or one taken now when update and render share a thread
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        profiler = self.profiler if self.profiler.enabled else None
+        screen = self.screen
+        
+        # Surfaces loaded on the simulation thread are converted on first use here
+        if assets.unconverted and threading.current_thread() is threading.main_thread():
+            self.convert_images()
+        
         # Clear the screen
-        self.screen.fill((0, 0, 0))
+        screen.fill((0, 0, 0))
         
-        if self.state == GameState.PLAYING or self.state == GameState.LEVEL_COMPLETE or self.state == GameState.GAME_OVER:
+        state = snapshot.state
+        if state == GameState.PLAYING or state == GameState.LEVEL_COMPLETE or state == GameState.GAME_OVER:
             # Render level
-            self.level.render(self.screen)
+            snapshot.level.render_tiles(screen)
+            screen.blits(snapshot.map_sprites, False)
+            if profiler:
+                profiler.mark('level_render')
+            
+            # Render guards
+            screen.blits(snapshot.guard_sprites, False)
+            if profiler:
+                profiler.mark('guard_render')
             
             # Render player
-            self.player.render(self.screen)
+            screen.blits(snapshot.player_sprites, False)
+            if profiler:
+                profiler.mark('player_render')
             
             # Render UI
-            if self.state == GameState.PLAYING or self.state == GameState.LEVEL_COMPLETE:
-                self.ui.render(self.screen, self.current_level, len(self.level.scrolls), 
-                              self.level_time, self.state == GameState.LEVEL_COMPLETE, self.stars, self.sound_enabled)
+            if state == GameState.PLAYING or state == GameState.LEVEL_COMPLETE:
+                self.ui.render(screen, *snapshot.hud)
             
             # Render game over screen
-            if self.state == GameState.GAME_OVER:
-                self.ui.render_game_over(self.screen, self.game_over_reason)
+            if state == GameState.GAME_OVER:
+                self.ui.render_game_over(screen, snapshot.game_over_reason)
+            if profiler:
+                profiler.mark('ui')
+        
+        elif state == GameState.MENU:
+            self.ui.render_menu(screen, snapshot.sound_enabled)
+            if profiler:
+                profiler.mark('ui')
         
-        elif self.state == GameState.MENU:
-            self.ui.render_menu(self.screen, self.sound_enabled)
+        # Profiler overlay goes on top of everything else
+        self.profiler.render_overlay(screen)
+    
+    def convert_images(self):
+        replacements = assets.convert_pending()
+        if replacements and self.level:
+            self.level.swap_images(replacements)
+            self.player.swap_images(replacements)
     
     def toggle_sound(self):
         self.sound_enabled = not self.sound_enabled
         
-        # Mute or unmute all sounds
-        volume = 0.5 if self.sound_enabled else 0.0
-        for sound in self.sounds.values():
-            sound.set_volume(volume)
+        # One switch for the whole mixer
+        self.audio.set_muted(not self.sound_enabled)
     
     def restart_level(self):
+        if not self.audio.loaded:
+            self.load_sounds()
+        
         self.level = Level(self.current_level, self.screen_width, self.screen_height)
         self.player = Player(self.level.player_start_pos)
+        if self.telemetry:
+            self.telemetry.level_start(self.level)
         self.level_start_time = time.time()
         self.level_time = 0
     
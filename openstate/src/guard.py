@@ -1,6 +1,9 @@
 import pygame
 import math
 import random
+from .assets import assets
+from .tile import Tile
+from .vision import vision_cone, cone_polygon
 
 class Guard:
     def __init__(self, start_pos, patrol_points, speed_multiplier=1.0):
@@ -21,6 +24,17 @@ class Guard:
         self.vision_angle = 70  # Narrower angle for more balanced gameplay
         self.direction = 0  # 0 = right, 90 = down, 180 = left, 270 = up
         
+        # Cached field of view (set of visible tiles) and its outline. Only
+        # recomputed when the guard changes tile or direction, or a moving
+        # wall near it moves onto a different tile.
+        self.visible_tiles = frozenset()
+        self.vision_polygon = None
+        self.vision_key = None
+        self.vision_tile = None
+        self.moving_wall_version = -1
+        self.nearby_moving_walls = ()
+        self.cone_surface = None
+        
         # Add pause at patrol points
         self.pause_timer = 0
         self.pause_duration = 60  # Frames to pause at each patrol point
@@ -34,17 +48,43 @@ class Guard:
         self.is_alerted = False
         self.alert_timer = 0
         
+        # Hearing: footsteps at least this loud on the guard's tile make it turn
+        # towards them, walk to the tile they came from and look around there
+        self.hearing_threshold = 2
+        self.investigate_duration = 90
+        self.investigate_tile = None
+        
         # Pursuit state
         self.is_pursuing = False
         self.pursuit_timer = 0
         self.pursuit_duration = 180  # Frames to pursue player (3 seconds at 60 FPS)
         self.pursuit_target = None
         self.original_position = start_pos
+        
+        # Route along the corridors (chasing a player out of sight, investigating
+        # a noise or returning to patrol): corridor graph tiles, the next one to
+        # walk to, and the tile it leads to
+        self.path = None
+        self.path_step = 0
+        self.path_goal = None
         self.returning_to_patrol = False
+        self.return_point = None
         
-        # Load guard images (placeholder)
-        self.image = pygame.Surface((self.width, self.height))
-        self.image.fill((255, 0, 0))  # Red placeholder
+        # Guard images, shared through the asset manager (placeholders until sprites exist)
+        size = (self.width, self.height)
+        self.images = {
+            'normal': assets.image('guard', size, (200, 0, 0)),  # Dark red
+            'pursuing': assets.image('guard_pursuing', size, (255, 0, 0)),  # Bright red
+            'alerted': assets.image('guard_alerted', size, (255, 255, 0)),  # Yellow
+            'returning': assets.image('guard_returning', size, (255, 165, 0)),  # Orange
+        }
+        self.image = self.images['normal']
+        
+        # What sprites() returns: the body and, while on patrol, the vision cone.
+        # Both pairs are kept and reused until the guard moves or changes look.
+        self.sprite_list = [None]
+        self.body_sprite = None
+        self.cone_sprite = None
     
     def update(self, level, player=None):
         if self.is_pursuing and player:
@@ -52,17 +92,89 @@ class Guard:
             self.pursue_player(player, level)
         elif self.returning_to_patrol:
             # Return to original patrol route
-            self.return_to_patrol()
+            self.return_to_patrol(level)
         elif not self.is_alerted:
-            self.patrol()
+            if not self.listen(level):
+                self.patrol()
         else:
-            self.alert_timer -= 1
-            if self.alert_timer <= 0:
-                self.is_alerted = False
+            self.investigate(level)
+        
+        # Refresh the field of view if anything it depends on changed
+        self.update_vision(level)
         
         # Update animation
         self.update_animation()
     
+    def listen(self, level):
+        # Returns True if the guard heard footsteps and turned towards them
+        tile_size = level.tile_size
+        x = self.rect.centerx // tile_size
+        y = self.rect.centery // tile_size
+        if level.noise.level_at(x, y, level.tick) < self.hearing_threshold:
+            return False
+        
+        source = level.noise.source_at(x, y)
+        self.investigate_tile = source
+        self.path = None
+        if source is not None and source != (x, y):
+            dx = source[0] - x
+            dy = source[1] - y
+            if abs(dx) > abs(dy):
+                self.direction = 0 if dx > 0 else 180
+            else:
+                self.direction = 90 if dy > 0 else 270
+        
+        # Leaving the patrol breaks its prediction, like pursuit does
+        self.is_alerted = True
+        self.alert_timer = self.investigate_duration
+        level.invalidate_danger_map()
+        return True
+    
+    def catch_up(self, level, ticks):
+        # Run the patrol steps of several skipped ticks at once (for time-sliced
+        # updates of far away patrolling guards), then refresh vision once
+        for _ in range(ticks):
+            self.patrol()
+            self.update_animation()
+        self.update_vision(level)
+    
+    def update_vision(self, level):
+        tile_size = level.tile_size
+        tile_x = self.rect.centerx // tile_size
+        tile_y = self.rect.centery // tile_size
+        
+        # Most ticks nothing changed; check that without building the key tuples
+        vision_tile = self.vision_tile
+        if (vision_tile is not None and tile_x == vision_tile[0] and tile_y == vision_tile[1] and
+                level.moving_wall_version == self.moving_wall_version and
+                self.vision_key is not None and self.direction == self.vision_key[1]):
+            return
+        tile = (tile_x, tile_y)
+        
+        # Moving walls only matter if they're within reach of the cone
+        if tile != self.vision_tile or level.moving_wall_version != self.moving_wall_version:
+            self.vision_tile = tile
+            self.moving_wall_version = level.moving_wall_version
+            reach = self.vision_range // tile_size + 1
+            self.nearby_moving_walls = tuple(sorted(
+                (x, y) for x, y in level.moving_wall_tiles
+                if abs(x - tile[0]) <= reach and abs(y - tile[1]) <= reach
+            ))
+        
+        key = (tile, self.direction, self.nearby_moving_walls)
+        if key == self.vision_key:
+            return
+        self.vision_key = key
+        
+        self.visible_tiles = vision_cone(level.is_opaque, tile[0], tile[1], self.direction,
+                                         self.vision_range, self.vision_angle, tile_size)
+        self.vision_polygon = cone_polygon(level.is_opaque, self.rect.center, self.direction,
+                                           self.vision_range, self.vision_angle, tile_size)
+        self.cone_surface = None  # Redrawn on the next render
+    
+    def can_see_tile(self, tile):
+        return tile in self.visible_tiles
+    
     def pursue_player(self, player, level):
         # Update pursuit timer
         self.pursuit_timer -= 1
@@ -70,6 +182,7 @@ class Guard:
             # Stop pursuing and return to patrol
             self.is_pursuing = False
             self.returning_to_patrol = True
+            self.path = None
             return
         
         # Calculate direction to player
@@ -80,8 +193,10 @@ class Guard:
         # Move towards player with increased speed (1.5x normal speed)
         pursuit_speed = self.speed * 1.5
         if distance > pursuit_speed:
-            # Check if path to player is blocked
-            if not self.is_line_of_sight_blocked(player, level):
+            # Go straight at the player if nothing is in the way. A route around
+            # walls is followed to its end, or the guard would flip back and
+            # forth at a corner where the line of sight just clears.
+            if self.path is None and not self.is_line_of_sight_blocked(player, level):
                 self.x += (dx / distance) * pursuit_speed
                 self.y += (dy / distance) * pursuit_speed
                 
@@ -96,50 +211,96 @@ class Guard:
                         self.direction = 90  # Down
                     else:
                         self.direction = 270  # Up
+            else:
+                # Out of sight: follow the corridors to the player's tile
+                tile_size = level.tile_size
+                goal = (player.rect.centerx // tile_size, player.rect.centery // tile_size)
+                self.follow_path(goal, level, pursuit_speed)
         
         # Update rect position
         self.rect.x = int(self.x)
         self.rect.y = int(self.y)
     
-    def return_to_patrol(self):
-        # Get the nearest patrol point
-        nearest_point = 0
-        min_distance = float('inf')
-        
-        for i, point in enumerate(self.patrol_points):
-            dx = point[0] - self.x
-            dy = point[1] - self.y
-            distance = math.sqrt(dx * dx + dy * dy)
-            
-            if distance < min_distance:
-                min_distance = distance
-                nearest_point = i
+    def follow_path(self, goal, level, speed):
+        # One step along the corridors towards a tile; returns True once there
+        tile_size = level.tile_size
         
-        # Move towards the nearest patrol point
-        target_x, target_y = self.patrol_points[nearest_point]
+        # Replan only when the goal moves to another tile; the route starts at
+        # the guard's own tile so it re-centres before turning a corner
+        if self.path is None or goal != self.path_goal:
+            start = (self.rect.centerx // tile_size, self.rect.centery // tile_size)
+            self.path = level.get_corridor_graph().find_path(start, goal)
+            self.path_step = 0
+            self.path_goal = goal
+        if self.path_step >= len(self.path):
+            # Arrived; an empty route (goal unreachable) is kept so it isn't
+            # searched for again until the goal moves
+            if self.path:
+                self.path = None
+            return True
+        
+        tile_x, tile_y = self.path[self.path_step]
+        target_x = tile_x * tile_size + (tile_size - self.width) // 2
+        target_y = tile_y * tile_size + (tile_size - self.height) // 2
         dx = target_x - self.x
         dy = target_y - self.y
         distance = math.sqrt(dx * dx + dy * dy)
-        
-        if distance > self.speed:
-            self.x += (dx / distance) * self.speed
-            self.y += (dy / distance) * self.speed
-            
-            # Update direction for vision cone
-            if abs(dx) > abs(dy):  # Moving more horizontally
-                if dx > 0:
-                    self.direction = 0  # Right
-                else:
-                    self.direction = 180  # Left
-            else:  # Moving more vertically
-                if dy > 0:
-                    self.direction = 90  # Down
-                else:
-                    self.direction = 270  # Up
+        if distance > speed:
+            self.x += (dx / distance) * speed
+            self.y += (dy / distance) * speed
+            if abs(dx) > abs(dy):
+                self.direction = 0 if dx > 0 else 180
+            else:
+                self.direction = 90 if dy > 0 else 270
         else:
+            self.x, self.y = target_x, target_y
+            self.path_step += 1
+        return False
+    
+    def investigate(self, level):
+        # Walk to where the footsteps came from, look around there until the
+        # alert wears off, then head back to the patrol route
+        if self.investigate_tile is not None:
+            if self.follow_path(self.investigate_tile, level, self.speed):
+                self.investigate_tile = None
+            self.rect.x = int(self.x)
+            self.rect.y = int(self.y)
+            return
+        
+        self.alert_timer -= 1
+        if self.alert_timer <= 0:
+            self.is_alerted = False
+            self.returning_to_patrol = True
+            self.path = None
+    
+    def patrol_tile(self, point, tile_size):
+        x, y = self.patrol_points[point]
+        return ((x + self.width // 2) // tile_size, (y + self.height // 2) // tile_size)
+    
+    def return_to_patrol(self, level):
+        # Head for the patrol point that is the shortest walk away, not the
+        # nearest as the crow flies, and follow the corridors there. Patrol
+        # points are tile centres, so arriving puts the guard exactly on one.
+        tile_size = level.tile_size
+        if self.return_point is None:
+            graph = level.get_corridor_graph()
+            start = (self.rect.centerx // tile_size, self.rect.centery // tile_size)
+            self.return_point = self.current_point
+            self.path = None
+            for point in range(len(self.patrol_points)):
+                goal = self.patrol_tile(point, tile_size)
+                path = graph.find_path(start, goal)
+                if path and (self.path is None or len(path) < len(self.path)):
+                    self.return_point = point
+                    self.path = path
+                    self.path_step = 0
+                    self.path_goal = goal
+        
+        if self.follow_path(self.patrol_tile(self.return_point, tile_size), level, self.speed):
             # Reached patrol point, resume normal patrol
             self.returning_to_patrol = False
-            self.current_point = nearest_point
+            self.current_point = self.return_point
+            self.return_point = None
         
         # Update rect position
         self.rect.x = int(self.x)
@@ -176,7 +337,9 @@ class Guard:
                 else:
                     self.direction = 270  # Up
         else:
-            # Reached target point, pause before moving to next one
+            # Reached target point: snap onto it so every lap of the patrol takes
+            # exactly the same ticks, then pause before moving to the next one
+            self.x, self.y = target_x, target_y
             self.pause_timer = self.pause_duration
             self.current_point = (self.current_point + 1) % len(self.patrol_points)
         
@@ -189,60 +352,41 @@ class Guard:
         if player.is_hidden:
             return False
         
-        # Calculate distance to player
-        dx = player.rect.centerx - self.rect.centerx
-        dy = player.rect.centery - self.rect.centery
-        distance = math.sqrt(dx * dx + dy * dy)
-        
-        # Check if player is within vision range
-        if distance <= self.vision_range:
-            # Calculate angle to player (in degrees, clockwise from right)
-            angle = math.degrees(math.atan2(dy, dx))
-            if angle < 0:
-                angle += 360
-                
-            # Check if player is within vision angle
-            angle_diff = abs((angle - self.direction) % 360)
-            if angle_diff <= self.vision_angle / 2 or angle_diff >= 360 - self.vision_angle / 2:
-                # Check if there's a wall blocking the view
-                if not self.is_line_of_sight_blocked(player, level):
-                    # Add reaction delay - only alert if player is in sight for a while
-                    self.is_alerted = True
-                    self.alert_timer = 30  # Alert for 30 frames
-                    
-                    # Start pursuing the player
-                    self.is_pursuing = True
-                    self.pursuit_timer = self.pursuit_duration
-                    self.pursuit_target = (player.rect.centerx, player.rect.centery)
-                    
-                    # Return true immediately for detection - we'll handle the game over in game.py
-                    return True
+        # The cached field of view already accounts for range, cone angle and walls
+        player_tile = (player.rect.centerx // level.tile_size, player.rect.centery // level.tile_size)
+        if player_tile in self.visible_tiles:
+            # Add reaction delay - only alert if player is in sight for a while
+            self.is_alerted = True
+            self.alert_timer = 30  # Alert for 30 frames
+            
+            # Start pursuing the player; the patrol prediction no longer holds
+            if not self.is_pursuing:
+                self.path = None
+            self.is_pursuing = True
+            level.invalidate_danger_map()
+            self.pursuit_timer = self.pursuit_duration
+            self.pursuit_target = (player.rect.centerx, player.rect.centery)
+            
+            # Return true immediately for detection - we'll handle the game over in game.py
+            return True
         
         return False
     
     def is_line_of_sight_blocked(self, player, level):
-        # Check if there's a wall between guard and player
-        start_x, start_y = self.rect.center
-        end_x, end_y = player.rect.center
-        
-        # Use Bresenham's line algorithm to check points along the line
-        points = self.get_line_points(start_x, start_y, end_x, end_y)
+        # Check if there's a wall between guard and player by walking the
+        # Bresenham line between the two centers point by point. Static walls
+        # cover exactly the wall tiles, so they are a grid lookup; only moving
+        # walls need a rect test.
+        x0 = self.rect.centerx
+        y0 = self.rect.centery
+        x1 = player.rect.centerx
+        y1 = player.rect.centery
+        grid = level.grid
+        tile_size = level.tile_size
+        width = level.width
+        height = level.height
+        moving_walls = level.moving_walls
         
-        # Check each point for collision with walls
-        for x, y in points:
-            # Create a small rect at this point
-            point_rect = pygame.Rect(x, y, 1, 1)
-            
-            # Check if this point collides with any wall
-            for wall in level.walls:
-                if wall.colliderect(point_rect):
-                    return True  # Line of sight is blocked
-        
-        return False  # No walls blocking the line of sight
-    
-    def get_line_points(self, x0, y0, x1, y1):
-        """Bresenham's Line Algorithm to get all points on a line"""
-        points = []
         dx = abs(x1 - x0)
         dy = abs(y1 - y0)
         sx = 1 if x0 < x1 else -1
@@ -250,7 +394,12 @@ class Guard:
         err = dx - dy
         
         while True:
-            points.append((x0, y0))
+            if 0 <= x0 < width and 0 <= y0 < height and grid[y0 // tile_size][x0 // tile_size] == Tile.WALL:
+                return True  # Line of sight is blocked
+            for wall in moving_walls:
+                if wall.rect.collidepoint(x0, y0):
+                    return True
+            
             if x0 == x1 and y0 == y1:
                 break
             e2 = 2 * err
@@ -264,8 +413,8 @@ class Guard:
                     break
                 err += dx
                 y0 += sy
-                
-        return points
+        
+        return False  # No walls blocking the line of sight
     
     def update_animation(self):
         self.animation_timer += 1
@@ -273,41 +422,58 @@ class Guard:
             self.animation_timer = 0
             self.animation_frame = (self.animation_frame + 1) % 4  # 4 frames of animation
     
-    def render(self, screen):
-        # Change color based on state (for placeholder)
+    def swap_images(self, replacements):
+        # Swaps in converted copies of the state images (see AssetManager.convert_pending)
+        for state, image in self.images.items():
+            self.images[state] = replacements.get(image, image)
+        self.image = replacements.get(self.image, self.image)
+    
+    def sprites(self):
+        # (image, position) pairs to draw, for a render snapshot. The cone surface
+        # is replaced rather than redrawn, so published snapshots never change.
+        # The list is reused and each pair is only rebuilt when it changed, so a
+        # guard standing still allocates nothing.
         if self.is_pursuing:
-            self.image.fill((255, 0, 0))  # Bright red when pursuing
+            self.image = self.images['pursuing']
         elif self.is_alerted:
-            self.image.fill((255, 255, 0))  # Yellow when alerted
+            self.image = self.images['alerted']
         elif self.returning_to_patrol:
-            self.image.fill((255, 165, 0))  # Orange when returning to patrol
+            self.image = self.images['returning']
         else:
-            self.image.fill((200, 0, 0))  # Dark red normally
+            self.image = self.images['normal']
         
-        screen.blit(self.image, self.rect)
+        rect = self.rect
+        body = self.body_sprite
+        if body is None or body[0] is not self.image or body[1][0] != rect.x or body[1][1] != rect.y:
+            self.body_sprite = body = (self.image, rect.topleft)
+        sprites = self.sprite_list
+        sprites[0] = body
         
-        # Draw vision cone (simplified)
-        if not self.is_pursuing:
-            # Create a semi-transparent surface for the vision cone
-            vision_surface = pygame.Surface((self.vision_range * 2, self.vision_range * 2), pygame.SRCALPHA)
-            
-            # Calculate start and end angles for the vision cone
-            start_angle = math.radians(self.direction - self.vision_angle / 2)
-            end_angle = math.radians(self.direction + self.vision_angle / 2)
-            
-            # Draw the vision cone as a pie slice
-            pygame.draw.arc(vision_surface, (255, 0, 0, 50), 
-                           (0, 0, self.vision_range * 2, self.vision_range * 2),
-                           start_angle, end_angle, self.vision_range)
-            
-            # Draw lines from center to edge of cone
-            center = (self.vision_range, self.vision_range)
-            for angle in [start_angle, end_angle]:
-                end_x = center[0] + math.cos(angle) * self.vision_range
-                end_y = center[1] + math.sin(angle) * self.vision_range
-                pygame.draw.line(vision_surface, (255, 0, 0, 100), center, (end_x, end_y), 2)
+        # Draw vision cone, clipped by walls
+        if not self.is_pursuing and self.vision_polygon is not None:
+            # The cone surface is only redrawn when the field of view changes
+            if self.cone_surface is None:
+                self.cone_surface = pygame.Surface((self.vision_range * 2, self.vision_range * 2), pygame.SRCALPHA)
+                points = [(self.vision_range + x, self.vision_range + y) for x, y in self.vision_polygon]
+                pygame.draw.polygon(self.cone_surface, (255, 0, 0, 50), points)
+                
+                # Draw lines from center to edge of cone
+                pygame.draw.line(self.cone_surface, (255, 0, 0, 100), points[0], points[1], 2)
+                pygame.draw.line(self.cone_surface, (255, 0, 0, 100), points[0], points[-1], 2)
             
-            # Blit the vision cone centered on the guard
-            screen.blit(vision_surface, 
-                       (self.rect.centerx - self.vision_range, 
-                        self.rect.centery - self.vision_range))
+            # Vision cone centered on the guard
+            x = rect.centerx - self.vision_range
+            y = rect.centery - self.vision_range
+            cone = self.cone_sprite
+            if cone is None or cone[0] is not self.cone_surface or cone[1][0] != x or cone[1][1] != y:
+                self.cone_sprite = cone = (self.cone_surface, (x, y))
+            if len(sprites) == 1:
+                sprites.append(cone)
+            else:
+                sprites[1] = cone
+        elif len(sprites) == 2:
+            sprites.pop()
+        return sprites
+    
+    def render(self, screen):
+        screen.blits(self.sprites(), False)
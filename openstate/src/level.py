@@ -1,10 +1,37 @@
 import pygame
+import math
 import random
 from .maze_generator import MazeGenerator
 from .scroll import Scroll
-from .tile import Tile
+from .tile import Tile, Trigger
+from .free_cells import FreeCellIndex
+from .colliders import merge_wall_rects
+from .level_analysis import LevelAnalysis
+from .danger_map import DangerMap
+from .noise import NoiseField
+from .corridor_graph import CorridorGraph
+from .assets import assets
+
+def write_sprites(target, count, sprites):
+    # Writes sprites into target from index count on, overwriting slots it already
+    # has; returns the new count
+    for sprite in sprites:
+        if count < len(target):
+            target[count] = sprite
+        else:
+            target.append(sprite)
+        count += 1
+    return count
 
 class MovingWall:
+    """A wall that slides back and forth between start_pos and end_pos.
+    
+    Motion is a closed-form function of the simulation tick: the wall moves
+    speed pixels per tick and ping-pongs with a period of 2 * distance / speed
+    ticks, so its position at any tick is known without stepping through the
+    ticks before it.
+    """
+    
     def __init__(self, start_pos, end_pos, speed=0.5):
         self.start_pos = start_pos
         self.end_pos = end_pos
@@ -15,42 +42,113 @@ class MovingWall:
         self.height = 32
         self.rect = pygame.Rect(self.current_pos[0], self.current_pos[1], self.width, self.height)
         
-        # Create a surface for the moving wall
-        self.image = pygame.Surface((self.width, self.height))
-        self.image.fill((150, 50, 50))  # Reddish color to distinguish from normal walls
-    
-    def update(self):
-        # Calculate direction vector
-        if self.moving_to_end:
-            target = self.end_pos
+        # Path length and unit direction, computed once
+        dx = end_pos[0] - start_pos[0]
+        dy = end_pos[1] - start_pos[1]
+        self.distance = (dx**2 + dy**2)**0.5
+        if self.distance > 0:
+            self.unit = (dx / self.distance, dy / self.distance)
         else:
-            target = self.start_pos
+            self.unit = (0.0, 0.0)
+        self.period = 2 * self.distance / speed if self.distance > 0 else 0
         
-        # Calculate direction
-        dx = target[0] - self.current_pos[0]
-        dy = target[1] - self.current_pos[1]
-        distance = (dx**2 + dy**2)**0.5
+        # Tiles the rect covered at the last tile update (inclusive bounds)
+        self.tile_left = self.tile_top = self.tile_right = self.tile_bottom = -1
+        
+        # Shared moving wall image (reddish to distinguish from normal walls)
+        self.image = assets.image('moving_wall', (self.width, self.height), (150, 50, 50))
+        
+        # Sprite tuple from the last sprites() call, reused while it's still right
+        self.sprite_cache = None
+    
+    def offset_at(self, tick):
+        # Distance travelled along the path at a tick (0 = start_pos, distance = end_pos)
+        if self.distance <= 0:
+            return 0.0
+        phase = (tick * self.speed) % (2 * self.distance)
+        if phase <= self.distance:
+            return phase
+        return 2 * self.distance - phase
+    
+    def position_at(self, tick):
+        offset = self.offset_at(tick)
+        return (self.start_pos[0] + self.unit[0] * offset,
+                self.start_pos[1] + self.unit[1] * offset)
+    
+    def rect_at(self, tick):
+        x, y = self.position_at(tick)
+        return pygame.Rect(int(x), int(y), self.width, self.height)
+    
+    def swept_rect(self, t0, t1):
+        # Smallest rect covering every position the wall takes between ticks t0 and t1
+        if t1 < t0:
+            t0, t1 = t1, t0
         
-        # Move towards target
-        if distance > self.speed:
-            self.current_pos[0] += (dx / distance) * self.speed
-            self.current_pos[1] += (dy / distance) * self.speed
+        if self.distance <= 0:
+            low = high = 0.0
+        elif t1 - t0 >= self.period:
+            low, high = 0.0, self.distance
         else:
-            # Reached target, switch direction
-            self.moving_to_end = not self.moving_to_end
+            low = min(self.offset_at(t0), self.offset_at(t1))
+            high = max(self.offset_at(t0), self.offset_at(t1))
+            
+            # Turning points inside the interval extend the range to the path's ends
+            d0 = t0 * self.speed
+            d1 = t1 * self.speed
+            span = 2 * self.distance
+            if self.distance + span * math.ceil((d0 - self.distance) / span) <= d1:
+                high = self.distance
+            if span * math.ceil(d0 / span) <= d1:
+                low = 0.0
+        
+        x0 = self.start_pos[0] + self.unit[0] * low
+        y0 = self.start_pos[1] + self.unit[1] * low
+        x1 = self.start_pos[0] + self.unit[0] * high
+        y1 = self.start_pos[1] + self.unit[1] * high
+        left = int(min(x0, x1))
+        top = int(min(y0, y1))
+        return pygame.Rect(left, top,
+                           int(max(x0, x1)) - left + self.width,
+                           int(max(y0, y1)) - top + self.height)
+    
+    def update(self, tick):
+        # Evaluate the position for this tick; nothing is integrated
+        offset = self.offset_at(tick)
+        self.current_pos[0] = self.start_pos[0] + self.unit[0] * offset
+        self.current_pos[1] = self.start_pos[1] + self.unit[1] * offset
+        
+        # Heading for end_pos during the first half of each period
+        self.moving_to_end = self.period == 0 or tick % self.period < self.period / 2
         
         # Update rect position
         self.rect.x = int(self.current_pos[0])
         self.rect.y = int(self.current_pos[1])
     
+    def sprites(self):
+        # Walls move less than a pixel per tick, so the last tuple is often still right
+        cached = self.sprite_cache
+        if (cached is None or cached[0][0] is not self.image or
+                cached[0][1][0] != self.rect.x or cached[0][1][1] != self.rect.y):
+            self.sprite_cache = cached = ((self.image, self.rect.topleft),)
+        return cached
+    
     def render(self, screen):
         screen.blit(self.image, self.rect)
 
 class Level:
-    def __init__(self, level_number, screen_width, screen_height):
+    # Attempts at generating a solvable layout before giving up
+    MAX_GENERATION_ATTEMPTS = 20
+    
+    def __init__(self, level_number, screen_width, screen_height,
+                 num_guards=None, num_moving_walls=None, num_scrolls=None):
         self.level_number = level_number
         self.tile_size = 32
         
+        # Optional overrides for the per-level entity counts (used by stress scenarios)
+        self.num_guards = num_guards
+        self.num_moving_walls = num_moving_walls
+        self.num_scrolls = num_scrolls
+        
         # Calculate grid dimensions based on screen size
         self.grid_width = screen_width // self.tile_size
         self.grid_height = screen_height // self.tile_size
@@ -59,55 +157,68 @@ class Level:
         self.width = self.grid_width * self.tile_size
         self.height = self.grid_height * self.tile_size
         
-        # Moving maze elements
-        self.moving_walls = []
+        # Generate the level, rejecting layouts where the exit or a scroll can't be reached
+        for _ in range(self.MAX_GENERATION_ATTEMPTS):
+            # Moving maze elements, positioned by the simulation tick
+            self.moving_walls = []
+            self.tick = 0
+            self.generate_level()
+            
+            # Connectivity and distance data, cached for AI, placement and scoring
+            self.analysis = LevelAnalysis(self)
+            if self.analysis.solvable:
+                break
+        else:
+            raise RuntimeError("Could not generate a solvable level")
         
-        # Generate the level
-        self.generate_level()
+        # Blit list for the grid, built on first render, and the sprite lists
+        # map_sprites() and guard_sprites() fill in place
+        self.tile_blits = None
+        self.map_sprite_list = []
+        self.guard_sprite_list = []
         
-        # Load tile images (placeholders)
+        # Tile images come from the tiles.png tileset (one frame per tile type),
+        # with placeholder colors until it exists
+        size = (self.tile_size, self.tile_size)
         self.tile_images = {
-            Tile.EMPTY: pygame.Surface((self.tile_size, self.tile_size)),
-            Tile.WALL: pygame.Surface((self.tile_size, self.tile_size)),
-            Tile.HIDE_SPOT: pygame.Surface((self.tile_size, self.tile_size)),
-            Tile.EXIT: pygame.Surface((self.tile_size, self.tile_size))
+            Tile.EMPTY: assets.image('tiles', size, (50, 50, 50), Tile.EMPTY),  # Dark gray
+            Tile.WALL: assets.image('tiles', size, (100, 100, 100), Tile.WALL),  # Gray
+            Tile.HIDE_SPOT: assets.image('tiles', size, (0, 100, 0), Tile.HIDE_SPOT),  # Dark green
+            Tile.EXIT: assets.image('tiles', size, (255, 215, 0), Tile.EXIT)  # Gold
         }
-        
-        # Set placeholder colors
-        self.tile_images[Tile.EMPTY].fill((50, 50, 50))  # Dark gray
-        self.tile_images[Tile.WALL].fill((100, 100, 100))  # Gray
-        self.tile_images[Tile.HIDE_SPOT].fill((0, 100, 0))  # Dark green
-        self.tile_images[Tile.EXIT].fill((255, 215, 0))  # Gold
     
     def generate_level(self):
         # Create maze generator
         maze_gen = MazeGenerator(self.grid_width, self.grid_height)
         self.grid = maze_gen.generate_maze()
         
-        # Create walls list for collision detection
-        self.walls = []
+        # Static wall colliders: runs of wall tiles merged into larger rects, since
+        # collision and line of sight scan the whole list
+        self.static_walls = merge_wall_rects(self.grid, self.tile_size)
         self.hide_spots = []
         
+        # Per-tile index of interactables: (tile_x, tile_y) -> {kind: object}
+        self.triggers = {}
+        
         # Process the grid to create game objects
         for y in range(self.grid_height):
             for x in range(self.grid_width):
-                if self.grid[y][x] == Tile.WALL:
-                    self.walls.append(pygame.Rect(
+                if self.grid[y][x] == Tile.HIDE_SPOT:
+                    hide_rect = pygame.Rect(
                         x * self.tile_size, 
                         y * self.tile_size, 
                         self.tile_size, 
                         self.tile_size
-                    ))
-                elif self.grid[y][x] == Tile.HIDE_SPOT:
-                    self.hide_spots.append(pygame.Rect(
-                        x * self.tile_size, 
-                        y * self.tile_size, 
-                        self.tile_size, 
-                        self.tile_size
-                    ))
+                    )
+                    self.hide_spots.append(hide_rect)
+                    self.add_trigger((x, y), Trigger.HIDE_SPOT, hide_rect)
+        
+        # Index of free cells for placing entities; cells are claimed as they're used
+        self.free_cells = FreeCellIndex(self.grid)
         
         # Place player start position (always in top-left area)
         start_x, start_y = self.find_empty_position(1, 1, 3, 3)
+        self.player_start_tile = (start_x, start_y)
         # Adjust to center of tile and make sure player is smaller than tile
         self.player_start_pos = (
             start_x * self.tile_size + (self.tile_size - 24) // 2,
@@ -128,10 +239,14 @@ class Level:
             self.tile_size,
             self.tile_size
         )
+        self.add_trigger((exit_x, exit_y), Trigger.EXIT, self.exit_rect)
         
         # Place scrolls (3-5 based on level)
         num_scrolls = 3 + min(2, self.level_number // 3)
+        if self.num_scrolls is not None:
+            num_scrolls = self.num_scrolls
         self.scrolls = []
+        self.scroll_slots = {}  # Scroll -> index in self.scrolls, for O(1) removal
         for _ in range(num_scrolls):
             scroll_x, scroll_y = self.find_empty_position(2, 2, self.grid_width - 3, self.grid_height - 3)
             # Center the scroll in the tile
@@ -139,17 +254,41 @@ class Level:
                 scroll_x * self.tile_size + (self.tile_size - 16) // 2,
                 scroll_y * self.tile_size + (self.tile_size - 16) // 2
             )
-            self.scrolls.append(Scroll(scroll_pos))
+            scroll = Scroll(scroll_pos)
+            self.scroll_slots[scroll] = len(self.scrolls)
+            self.scrolls.append(scroll)
+            self.add_trigger((scroll_x, scroll_y), Trigger.SCROLL, scroll)
         
         # Create moving maze elements (more with higher levels)
         self.create_moving_walls()
         
+        # Walls list for collision detection. Moving walls update their rects in
+        # place, so the list is built once.
+        self.walls = self.static_walls + [wall.rect for wall in self.moving_walls]
+        
+        # Tiles currently blocked by moving walls; the version changes whenever
+        # a wall moves onto a different tile so cached vision can be refreshed
+        self.moving_wall_tiles = set()
+        self.moving_wall_version = 0
+        self.update_moving_wall_tiles()
+        
         # Create guard patrol routes and guards
         self.create_guards()
+        
+        # Time-indexed map of guard vision, built on first use
+        self.danger_map = None
+        
+        # Junction/corridor graph for pathfinding, built on first use
+        self.corridor_graph = None
+        
+        # Footstep noise guards can hear
+        self.noise = NoiseField(self.grid)
     
     def create_moving_walls(self):
         # Number of moving walls increases with level
         num_moving_walls = min(self.level_number, 5)  # Cap at 5 moving walls
+        if self.num_moving_walls is not None:
+            num_moving_walls = self.num_moving_walls
         
         for _ in range(num_moving_walls):
             # Find a suitable position for the moving wall
@@ -208,47 +347,77 @@ class Level:
                             # We don't need a special tile type, just mark it visually
                             pass
     
-    def find_empty_position(self, min_x, min_y, max_x, max_y):
-        attempts = 0
-        while attempts < 100:  # Prevent infinite loop
-            x = random.randint(min_x, max_x)
-            y = random.randint(min_y, max_y)
-            if self.grid[y][x] == Tile.EMPTY:
-                return x, y
-            attempts += 1
+    def add_trigger(self, tile, kind, obj):
+        triggers = self.triggers.get(tile)
+        if triggers is None:
+            triggers = self.triggers[tile] = {}
+        triggers[kind] = obj
+    
+    def remove_trigger(self, tile, kind):
+        triggers = self.triggers.get(tile)
+        if triggers is not None:
+            triggers.pop(kind, None)
+            if not triggers:
+                del self.triggers[tile]
+    
+    def trigger_at(self, tile, kind):
+        triggers = self.triggers.get(tile)
+        if triggers is None:
+            return None
+        return triggers.get(kind)
+    
+    def find_trigger(self, rect, kind):
+        # Only the 1-4 tiles the rect overlaps can hold a trigger it touches
+        triggers = self.triggers
+        for tile_y in range(rect.top // self.tile_size, (rect.bottom - 1) // self.tile_size + 1):
+            for tile_x in range(rect.left // self.tile_size, (rect.right - 1) // self.tile_size + 1):
+                tile_triggers = triggers.get((tile_x, tile_y))
+                if tile_triggers is not None and kind in tile_triggers:
+                    return tile_triggers[kind]
+        return None
+    
+    def remove_scroll(self, scroll):
+        self.remove_trigger((scroll.rect.centerx // self.tile_size, scroll.rect.centery // self.tile_size),
+                            Trigger.SCROLL)
         
-        # Fallback if no empty position found
-        return min_x, min_y
+        # Swap the last scroll into the removed one's slot
+        index = self.scroll_slots.pop(scroll)
+        last = self.scrolls.pop()
+        if last is not scroll:
+            self.scrolls[index] = last
+            self.scroll_slots[last] = index
+    
+    def find_empty_position(self, min_x, min_y, max_x, max_y, avoid=(), min_distance=0):
+        # Uniformly pick and claim a free cell in the (inclusive) area, at least
+        # min_distance tiles (Manhattan) away from every cell in avoid
+        position = self.free_cells.sample(min_x, min_y, max_x, max_y, avoid, min_distance)
+        if position is not None:
+            return position
+        
+        # Area is full: widen to the whole map, then drop the distance rule
+        position = self.free_cells.sample(1, 1, self.grid_width - 2, self.grid_height - 2, avoid, min_distance)
+        if position is None:
+            position = self.free_cells.sample(1, 1, self.grid_width - 2, self.grid_height - 2)
+        if position is None:
+            raise RuntimeError("No free cell left in the level")
+        return position
     
     def create_guards(self):
         # Number of guards increases with level, but at a slower rate
         num_guards = 1 + min(2, self.level_number // 3)
+        if self.num_guards is not None:
+            num_guards = self.num_guards
         self.guards = []
         
-        # Keep track of player start area to avoid placing guards there
-        player_safe_zone_x = self.player_start_pos[0] // self.tile_size
-        player_safe_zone_y = self.player_start_pos[1] // self.tile_size
+        # Keep guards out of the area around the player start
         safe_zone_radius = 5  # Tiles away from player start
         
         for _ in range(num_guards):
             # Find a suitable position for the guard that's not near the player start
-            guard_x, guard_y = None, None
-            attempts = 0
-            
-            while attempts < 50:  # Limit attempts to prevent infinite loop
-                temp_x, temp_y = self.find_empty_position(2, 2, self.grid_width - 3, self.grid_height - 3)
-                
-                # Check if this position is far enough from player start
-                distance = abs(temp_x - player_safe_zone_x) + abs(temp_y - player_safe_zone_y)
-                if distance > safe_zone_radius:
-                    guard_x, guard_y = temp_x, temp_y
-                    break
-                
-                attempts += 1
-            
-            # If we couldn't find a good position, use the last one anyway
-            if guard_x is None:
-                guard_x, guard_y = self.find_empty_position(2, 2, self.grid_width - 3, self.grid_height - 3)
+            guard_x, guard_y = self.find_empty_position(
+                2, 2, self.grid_width - 3, self.grid_height - 3,
+                avoid=[self.player_start_tile], min_distance=safe_zone_radius + 1
+            )
             
             # Create a patrol route
             patrol_points = self.create_patrol_route(guard_x, guard_y)
@@ -333,40 +502,143 @@ class Level:
         
         return patrol_points
     
-    def update_moving_elements(self):
-        # Update all moving walls
+    def update_moving_elements(self, tick=None):
+        # Advance one tick, or jump straight to the given tick
+        self.tick = self.tick + 1 if tick is None else tick
+        
+        # Update all moving walls (self.walls holds their rects, so it stays current)
         for wall in self.moving_walls:
-            wall.update()
-            
-        # Update the walls list to include current positions of moving walls
-        # First, filter out any moving walls from the previous frame
-        self.walls = [wall for wall in self.walls if not any(
-            wall.x == moving_wall.rect.x and wall.y == moving_wall.rect.y 
-            for moving_wall in self.moving_walls
-        )]
+            wall.update(self.tick)
         
-        # Then add the current positions of moving walls
-        for moving_wall in self.moving_walls:
-            self.walls.append(moving_wall.rect)
+        self.update_moving_wall_tiles()
     
-    def render(self, screen):
-        # Render the grid
-        for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                tile_type = self.grid[y][x]
-                screen.blit(
-                    self.tile_images[tile_type],
-                    (x * self.tile_size, y * self.tile_size)
-                )
-        
-        # Render scrolls
-        for scroll in self.scrolls:
-            scroll.render(screen)
+    def update_moving_wall_tiles(self):
+        # Most ticks no wall reaches a new tile, so compare each wall's tile
+        # span first and only build a new set when one changed
+        tile_size = self.tile_size
+        changed = False
+        for wall in self.moving_walls:
+            rect = wall.rect
+            left = rect.left // tile_size
+            top = rect.top // tile_size
+            right = (rect.right - 1) // tile_size
+            bottom = (rect.bottom - 1) // tile_size
+            if (left != wall.tile_left or top != wall.tile_top or
+                    right != wall.tile_right or bottom != wall.tile_bottom):
+                wall.tile_left, wall.tile_top, wall.tile_right, wall.tile_bottom = left, top, right, bottom
+                changed = True
+        if not changed:
+            return
         
-        # Render moving walls
+        tiles = set()
         for wall in self.moving_walls:
-            wall.render(screen)
+            for tile_y in range(wall.tile_top, wall.tile_bottom + 1):
+                for tile_x in range(wall.tile_left, wall.tile_right + 1):
+                    tiles.add((tile_x, tile_y))
         
-        # Render guards
+        if tiles != self.moving_wall_tiles:
+            self.moving_wall_tiles = tiles
+            self.moving_wall_version += 1
+    
+    def is_opaque(self, x, y):
+        # Walls, moving walls and anything off the map block vision
+        if not (0 <= x < self.grid_width and 0 <= y < self.grid_height):
+            return True
+        return self.grid[y][x] == Tile.WALL or (x, y) in self.moving_wall_tiles
+    
+    def get_danger_map(self):
+        # Predicting vision only works while every guard is on its patrol route
+        if self.danger_map is None:
+            for guard in self.guards:
+                if guard.is_pursuing or guard.returning_to_patrol or guard.is_alerted:
+                    return None
+            self.danger_map = DangerMap(self)
+        return self.danger_map
+    
+    def invalidate_danger_map(self):
+        # Called when a guard leaves its patrol; the next get_danger_map() rebuilds
+        # from the guards' new phases once they are all patrolling again
+        self.danger_map = None
+    
+    def get_corridor_graph(self):
+        # The static layout never changes after generation, so this is built once
+        if self.corridor_graph is None:
+            self.corridor_graph = CorridorGraph(self.grid)
+        return self.corridor_graph
+    
+    def to_data(self):
+        # Plain, picklable description of the generated layout (no pygame objects),
+        # used by the level pack generator
+        tile_size = self.tile_size
+        return {
+            'level_number': self.level_number,
+            'width': self.grid_width,
+            'height': self.grid_height,
+            'grid': [''.join(str(tile) for tile in row) for row in self.grid],
+            'player_start': list(self.player_start_tile),
+            'exit': [self.exit_rect.x // tile_size, self.exit_rect.y // tile_size],
+            'scrolls': [[scroll.rect.centerx // tile_size, scroll.rect.centery // tile_size]
+                        for scroll in self.scrolls],
+            'moving_walls': [{
+                'start': [wall.start_pos[0] // tile_size, wall.start_pos[1] // tile_size],
+                'end': [wall.end_pos[0] // tile_size, wall.end_pos[1] // tile_size],
+                'speed': round(wall.speed, 4),
+            } for wall in self.moving_walls],
+            'guards': [{
+                'patrol': [[x // tile_size, y // tile_size] for x, y in guard.patrol_points],
+                'speed': round(guard.speed, 4),
+            } for guard in self.guards],
+        }
+    
+    def swap_images(self, replacements):
+        # Points tiles and entities at converted copies of their surfaces
+        for tile, image in self.tile_images.items():
+            self.tile_images[tile] = replacements.get(image, image)
+        self.tile_blits = None
+        for sprite in self.scrolls + self.moving_walls:
+            sprite.image = replacements.get(sprite.image, sprite.image)
         for guard in self.guards:
-            guard.render(screen)
+            guard.swap_images(replacements)
+    
+    def render(self, screen):
+        self.render_map(screen)
+        self.render_guards(screen)
+    
+    def render_map(self, screen):
+        self.render_tiles(screen)
+        screen.blits(self.map_sprites(), False)
+    
+    def map_sprites(self):
+        # Scrolls, then moving walls on top. The list is reused and overwritten in
+        # place, so it is only valid until the next call (take_snapshot copies it).
+        sprites = self.map_sprite_list
+        count = 0
+        for scroll in self.scrolls:
+            count = write_sprites(sprites, count, scroll.sprites())
+        for wall in self.moving_walls:
+            count = write_sprites(sprites, count, wall.sprites())
+        del sprites[count:]
+        return sprites
+    
+    def guard_sprites(self):
+        # Reused like map_sprites()
+        sprites = self.guard_sprite_list
+        count = 0
+        for guard in self.guards:
+            count = write_sprites(sprites, count, guard.sprites())
+        del sprites[count:]
+        return sprites
+    
+    def render_tiles(self, screen):
+        # Render the grid. The grid doesn't change during play, so the (image,
+        # position) pairs are built once and drawn in one call that returns no rects.
+        if self.tile_blits is None:
+            self.tile_blits = [
+                (self.tile_images[self.grid[y][x]], (x * self.tile_size, y * self.tile_size))
+                for y in range(self.grid_height)
+                for x in range(self.grid_width)
+            ]
+        screen.blits(self.tile_blits, False)
+    
+    def render_guards(self, screen):
+        screen.blits(self.guard_sprites(), False)
@@ -0,0 +1,194 @@
+import math
+from array import array
+from .tile import Tile
+
+# Distance value for tiles that can't be reached
+UNREACHABLE = -1
+
+# Bits of LevelAnalysis.cuts: steps out of a tile that are never possible
+CUT_LEFT = 1
+CUT_RIGHT = 2
+CUT_UP = 4
+CUT_DOWN = 8
+
+class LevelAnalysis:
+    """Connectivity and distance data for a generated level.
+    
+    Works on a flat bytearray of passable tiles (index = y * width + x) and
+    computes, in linear time, the connected components, BFS distance fields
+    from the player start and from the exit, and path lengths to every
+    scroll.
+    
+    A moving wall always sits somewhere on its track, so nobody can walk
+    along the track past it; the steps between two tiles of the same track
+    are cut. Crossing the track is still possible, since the wall is only on
+    any one tile part of the time. This errs on the side of rejecting levels:
+    slipping partway into a track behind the wall and back out is ignored.
+    
+    Stepping onto the exit ends the level, so no walk continues past it: a
+    scroll that can only be reached through the exit counts as unreachable.
+    """
+    
+    def __init__(self, level):
+        self.width = level.grid_width
+        self.height = level.grid_height
+        size = self.width * self.height
+        
+        # Compact passability grid
+        wall = Tile.WALL
+        self.passable = bytearray(tile != wall for row in level.grid for tile in row)
+        self.cuts = bytearray(size)
+        for moving_wall in level.moving_walls:
+            self.cut_track(moving_wall, level.tile_size)
+        
+        tile_size = level.tile_size
+        self.start_tile = (level.player_start_pos[0] // tile_size, level.player_start_pos[1] // tile_size)
+        self.exit_tile = (level.exit_rect.x // tile_size, level.exit_rect.y // tile_size)
+        self.scroll_tiles = [(scroll.rect.centerx // tile_size, scroll.rect.centery // tile_size)
+                             for scroll in level.scrolls]
+        self.exit_index = self.index(*self.exit_tile)
+        
+        # Label components; the start's component is flooded first, which also
+        # gives the distance field from the start for free
+        self.components = array('i', [UNREACHABLE]) * size
+        self.component_sizes = []
+        self.start_distance = self.flood(self.index(*self.start_tile), 0)
+        for i in range(size):
+            if self.passable[i] and self.components[i] == UNREACHABLE:
+                self.flood(i, len(self.component_sizes), distances=False)
+        
+        # Distance field from the exit (only its own component is reachable)
+        self.exit_distance = self.bfs(self.exit_index)
+        
+        # Path lengths (in tiles) for the level's goals
+        self.exit_path_length = self.start_distance[self.exit_index]
+        self.scroll_path_lengths = [self.start_distance[self.index(x, y)] for x, y in self.scroll_tiles]
+        self.scroll_to_exit_lengths = [self.exit_distance[self.index(x, y)] for x, y in self.scroll_tiles]
+        
+        # Solvable if the exit and every scroll are reachable from the start
+        self.solvable = (self.exit_path_length != UNREACHABLE and
+                         UNREACHABLE not in self.scroll_path_lengths)
+    
+    def index(self, x, y):
+        return y * self.width + x
+    
+    def cut_track(self, moving_wall, tile_size):
+        # Cut every step between two tiles the wall passes over during its period
+        rect = moving_wall.swept_rect(0, math.ceil(moving_wall.period))
+        left = max(0, rect.left // tile_size)
+        top = max(0, rect.top // tile_size)
+        right = min(self.width - 1, (rect.right - 1) // tile_size)
+        bottom = min(self.height - 1, (rect.bottom - 1) // tile_size)
+        cuts = self.cuts
+        for y in range(top, bottom + 1):
+            for x in range(left, right + 1):
+                i = self.index(x, y)
+                if x < right:
+                    cuts[i] |= CUT_RIGHT
+                    cuts[i + 1] |= CUT_LEFT
+                if y < bottom:
+                    cuts[i] |= CUT_DOWN
+                    cuts[i + self.width] |= CUT_UP
+    
+    def neighbors(self, i):
+        x = i % self.width
+        cut = self.cuts[i]
+        if x > 0 and not cut & CUT_LEFT:
+            yield i - 1
+        if x < self.width - 1 and not cut & CUT_RIGHT:
+            yield i + 1
+        if i >= self.width and not cut & CUT_UP:
+            yield i - self.width
+        if i + self.width < len(self.passable) and not cut & CUT_DOWN:
+            yield i + self.width
+    
+    def flood(self, source, label, distances=True):
+        # BFS that labels one component, optionally returning its distance field
+        dist = array('i', [UNREACHABLE]) * len(self.passable) if distances else None
+        if not self.passable[source]:
+            self.component_sizes.append(0)
+            return dist
+        
+        labels = self.components
+        labels[source] = label
+        order = self.walk(source, labels, label, UNREACHABLE)
+        self.component_sizes.append(len(order))
+        
+        # BFS order visits tiles by increasing distance, so one more pass fills the field
+        if distances:
+            self.fill_distances(order, dist)
+        return dist
+    
+    def bfs(self, source):
+        dist = array('i', [UNREACHABLE]) * len(self.passable)
+        if not self.passable[source]:
+            return dist
+        seen = bytearray(len(self.passable))
+        seen[source] = 1
+        self.fill_distances(self.walk(source, seen, 1, 0), dist)
+        return dist
+    
+    def walk(self, source, marks, mark, unmarked):
+        # Breadth-first walk over passable tiles, writing mark into marks for every
+        # unmarked tile reached. Returns the tiles in visiting order, each paired
+        # with its BFS parent. The exit is reached but never walked through.
+        width = self.width
+        size = len(self.passable)
+        passable = self.passable
+        cuts = self.cuts
+        exit_index = self.exit_index
+        order = [(source, -1)]
+        head = 0
+        while head < len(order):
+            i = order[head][0]
+            head += 1
+            if i == exit_index and i != source:
+                continue
+            x = i % width
+            cut = cuts[i]
+            n = i - 1
+            if x > 0 and passable[n] and marks[n] == unmarked and not cut & CUT_LEFT:
+                marks[n] = mark
+                order.append((n, i))
+            n = i + 1
+            if x < width - 1 and passable[n] and marks[n] == unmarked and not cut & CUT_RIGHT:
+                marks[n] = mark
+                order.append((n, i))
+            n = i - width
+            if n >= 0 and passable[n] and marks[n] == unmarked and not cut & CUT_UP:
+                marks[n] = mark
+                order.append((n, i))
+            n = i + width
+            if n < size and passable[n] and marks[n] == unmarked and not cut & CUT_DOWN:
+                marks[n] = mark
+                order.append((n, i))
+        return order
+    
+    def fill_distances(self, order, dist):
+        dist[order[0][0]] = 0
+        for i, parent in order[1:]:
+            dist[i] = dist[parent] + 1
+    
+    def component_of(self, x, y):
+        return self.components[self.index(x, y)]
+    
+    def is_reachable(self, x, y):
+        return self.components[self.index(x, y)] == self.components[self.index(*self.start_tile)] != UNREACHABLE
+    
+    def shortest_path(self, field, x, y):
+        # Walk downhill on a distance field from (x, y) back to the field's source
+        i = self.index(x, y)
+        if field[i] == UNREACHABLE:
+            return []
+        path = [(x, y)]
+        while field[i] > 0:
+            for n in self.neighbors(i):
+                if field[n] == field[i] - 1:
+                    i = n
+                    break
+            path.append((i % self.width, i // self.width))
+        return path
+    
+    def path_to_exit(self):
+        # Shortest route from the player start to the exit, start first
+        return self.shortest_path(self.exit_distance, *self.start_tile)
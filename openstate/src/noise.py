@@ -0,0 +1,88 @@
+from array import array
+from .tile import Tile
+
+class NoiseField:
+    """Footstep noise spread over the tile grid, for guard hearing.
+    
+    When the player steps onto a new tile, a noise of some loudness spreads
+    from that tile with a bounded breadth-first search. Loudness drops by one
+    per tile and by wall_loss per wall tile it passes through, and only tiles
+    within earshot are touched. Each tile keeps the loudest noise written to
+    it, the tick it was written and the tile it came from. Reads apply decay
+    lazily (one level every decay_ticks), so the field never needs a pass over
+    the whole map and a read is O(1).
+    
+    A crouched footstep is quieter than any guard's hearing threshold, so
+    sneaking is silent; the playtest bot's plans rely on that.
+    """
+    
+    def __init__(self, grid, walk_loudness=6, crouch_loudness=1, wall_loss=3, decay_ticks=15):
+        self.grid = grid
+        self.height = len(grid)
+        self.width = len(grid[0]) if grid else 0
+        self.walk_loudness = walk_loudness
+        self.crouch_loudness = crouch_loudness
+        self.wall_loss = wall_loss
+        self.decay_ticks = decay_ticks
+        
+        size = self.width * self.height
+        self.values = array('h', [0]) * size
+        self.stamps = array('i', [0]) * size
+        self.sources = array('i', [-1]) * size
+    
+    def level_at(self, x, y, tick):
+        # Loudness heard on a tile at a tick (0 = silence)
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return 0
+        i = y * self.width + x
+        value = self.values[i] - (tick - self.stamps[i]) // self.decay_ticks
+        return value if value > 0 else 0
+    
+    def source_at(self, x, y):
+        # Tile the loudest noise on (x, y) came from, or None
+        i = y * self.width + x
+        source = self.sources[i]
+        if source < 0:
+            return None
+        return source % self.width, source // self.width
+    
+    def emit(self, x, y, loudness, tick):
+        # Spread a noise from (x, y); a bucket queue keeps the cheapest remaining
+        # loudness first even though walls cost more than open tiles
+        if loudness <= 0:
+            return
+        width = self.width
+        height = self.height
+        grid = self.grid
+        wall = Tile.WALL
+        values = self.values
+        stamps = self.stamps
+        sources = self.sources
+        decay_ticks = self.decay_ticks
+        
+        source = y * width + x
+        best = {source: loudness}
+        buckets = [[] for _ in range(loudness + 1)]
+        buckets[loudness].append(source)
+        for remaining in range(loudness, 0, -1):
+            for i in buckets[remaining]:
+                if best[i] != remaining:
+                    continue  # Reached louder by another route
+                
+                # Keep whichever noise on the tile is louder now
+                current = values[i] - (tick - stamps[i]) // decay_ticks
+                if remaining >= current:
+                    values[i] = remaining
+                    stamps[i] = tick
+                    sources[i] = source
+                
+                tx = i % width
+                ty = i // width
+                for nx, ny in ((tx - 1, ty), (tx + 1, ty), (tx, ty - 1), (tx, ty + 1)):
+                    if not (0 <= nx < width and 0 <= ny < height):
+                        continue
+                    n = ny * width + nx
+                    louder = remaining - (self.wall_loss if grid[ny][nx] == wall else 1)
+                    if louder > 0 and louder > best.get(n, 0):
+                        best[n] = louder
+                        buckets[louder].append(n)
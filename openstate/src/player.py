@@ -1,5 +1,7 @@
 import pygame
 import random
+from .assets import assets
+from .tile import Trigger
 
 class Player:
     def __init__(self, start_pos):
@@ -19,14 +21,27 @@ class Player:
         self.is_crouching = False
         self.is_hidden = False
         
+        # Footsteps: the tile the last noise was made on, and whether this
+        # update stepped onto a new tile
+        self.noise_tile = None
+        self.footstep = False
+        
         # Animation properties
         self.animation_frame = 0
         self.animation_speed = 0.2
         self.animation_timer = 0
         
-        # Load player images (placeholder)
-        self.image = pygame.Surface((self.width, self.height))
-        self.image.fill((0, 0, 255))  # Blue placeholder
+        # Player images, shared through the asset manager (placeholders until sprites exist)
+        size = (self.width, self.height)
+        self.images = {
+            'normal': assets.image('player', size, (0, 0, 255)),  # Blue
+            'crouching': assets.image('player_crouching', size, (0, 100, 255)),  # Light blue
+            'hidden': assets.image('player_hidden', size, (100, 100, 100)),  # Gray
+        }
+        self.image = self.images['normal']
+        
+        # Sprite tuple from the last sprites() call, reused while it's still right
+        self.sprite_cache = None
     
     def handle_event(self, event):
         # We'll handle movement in the update method using key states
@@ -36,6 +51,9 @@ class Player:
         # Update position with collision detection
         self.move_with_collision(level)
         
+        # Make a noise guards can hear when stepping onto a new tile
+        self.make_noise(level)
+        
         # Check if player is in a hiding spot
         self.check_hiding(level)
         
@@ -88,13 +106,22 @@ class Player:
             self.rect.bottom = level.height
             self.y = self.rect.y
     
+    def make_noise(self, level):
+        # Each new tile is one footstep; a crouched one is too faint for guards to hear
+        tile_size = level.tile_size
+        tile = (self.rect.centerx // tile_size, self.rect.centery // tile_size)
+        self.footstep = self.noise_tile is not None and tile != self.noise_tile
+        if self.footstep:
+            noise = level.noise
+            loudness = noise.crouch_loudness if self.is_crouching else noise.walk_loudness
+            noise.emit(tile[0], tile[1], loudness, level.tick)
+        self.noise_tile = tile
+    
     def check_hiding(self, level):
+        # Hidden while crouching on any tile with a hiding spot
         self.is_hidden = False
         if self.is_crouching:
-            for hide_spot in level.hide_spots:
-                if self.rect.colliderect(hide_spot):
-                    self.is_hidden = True
-                    break
+            self.is_hidden = level.find_trigger(self.rect, Trigger.HIDE_SPOT) is not None
     
     def update_animation(self):
         self.animation_timer += 1
@@ -102,13 +129,27 @@ class Player:
             self.animation_timer = 0
             self.animation_frame = (self.animation_frame + 1) % 4  # 4 frames of animation
     
-    def render(self, screen):
-        # Change color based on state (for placeholder)
+    def swap_images(self, replacements):
+        # Swaps in converted copies of the state images (see AssetManager.convert_pending)
+        for state, image in self.images.items():
+            self.images[state] = replacements.get(image, image)
+        self.image = replacements.get(self.image, self.image)
+    
+    def sprites(self):
+        # (image, position) pairs to draw, for a render snapshot
         if self.is_hidden:
-            self.image.fill((100, 100, 100))  # Gray when hidden
+            self.image = self.images['hidden']
         elif self.is_crouching:
-            self.image.fill((0, 100, 255))  # Light blue when crouching
+            self.image = self.images['crouching']
         else:
-            self.image.fill((0, 0, 255))  # Blue normally
+            self.image = self.images['normal']
         
-        screen.blit(self.image, self.rect)
+        # Reuse the last tuple while the player stands still
+        cached = self.sprite_cache
+        if (cached is None or cached[0][0] is not self.image or
+                cached[0][1][0] != self.rect.x or cached[0][1][1] != self.rect.y):
+            self.sprite_cache = cached = ((self.image, self.rect.topleft),)
+        return cached
+    
+    def render(self, screen):
+        screen.blits(self.sprites(), False)
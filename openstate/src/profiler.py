@@ -0,0 +1,134 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+class FrameProfiler:
+    # Phases in the order they happen during a frame
+    PHASES = (
+        'input',
+        'player',
+        'moving_walls',
+        'guards',
+        'detection',
+        'scrolls',
+        'level_render',
+        'guard_render',
+        'player_render',
+        'ui',
+        'present',
+    )
+    
+    def __init__(self, window=300, trace_limit=36000):
+        # Disabled by default so the game pays nothing for the hooks
+        self.enabled = False
+        self.show_overlay = False
+        self.window = window
+        
+        # Rolling samples (milliseconds) per phase, plus the whole frame
+        self.samples = {phase: deque(maxlen=window) for phase in self.PHASES}
+        self.frame_samples = deque(maxlen=window)
+        
+        # Per-frame trace rows for export (bounded to roughly 10 minutes at 60 FPS)
+        self.trace = deque(maxlen=trace_limit)
+        
+        # Timing state for the frame in progress
+        self.frame_number = 0
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+        self.current = dict.fromkeys(self.PHASES, 0.0)
+        
+        # Overlay is only re-rendered every few frames to keep its own cost low
+        self.overlay_interval = 15
+        self.overlay_surface = None
+        self.font = None
+    
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.show_overlay = self.enabled
+    
+    def begin_frame(self):
+        now = time.perf_counter()
+        self.frame_start = now
+        self.last_mark = now
+        for phase in self.current:
+            self.current[phase] = 0.0
+    
+    def mark(self, phase):
+        # Attribute the time since the previous mark to this phase
+        now = time.perf_counter()
+        self.current[phase] += (now - self.last_mark) * 1000.0
+        self.last_mark = now
+    
+    def skip(self):
+        # Discard time since the previous mark (e.g. code that belongs to no phase)
+        self.last_mark = time.perf_counter()
+    
+    def end_frame(self):
+        frame_ms = (time.perf_counter() - self.frame_start) * 1000.0
+        self.frame_number += 1
+        self.frame_samples.append(frame_ms)
+        
+        row = [self.frame_number, round(frame_ms, 4)]
+        for phase in self.PHASES:
+            value = self.current[phase]
+            self.samples[phase].append(value)
+            row.append(round(value, 4))
+        self.trace.append(row)
+    
+    def percentiles(self, samples, points=(50, 95, 99)):
+        if not samples:
+            return tuple(0.0 for _ in points)
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, int(round(p / 100.0 * last)))] for p in points)
+    
+    def summary(self):
+        stats = {'frame': self.percentiles(self.frame_samples)}
+        for phase in self.PHASES:
+            stats[phase] = self.percentiles(self.samples[phase])
+        return stats
+    
+    def export(self, path):
+        # Format is picked from the file extension: .json or anything else as CSV
+        header = ['frame', 'total_ms'] + [f'{phase}_ms' for phase in self.PHASES]
+        if path.endswith('.json'):
+            data = {
+                'phases': list(self.PHASES),
+                'summary': {name: dict(zip(('p50', 'p95', 'p99'), values))
+                            for name, values in self.summary().items()},
+                'frames': [dict(zip(header, row)) for row in self.trace],
+            }
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+        else:
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(self.trace)
+    
+    def render_overlay(self, screen):
+        if not self.show_overlay:
+            return
+        
+        if self.overlay_surface is None or self.frame_number % self.overlay_interval == 0:
+            if self.font is None:
+                pygame.font.init()
+                self.font = pygame.font.Font(None, 18)
+            
+            stats = self.summary()
+            lines = ['phase            p50    p95    p99 (ms)']
+            for name in ('frame',) + self.PHASES:
+                p50, p95, p99 = stats[name]
+                lines.append(f'{name:<14} {p50:6.2f} {p95:6.2f} {p99:6.2f}')
+            
+            line_height = self.font.get_linesize()
+            self.overlay_surface = pygame.Surface((230, line_height * len(lines) + 10), pygame.SRCALPHA)
+            self.overlay_surface.fill((0, 0, 0, 170))
+            for i, line in enumerate(lines):
+                text = self.font.render(line, True, (0, 255, 0))
+                self.overlay_surface.blit(text, (5, 5 + i * line_height))
+        
+        screen.blit(self.overlay_surface, (screen.get_width() - self.overlay_surface.get_width() - 5, 45))
@@ -1,5 +1,6 @@
 import pygame
 import math
+from .assets import assets
 
 class Scroll:
     def __init__(self, position):
@@ -15,9 +16,11 @@ class Scroll:
         self.hover_offset = 0
         self.hover_speed = 0.05
         
-        # Load scroll image (placeholder)
-        self.image = pygame.Surface((self.width, self.height))
-        self.image.fill((255, 255, 0))  # Yellow placeholder
+        # Scroll image, shared by every scroll (yellow placeholder)
+        self.image = assets.image('scroll', (self.width, self.height), (255, 255, 0))
+        
+        # Sprite tuple from the last sprites() call, reused while it's still right
+        self.sprite_cache = None
     
     def update(self):
         # Update hover animation
@@ -29,9 +32,14 @@ class Scroll:
             self.animation_timer = 0
             self.animation_frame = (self.animation_frame + 1) % 4  # 4 frames of animation
     
+    def sprites(self):
+        # Apply hover effect; a new tuple is only built when the scroll moves to
+        # another pixel, so snapshots usually share the last one
+        y = self.rect.y + int(self.hover_offset)
+        cached = self.sprite_cache
+        if cached is None or cached[0][1][1] != y or cached[0][0] is not self.image:
+            self.sprite_cache = cached = ((self.image, (self.rect.x, y)),)
+        return cached
+    
     def render(self, screen):
-        # Apply hover effect
-        hover_rect = self.rect.copy()
-        hover_rect.y += int(self.hover_offset)
-        
-        screen.blit(self.image, hover_rect)
+        screen.blits(self.sprites(), False)
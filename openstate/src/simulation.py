@@ -0,0 +1,192 @@
+import time
+import threading
+from collections import namedtuple
+
+# Everything Game.render needs for one frame. The sprite lists hold
+# (image, position) pairs, the HUD holds UI.render's arguments and level is
+# only used for its static tiles, so drawing never touches live game objects.
+RenderSnapshot = namedtuple('RenderSnapshot', (
+    'state', 'level', 'map_sprites', 'guard_sprites', 'player_sprites',
+    'hud', 'game_over_reason', 'sound_enabled',
+))
+
+# Sprites that moved further than this in one tick jumped (e.g. a respawn) and
+# are drawn where they are rather than slid there
+MAX_BLEND_DISTANCE = 64
+
+def blend_sprites(previous, current, alpha, slots):
+    # Sprite lists line up pair by pair unless something appeared or went away.
+    # Blends into slots, a list of [image, [x, y]] lists kept between frames.
+    if len(previous) != len(current):
+        return current
+    while len(slots) < len(current):
+        slots.append([None, [0, 0]])
+    del slots[len(current):]
+    for i in range(len(current)):
+        x0, y0 = previous[i][1]
+        image, (x1, y1) = current[i]
+        slot = slots[i]
+        slot[0] = image
+        position = slot[1]
+        if abs(x1 - x0) > MAX_BLEND_DISTANCE or abs(y1 - y0) > MAX_BLEND_DISTANCE:
+            position[0] = x1
+            position[1] = y1
+        else:
+            position[0] = round(x0 + (x1 - x0) * alpha)
+            position[1] = round(y0 + (y1 - y0) * alpha)
+    return slots
+
+class BlendedSnapshot:
+    """A render snapshot blended between two ticks, reused from frame to frame.
+    
+    Has the same fields as RenderSnapshot, so Game.render and TextureRenderer
+    draw it the same way. Its sprite lists hold [image, [x, y]] slots that
+    interpolate() overwrites in place, so blending a frame builds no lists or
+    tuples. In exchange, what interpolate() returns is only valid until the
+    next call: the render loop draws it straight away and nothing may keep
+    it. FixedStep and SimulationThread each own one and only blend on the
+    render thread.
+    """
+    
+    def __init__(self):
+        self.state = None
+        self.level = None
+        self.map_sprites = self.guard_sprites = self.player_sprites = ()
+        self.hud = None
+        self.game_over_reason = None
+        self.sound_enabled = None
+        self.map_slots = []
+        self.guard_slots = []
+        self.player_slots = []
+    
+    def interpolate(self, previous, current, alpha):
+        # A snapshot alpha of the way from the previous tick to the current one,
+        # so drawing faster than the tick rate still shows smooth motion. Only
+        # sprite positions are blended; everything else is the current tick's.
+        if previous is None or previous.level is not current.level or alpha >= 1.0:
+            return current
+        self.state, self.level, _, _, _, self.hud, self.game_over_reason, self.sound_enabled = current
+        self.map_sprites = blend_sprites(previous.map_sprites, current.map_sprites, alpha, self.map_slots)
+        self.guard_sprites = blend_sprites(previous.guard_sprites, current.guard_sprites, alpha, self.guard_slots)
+        self.player_sprites = blend_sprites(previous.player_sprites, current.player_sprites, alpha,
+                                            self.player_slots)
+        return self
+
+class FixedStep:
+    """Runs game ticks at a fixed rate from a render loop of any rate.
+    
+    Each frame, advance() adds the real time that passed to an accumulator
+    and runs as many ticks as fit in it, so a missed frame is made up with
+    extra ticks instead of slowing the game down, and a 144 Hz display
+    doesn't speed it up. snapshot() blends the last two ticks by the time
+    left over. Like SimulationThread, a backlog of more than max_catch_up
+    ticks is skipped rather than fast-forwarded.
+    """
+    
+    def __init__(self, game, tick_rate=60, max_catch_up=5):
+        self.game = game
+        self.interval = 1.0 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.accumulator = 0.0
+        self.last_time = None
+        self.previous = None
+        self.current = game.take_snapshot()
+        self.blended = BlendedSnapshot()
+        self.ticks = 0
+        self.skipped = 0
+    
+    def advance(self):
+        # Returns the number of ticks run
+        from .game import GameState
+        now = time.perf_counter()
+        if self.last_time is not None:
+            self.accumulator += now - self.last_time
+        self.last_time = now
+        
+        game = self.game
+        ticks = 0
+        while self.accumulator >= self.interval:
+            if ticks == self.max_catch_up:
+                self.skipped += int(self.accumulator / self.interval)
+                self.accumulator = 0.0
+                break
+            if game.state == GameState.PLAYING or game.state == GameState.LEVEL_COMPLETE:
+                game.update()
+            self.previous = self.current
+            self.current = game.take_snapshot()
+            self.accumulator -= self.interval
+            ticks += 1
+        self.ticks += ticks
+        return ticks
+    
+    def snapshot(self):
+        return self.blended.interpolate(self.previous, self.current, self.accumulator / self.interval)
+
+class SimulationThread:
+    """Runs the game simulation on its own thread at a fixed tick rate.
+    
+    After each tick the game publishes an immutable RenderSnapshot by
+    swapping a single reference: the next snapshot is built while the render
+    thread still draws the previous one, so a slow frame never delays a tick
+    and a tick is never drawn half-updated. Event handling on the main thread
+    takes the same lock as a tick.
+    
+    If the simulation falls more than max_catch_up ticks behind (e.g. the
+    process was suspended) the backlog is skipped rather than fast-forwarded.
+    """
+    
+    def __init__(self, game, tick_rate=60, max_catch_up=5):
+        self.game = game
+        self.tick_rate = tick_rate
+        self.max_catch_up = max_catch_up
+        self.lock = threading.Lock()
+        self.snapshot = game.take_snapshot()
+        
+        # The last two snapshots and when the newer one was published, swapped
+        # as one reference so the render thread always gets a matching set
+        self.frames = (None, self.snapshot, time.perf_counter())
+        self.blended = BlendedSnapshot()
+        
+        self.ticks = 0
+        self.skipped = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='simulation', daemon=True)
+        self.thread.start()
+    
+    def run(self):
+        from .game import GameState
+        interval = 1.0 / self.tick_rate
+        next_tick = time.perf_counter()
+        game = self.game
+        while not self.stop_event.is_set():
+            with self.lock:
+                if game.state == GameState.PLAYING or game.state == GameState.LEVEL_COMPLETE:
+                    game.update()
+                snapshot = game.take_snapshot()
+            self.frames = (self.snapshot, snapshot, time.perf_counter())
+            self.snapshot = snapshot
+            self.ticks += 1
+            
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self.stop_event.wait(delay)
+            elif delay < -interval * self.max_catch_up:
+                self.skipped += int(-delay / interval)
+                next_tick = time.perf_counter()
+    
+    def interpolated(self):
+        # The snapshot to draw now: between the last two ticks, by the time
+        # since the newer one was published. Only valid until the next call.
+        previous, current, published = self.frames
+        alpha = (time.perf_counter() - published) * self.tick_rate
+        return self.blended.interpolate(previous, current, alpha)
+    
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,511 @@
+import os
+import queue
+import socket
+import struct
+import selectors
+import threading
+from collections import deque
+from .tile import Tile
+
+# Every message is a kind and a payload length, followed by the payload
+MESSAGE = struct.Struct('<BI')
+
+class Message:
+    KEYFRAME = 1  # Static level layout; resets everything the viewer knows
+    DELTA = 2  # One tick: header, then the sections named in its changed bits
+
+# Keyframe: level number, grid width, grid height, tile size, guard count,
+# moving wall count, scroll count; then the grid (one byte per tile), then
+# per guard the patrol point count, vision range and angle and the points,
+# per moving wall its start, end and size, and per scroll its position
+KEYFRAME_HEADER = struct.Struct('<HHHBHHH')
+GUARD_HEADER = struct.Struct('<HHH')
+POINT = struct.Struct('<HH')
+WALL_LAYOUT = struct.Struct('<HHHHHH')
+
+# Delta: tick, game state, stars, changed bits
+DELTA_HEADER = struct.Struct('<IBBB')
+PLAYER_STATE = struct.Struct('<HHB')  # x, y, flags
+GUARD_STATE = struct.Struct('<HHB')  # x, y, direction and flags
+
+class Changed:
+    PLAYER = 1
+    GUARDS = 2  # Bitmask of changed guards, then their states
+    WALLS = 4  # Bitmask of changed moving walls, then their positions
+    SCROLLS = 8  # Bitmask of scrolls still in the level
+
+class PlayerFlag:
+    FACING_RIGHT = 1
+    CROUCHING = 2
+    HIDDEN = 4
+
+class GuardFlag:
+    # The low two bits are the direction in quarter turns (0 = right)
+    PURSUING = 4
+    ALERTED = 8
+    RETURNING = 16
+
+def parse_address(text):
+    # "7777" or "host:port" is TCP, anything else is a Unix socket path
+    if text.isdigit():
+        return socket.AF_INET, ('127.0.0.1', int(text))
+    host, colon, port = text.rpartition(':')
+    if colon and port.isdigit():
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    return socket.AF_UNIX, text
+
+def mask_bytes(bits, count):
+    return bits.to_bytes((count + 7) // 8, 'little')
+
+def encode_keyframe(level, scrolls):
+    # Position-independent layout data, sent when a level starts or a viewer joins
+    parts = [KEYFRAME_HEADER.pack(level.level_number, level.grid_width, level.grid_height,
+                                  level.tile_size, len(level.guards), len(level.moving_walls),
+                                  len(scrolls))]
+    parts.append(bytes(tile for row in level.grid for tile in row))
+    for guard in level.guards:
+        parts.append(GUARD_HEADER.pack(len(guard.patrol_points), guard.vision_range, guard.vision_angle))
+        for x, y in guard.patrol_points:
+            parts.append(POINT.pack(int(x), int(y)))
+    for wall in level.moving_walls:
+        parts.append(WALL_LAYOUT.pack(int(wall.start_pos[0]), int(wall.start_pos[1]),
+                                      int(wall.end_pos[0]), int(wall.end_pos[1]),
+                                      wall.width, wall.height))
+    for scroll in scrolls:
+        parts.append(POINT.pack(*scroll.rect.topleft))
+    return b''.join(parts)
+
+def guard_state(guard):
+    flags = (guard.direction // 90) & 3
+    if guard.is_pursuing:
+        flags |= GuardFlag.PURSUING
+    if guard.is_alerted:
+        flags |= GuardFlag.ALERTED
+    if guard.returning_to_patrol:
+        flags |= GuardFlag.RETURNING
+    return guard.rect.x, guard.rect.y, flags
+
+def player_state(player):
+    flags = 0
+    if player.facing_right:
+        flags |= PlayerFlag.FACING_RIGHT
+    if player.is_crouching:
+        flags |= PlayerFlag.CROUCHING
+    if player.is_hidden:
+        flags |= PlayerFlag.HIDDEN
+    return player.rect.x, player.rect.y, flags
+
+class Spectator:
+    # One connected viewer: unsent messages, and the offset into the first one
+    def __init__(self, connection):
+        self.connection = connection
+        self.pending = deque()
+        self.offset = 0
+        self.pending_bytes = 0
+        self.synced = False
+        self.writing = False
+
+class SpectatorServer:
+    """Streams the game's state to any number of local viewers.
+    
+    The game thread calls publish() once per tick. It compares the player,
+    guards, moving walls and scrolls with the previous tick and packs only
+    what changed into a delta: whole-pixel positions, flags and bitmasks of
+    which entities follow. A new level is sent as a keyframe (grid, patrol
+    routes, moving wall tracks, scroll spots) followed by a full delta.
+    
+    Sockets are only touched by a sender thread, which accepts viewers and
+    writes to them without blocking: each viewer has its own queue of
+    pending messages. A viewer that joins, or that falls more than
+    max_pending bytes behind, gets its backlog dropped and is resynced with
+    a keyframe and a full delta on the next tick, so a slow viewer costs the
+    game nothing and never sees a broken stream.
+    """
+    
+    def __init__(self, address, max_pending=1 << 20):
+        self.family, self.address = parse_address(address)
+        self.max_pending = max_pending
+        self.messages = queue.SimpleQueue()
+        self.sync_event = threading.Event()
+        
+        # What the viewers were last sent, on the game thread. Scrolls are
+        # numbered by their place in the level's list when it was first sent.
+        self.level = None
+        self.keyframe = None
+        self.scroll_ids = {}
+        self.player = None
+        self.guards = []
+        self.walls = []
+        self.scrolls = -1
+        
+        self.spectators = []
+        self.resyncs = 0
+        self.bytes_sent = 0
+        self.listener = None
+        self.wake_reader = None
+        self.wake_writer = None
+        self.stop_event = threading.Event()
+        self.thread = None
+    
+    def start(self):
+        listener = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_UNIX:
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+        else:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(self.address)
+        listener.listen()
+        listener.setblocking(False)
+        self.listener = listener
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        self.wake_reader.setblocking(False)
+        self.wake_writer.setblocking(False)
+        self.thread = threading.Thread(target=self.run, name='spectator-fanout', daemon=True)
+        self.thread.start()
+    
+    def publish(self, game):
+        # Called from the game loop after every tick; never blocks
+        level = game.level
+        if level is None:
+            return
+        keyframe = None
+        everyone = False
+        if level is not self.level:
+            self.level = level
+            self.scroll_ids = {scroll: i for i, scroll in enumerate(level.scrolls)}
+            layout = encode_keyframe(level, level.scrolls)
+            self.keyframe = MESSAGE.pack(Message.KEYFRAME, len(layout)) + layout
+            self.reset()
+            keyframe = self.keyframe
+            everyone = True
+        elif self.sync_event.is_set():
+            # Viewers are waiting to (re)join: a full delta, with the keyframe
+            # for those viewers only
+            self.sync_event.clear()
+            self.reset()
+            keyframe = self.keyframe
+        
+        delta = self.encode_delta(game)
+        self.messages.put((keyframe, everyone, MESSAGE.pack(Message.DELTA, len(delta)) + delta))
+        try:
+            self.wake_writer.send(b'\0')
+        except OSError:
+            pass  # Already woken (the pipe is full)
+    
+    def reset(self):
+        # Forget what was sent, so the next delta carries everything
+        self.player = None
+        self.guards = [None] * len(self.level.guards)
+        self.walls = [None] * len(self.level.moving_walls)
+        self.scrolls = -1
+    
+    def encode_delta(self, game):
+        level = self.level
+        changed = 0
+        parts = []
+        
+        player = player_state(game.player)
+        if player != self.player:
+            self.player = player
+            changed |= Changed.PLAYER
+            parts.append(PLAYER_STATE.pack(*player))
+        
+        bits = 0
+        states = []
+        previous = self.guards
+        for i, guard in enumerate(level.guards):
+            state = guard_state(guard)
+            if state != previous[i]:
+                previous[i] = state
+                bits |= 1 << i
+                states.append(GUARD_STATE.pack(*state))
+        if bits:
+            changed |= Changed.GUARDS
+            parts.append(mask_bytes(bits, len(previous)))
+            parts.extend(states)
+        
+        bits = 0
+        states = []
+        previous = self.walls
+        for i, wall in enumerate(level.moving_walls):
+            position = wall.rect.topleft
+            if position != previous[i]:
+                previous[i] = position
+                bits |= 1 << i
+                states.append(POINT.pack(*position))
+        if bits:
+            changed |= Changed.WALLS
+            parts.append(mask_bytes(bits, len(previous)))
+            parts.extend(states)
+        
+        bits = 0
+        scroll_ids = self.scroll_ids
+        for scroll in level.scrolls:
+            bits |= 1 << scroll_ids[scroll]
+        if bits != self.scrolls:
+            self.scrolls = bits
+            changed |= Changed.SCROLLS
+            parts.append(mask_bytes(bits, len(scroll_ids)))
+        
+        header = DELTA_HEADER.pack(level.tick, game.state, game.stars, changed)
+        return header + b''.join(parts)
+    
+    def run(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.listener, selectors.EVENT_READ)
+        selector.register(self.wake_reader, selectors.EVENT_READ)
+        while not self.stop_event.is_set():
+            for key, _ in selector.select(0.5):
+                if key.fileobj is self.listener:
+                    self.accept(selector)
+                elif key.fileobj is self.wake_reader:
+                    try:
+                        while self.wake_reader.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                else:
+                    self.flush(key.data, selector)
+            
+            # Hand this tick's messages to every viewer, then write what fits
+            while True:
+                try:
+                    keyframe, everyone, delta = self.messages.get_nowait()
+                except queue.Empty:
+                    break
+                for spectator in self.spectators:
+                    # Viewers that aren't synced skip deltas until a keyframe
+                    if keyframe is not None and (everyone or not spectator.synced):
+                        spectator.synced = self.enqueue(spectator, keyframe)
+                    if spectator.synced:
+                        self.enqueue(spectator, delta)
+            for spectator in list(self.spectators):
+                if spectator.pending and not spectator.writing:
+                    self.flush(spectator, selector)
+        selector.close()
+    
+    def accept(self, selector):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            connection.setblocking(False)
+            if self.family != socket.AF_UNIX:
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.spectators.append(Spectator(connection))
+            self.sync_event.set()
+    
+    def enqueue(self, spectator, data):
+        # Returns False if the viewer fell too far behind and has to resync
+        if spectator.pending_bytes and spectator.pending_bytes + len(data) > self.max_pending:
+            # Too far behind: keep only a half-written message so the stream
+            # stays whole, and resync from the next keyframe
+            kept = spectator.pending.popleft() if spectator.offset else None
+            spectator.pending.clear()
+            spectator.pending_bytes = 0
+            if kept is not None:
+                spectator.pending.append(kept)
+                spectator.pending_bytes = len(kept) - spectator.offset
+            spectator.synced = False
+            self.resyncs += 1
+            self.sync_event.set()
+            return False
+        spectator.pending.append(data)
+        spectator.pending_bytes += len(data)
+        return True
+    
+    def flush(self, spectator, selector):
+        connection = spectator.connection
+        try:
+            while spectator.pending:
+                data = spectator.pending[0]
+                sent = connection.send(memoryview(data)[spectator.offset:])
+                self.bytes_sent += sent
+                spectator.pending_bytes -= sent
+                spectator.offset += sent
+                if spectator.offset < len(data):
+                    break
+                spectator.pending.popleft()
+                spectator.offset = 0
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self.drop(spectator, selector)
+            return
+        
+        # Wait for the socket to drain only while something is left to write
+        if spectator.pending and not spectator.writing:
+            selector.register(connection, selectors.EVENT_WRITE, spectator)
+            spectator.writing = True
+        elif not spectator.pending and spectator.writing:
+            selector.unregister(connection)
+            spectator.writing = False
+    
+    def drop(self, spectator, selector):
+        if spectator.writing:
+            selector.unregister(spectator.connection)
+        spectator.connection.close()
+        self.spectators.remove(spectator)
+    
+    def close(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        for spectator in self.spectators:
+            spectator.connection.close()
+        self.spectators = []
+        for sock in (self.listener, self.wake_reader, self.wake_writer):
+            if sock is not None:
+                sock.close()
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+
+class SpectatorView:
+    """A viewer's copy of the game, rebuilt from the stream.
+    
+    feed() takes bytes as they arrive (in any chunks) and applies every
+    complete message. Positions are the entities' top-left corners in
+    pixels, as in the game.
+    """
+    
+    def __init__(self):
+        self.buffer = bytearray()
+        self.level_number = 0
+        self.grid = None
+        self.grid_width = 0
+        self.grid_height = 0
+        self.tile_size = 32
+        self.patrols = []  # Per guard: (points, vision range, vision angle)
+        self.wall_layouts = []  # Per moving wall: (start, end, size)
+        self.scroll_positions = []
+        
+        self.tick = 0
+        self.state = None
+        self.stars = 0
+        self.player = None  # (x, y, flags)
+        self.guards = []  # (x, y, direction and flags)
+        self.walls = []  # (x, y)
+        self.scrolls = 0  # Bitmask of scrolls still in the level
+        self.keyframes = 0
+        self.deltas = 0
+    
+    def feed(self, data):
+        # Returns the number of ticks applied
+        buffer = self.buffer
+        buffer += data
+        ticks = 0
+        start = 0
+        while len(buffer) - start >= MESSAGE.size:
+            kind, length = MESSAGE.unpack_from(buffer, start)
+            end = start + MESSAGE.size + length
+            if len(buffer) < end:
+                break
+            payload = memoryview(buffer)[start + MESSAGE.size:end]
+            if kind == Message.KEYFRAME:
+                self.apply_keyframe(payload)
+            elif kind == Message.DELTA:
+                self.apply_delta(payload)
+                ticks += 1
+            payload.release()
+            start = end
+        del buffer[:start]
+        return ticks
+    
+    def apply_keyframe(self, payload):
+        (self.level_number, width, height, self.tile_size, guard_count,
+         wall_count, scroll_count) = KEYFRAME_HEADER.unpack_from(payload)
+        offset = KEYFRAME_HEADER.size
+        tiles = payload[offset:offset + width * height]
+        self.grid = [list(tiles[y * width:(y + 1) * width]) for y in range(height)]
+        self.grid_width = width
+        self.grid_height = height
+        offset += width * height
+        
+        self.patrols = []
+        for _ in range(guard_count):
+            count, vision_range, vision_angle = GUARD_HEADER.unpack_from(payload, offset)
+            offset += GUARD_HEADER.size
+            points = [POINT.unpack_from(payload, offset + i * POINT.size) for i in range(count)]
+            offset += count * POINT.size
+            self.patrols.append((points, vision_range, vision_angle))
+        
+        self.wall_layouts = []
+        for _ in range(wall_count):
+            x0, y0, x1, y1, wall_width, wall_height = WALL_LAYOUT.unpack_from(payload, offset)
+            offset += WALL_LAYOUT.size
+            self.wall_layouts.append(((x0, y0), (x1, y1), (wall_width, wall_height)))
+        
+        self.scroll_positions = [POINT.unpack_from(payload, offset + i * POINT.size)
+                                 for i in range(scroll_count)]
+        
+        self.player = None
+        self.guards = [None] * guard_count
+        self.walls = [layout[0] for layout in self.wall_layouts]
+        self.scrolls = (1 << scroll_count) - 1
+        self.keyframes += 1
+    
+    def apply_delta(self, payload):
+        self.tick, self.state, self.stars, changed = DELTA_HEADER.unpack_from(payload)
+        offset = DELTA_HEADER.size
+        if changed & Changed.PLAYER:
+            self.player = PLAYER_STATE.unpack_from(payload, offset)
+            offset += PLAYER_STATE.size
+        if changed & Changed.GUARDS:
+            offset = self.apply_states(payload, offset, self.guards, GUARD_STATE)
+        if changed & Changed.WALLS:
+            offset = self.apply_states(payload, offset, self.walls, POINT)
+        if changed & Changed.SCROLLS:
+            size = (len(self.scroll_positions) + 7) // 8
+            self.scrolls = int.from_bytes(payload[offset:offset + size], 'little')
+            offset += size
+        self.deltas += 1
+    
+    def apply_states(self, payload, offset, states, record):
+        size = (len(states) + 7) // 8
+        bits = int.from_bytes(payload[offset:offset + size], 'little')
+        offset += size
+        for i in range(len(states)):
+            if bits >> i & 1:
+                states[i] = record.unpack_from(payload, offset)
+                offset += record.size
+        return offset
+    
+    def is_opaque(self, x, y):
+        # Static walls only, for drawing vision cones
+        if not (0 <= x < self.grid_width and 0 <= y < self.grid_height):
+            return True
+        return self.grid[y][x] == Tile.WALL
+
+class SpectatorClient:
+    # Non-blocking connection to a SpectatorServer feeding a SpectatorView
+    def __init__(self, address):
+        family, target = parse_address(address)
+        self.connection = socket.socket(family, socket.SOCK_STREAM)
+        self.connection.connect(target)
+        self.connection.setblocking(False)
+        self.view = SpectatorView()
+        self.bytes_received = 0
+        self.closed = False
+    
+    def poll(self):
+        # Applies whatever has arrived; returns the number of ticks applied
+        ticks = 0
+        while not self.closed:
+            try:
+                data = self.connection.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                data = b''
+            if not data:
+                self.closed = True
+                break
+            self.bytes_received += len(data)
+            ticks += self.view.feed(data)
+        return ticks
+    
+    def close(self):
+        self.connection.close()
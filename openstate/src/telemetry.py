@@ -0,0 +1,212 @@
+import os
+import json
+import struct
+import threading
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # Heatmaps fall back to flat arrays
+    np = None
+
+# One fixed-size record per event: kind, padding, guard index (or stars for
+# EXIT, level number for LEVEL_START), run, level tick, tile x, tile y.
+# A run is one layout played from its start: every LEVEL_START (the next level,
+# a restart, a regenerated maze) begins a new run, so heatmaps never mix layouts.
+RECORD = struct.Struct('<BxHIIhh')
+
+class Event:
+    LEVEL_START = 0  # guard = level number, x, y = grid width, height
+    PLAYER_TILE = 1  # Every tick
+    DETECTION = 2  # guard = index in level.guards, x, y = player tile
+    SCROLL = 3  # x, y = scroll tile
+    DEATH = 4  # x, y = player tile
+    EXIT = 5  # guard = stars, tick = time to exit
+
+# Events that are counted per tile
+HEATMAP_EVENTS = {Event.PLAYER_TILE: 'presence', Event.DETECTION: 'detections', Event.DEATH: 'deaths'}
+
+NO_GUARD = 0xFFFF
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([('kind', 'u1'), ('pad', 'u1'), ('guard', '<u2'), ('run', '<u4'),
+                             ('tick', '<u4'), ('x', '<i2'), ('y', '<i2')])
+
+class Telemetry:
+    """Gameplay event log that is cheap enough to leave on.
+    
+    Events are packed with struct.pack_into straight into a preallocated
+    bytearray used as a ring of fixed-size records, so recording allocates no
+    dicts, tuples or strings. A background thread appends the filled part of
+    the ring to a binary log (raw records, see RECORD) and adds it to per-level
+    heatmaps over the grid of each run: NumPy arrays if NumPy is installed,
+    flat arrays otherwise. If the flusher falls a whole ring behind, events are
+    dropped and counted instead of blocking the game.
+    """
+    
+    def __init__(self, path, capacity=1 << 16, flush_interval=0.5):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.buffer = bytearray(capacity * RECORD.size)
+        self.view = memoryview(self.buffer)
+        
+        # Records written and flushed so far; only the game thread moves head
+        # and only the flusher moves tail
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.run_id = 0
+        
+        # run -> {name: heatmap, 'size': (width, height), 'level': level number},
+        # run -> exit times in ticks, and run -> the grid it was played on
+        self.heatmaps = {}
+        self.exit_ticks = {}
+        self.layouts = {}
+        
+        self.file = None
+        self.thread = None
+        self.stop_event = threading.Event()
+    
+    def start(self):
+        # Appending to an existing log numbers runs after the records already in
+        # it, so run ids stay unique within the file
+        if os.path.isfile(self.path):
+            self.run_id = os.path.getsize(self.path) // RECORD.size
+        self.file = open(self.path, 'ab')
+        self.thread = threading.Thread(target=self.run, name='telemetry-flush', daemon=True)
+        self.thread.start()
+    
+    def record(self, kind, tick, x, y, guard=NO_GUARD):
+        # Called from the game loop; never blocks
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return
+        RECORD.pack_into(self.buffer, (head % self.capacity) * RECORD.size,
+                         kind, guard, self.run_id, tick, x, y)
+        self.head = head + 1
+    
+    def level_start(self, level):
+        self.run_id += 1
+        self.layouts[self.run_id] = [row[:] for row in level.grid]
+        self.record(Event.LEVEL_START, level.tick, level.grid_width, level.grid_height,
+                    min(level.level_number, 0xFFFF))
+    
+    def run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+    
+    def flush(self):
+        # Write and aggregate everything recorded since the last flush, as at
+        # most two contiguous spans of the ring
+        head = self.head
+        tail = self.tail
+        while tail < head:
+            start = tail % self.capacity
+            end = min(start + (head - tail), self.capacity)
+            span = self.view[start * RECORD.size:end * RECORD.size]
+            self.file.write(span)
+            self.aggregate(span)
+            tail += end - start
+        self.file.flush()
+        self.tail = tail
+    
+    def new_heatmaps(self, run, level_number, width, height):
+        heatmaps = {}
+        for name in HEATMAP_EVENTS.values():
+            if np is not None:
+                heatmaps[name] = np.zeros((height, width), np.uint32)
+            else:
+                heatmaps[name] = array('I', [0]) * (width * height)
+        heatmaps['size'] = (width, height)
+        heatmaps['level'] = level_number
+        self.heatmaps[run] = heatmaps
+        return heatmaps
+    
+    def aggregate(self, span):
+        if np is None:
+            for kind, guard, run, tick, x, y in RECORD.iter_unpack(span):
+                self.add_event(kind, guard, run, tick, x, y)
+            return
+        
+        records = np.frombuffer(span, RECORD_DTYPE)
+        kinds = records['kind']
+        
+        # Level starts and exits are rare, so handle them one by one in order
+        for kind, _, guard, run, tick, x, y in records[(kinds == Event.LEVEL_START) |
+                                                       (kinds == Event.EXIT)].tolist():
+            self.add_event(kind, guard, run, tick, x, y)
+        
+        for kind, name in HEATMAP_EVENTS.items():
+            selected = records[kinds == kind]
+            for run in np.unique(selected['run']).tolist():
+                heatmaps = self.heatmaps.get(run)
+                if heatmaps is None:
+                    continue
+                width, height = heatmaps['size']
+                events = selected[selected['run'] == run]
+                xs = events['x']
+                ys = events['y']
+                inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+                np.add.at(heatmaps[name], (ys[inside], xs[inside]), 1)
+    
+    def add_event(self, kind, guard, run, tick, x, y):
+        if kind == Event.LEVEL_START:
+            self.new_heatmaps(run, guard, x, y)
+        elif kind == Event.EXIT:
+            self.exit_ticks.setdefault(run, []).append(tick)
+        elif kind in HEATMAP_EVENTS and np is None:
+            heatmaps = self.heatmaps.get(run)
+            if heatmaps is not None:
+                width, height = heatmaps['size']
+                if 0 <= x < width and 0 <= y < height:
+                    heatmaps[HEATMAP_EVENTS[kind]][y * width + x] += 1
+    
+    def close(self, heatmap_path=None):
+        # Stop the flusher (it flushes one last time) and optionally save the heatmaps
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if heatmap_path:
+            self.save_heatmaps(heatmap_path)
+    
+    def save_heatmaps(self, path):
+        # .npz with one array per run and event (plus the run's level number and
+        # grid) if NumPy is available, else JSON with the same per-run entries
+        if np is not None and path.endswith('.npz'):
+            arrays = {}
+            for run, heatmaps in self.heatmaps.items():
+                arrays[f'run{run}_level'] = np.array(heatmaps['level'], np.uint16)
+                if run in self.layouts:
+                    arrays[f'run{run}_grid'] = np.array(self.layouts[run], np.uint8)
+                for name in HEATMAP_EVENTS.values():
+                    arrays[f'run{run}_{name}'] = heatmaps[name]
+            for run, ticks in self.exit_ticks.items():
+                arrays[f'run{run}_exit_ticks'] = np.array(ticks, np.uint32)
+            np.savez_compressed(path, **arrays)
+            return
+        
+        data = {'dropped': self.dropped, 'runs': {}}
+        for run, heatmaps in self.heatmaps.items():
+            width, height = heatmaps['size']
+            entry = {'level': heatmaps['level'], 'grid': self.layouts.get(run),
+                     'exit_ticks': self.exit_ticks.get(run, [])}
+            for name in HEATMAP_EVENTS.values():
+                cells = list(heatmaps[name].ravel()) if np is not None else list(heatmaps[name])
+                entry[name] = [[int(count) for count in cells[y * width:(y + 1) * width]] for y in range(height)]
+            data['runs'][str(run)] = entry
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+def read_events(path):
+    # Yields (kind, guard, run, tick, x, y) from a telemetry log
+    with open(path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % RECORD.size
+    yield from RECORD.iter_unpack(memoryview(data)[:usable])
@@ -0,0 +1,134 @@
+import sys
+import weakref
+
+import pygame
+
+try:
+    from pygame._sdl2.video import Window, Renderer, Texture
+except ImportError:  # Older pygame builds; the surface path is used instead
+    Window = None
+
+class TextureRenderer:
+    """Draws render snapshots with SDL's 2D renderer instead of Surface blits.
+    
+    Every image a snapshot refers to (tiles, sprites, guard cones) is
+    uploaded to a texture the first time it is drawn and then drawn with
+    renderer copies; textures are dropped along with their surfaces. A
+    level's tiles are uploaded as one background texture. The HUD, menus and
+    profiler overlay are still drawn by UI with surface calls, onto a
+    transparent layer that is only uploaded again when what it shows changes.
+    
+    software=True uses SDL's software renderer, which also works headless;
+    vsync=True makes present() wait for the display's refresh.
+    """
+    
+    def __init__(self, size, title, software=False, vsync=False):
+        self.size = size
+        self.window = Window(title, size)
+        self.renderer = Renderer(self.window, accelerated=0 if software else -1, vsync=vsync)
+        
+        # Surface -> Texture, and Level -> Texture of its tiles
+        self.textures = weakref.WeakKeyDictionary()
+        self.backgrounds = weakref.WeakKeyDictionary()
+        
+        # UI layer and what it was last drawn for
+        self.layer = pygame.Surface(size, pygame.SRCALPHA)
+        self.layer_texture = None
+        self.layer_key = None
+    
+    def texture(self, surface):
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = self.textures[surface] = Texture.from_surface(self.renderer, surface)
+        return texture
+    
+    def background(self, level):
+        texture = self.backgrounds.get(level)
+        if texture is None:
+            surface = pygame.Surface((level.width, level.height))
+            level.render_tiles(surface)
+            texture = self.backgrounds[level] = Texture.from_surface(self.renderer, surface)
+        return texture
+    
+    def draw_sprites(self, sprites):
+        texture = self.texture
+        for image, position in sprites:
+            texture(image).draw(dstrect=position)
+    
+    def draw_layer(self, game, snapshot):
+        from .game import GameState
+        state = snapshot.state
+        hud = snapshot.hud
+        
+        # The HUD shows whole seconds; the profiler overlay changes every frame
+        key = None
+        if not game.profiler.show_overlay:
+            key = (state, snapshot.game_over_reason, snapshot.sound_enabled)
+            if hud is not None:
+                key += (hud[:2], int(hud[2]), hud[3:])
+        
+        if key is None or key != self.layer_key:
+            layer = self.layer
+            layer.fill((0, 0, 0, 0))
+            if state == GameState.PLAYING or state == GameState.LEVEL_COMPLETE:
+                game.ui.render(layer, *hud)
+            elif state == GameState.GAME_OVER:
+                game.ui.render_game_over(layer, snapshot.game_over_reason)
+            elif state == GameState.MENU:
+                game.ui.render_menu(layer, snapshot.sound_enabled)
+            game.profiler.render_overlay(layer)
+            
+            if self.layer_texture is None:
+                self.layer_texture = Texture.from_surface(self.renderer, layer)
+            else:
+                self.layer_texture.update(layer)
+            self.layer_key = key
+        self.layer_texture.draw(dstrect=(0, 0))
+    
+    def render(self, game, snapshot=None):
+        # Same drawing order as Game.render
+        from .game import GameState
+        if snapshot is None:
+            snapshot = game.take_snapshot()
+        profiler = game.profiler if game.profiler.enabled else None
+        
+        renderer = self.renderer
+        renderer.draw_color = (0, 0, 0, 255)
+        renderer.clear()
+        
+        state = snapshot.state
+        if state == GameState.PLAYING or state == GameState.LEVEL_COMPLETE or state == GameState.GAME_OVER:
+            self.background(snapshot.level).draw(dstrect=(0, 0))
+            self.draw_sprites(snapshot.map_sprites)
+            if profiler:
+                profiler.mark('level_render')
+            
+            self.draw_sprites(snapshot.guard_sprites)
+            if profiler:
+                profiler.mark('guard_render')
+            
+            self.draw_sprites(snapshot.player_sprites)
+            if profiler:
+                profiler.mark('player_render')
+        
+        self.draw_layer(game, snapshot)
+        if profiler:
+            profiler.mark('ui')
+    
+    def present(self):
+        self.renderer.present()
+    
+    def to_surface(self):
+        # Copy of what was last drawn (slow; for tests and screenshots)
+        return self.renderer.to_surface()
+
+def create_texture_renderer(size, title, software=False, vsync=False):
+    # Returns None if the SDL renderer can't be used, so callers fall back to surfaces
+    if Window is None:
+        print("texture renderer needs pygame._sdl2, using surfaces", file=sys.stderr)
+        return None
+    try:
+        return TextureRenderer(size, title, software, vsync)
+    except pygame.error as error:
+        print(f"texture renderer unavailable ({error}), using surfaces", file=sys.stderr)
+        return None
@@ -4,3 +4,9 @@ class Tile:
     WALL = 1
     HIDE_SPOT = 2
     EXIT = 3
+
+# Kinds of interactables stored in a level's per-tile trigger index
+class Trigger:
+    SCROLL = 'scroll'
+    EXIT = 'exit'
+    HIDE_SPOT = 'hide_spot'
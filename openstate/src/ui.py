@@ -1,15 +1,15 @@
 import pygame
+from .assets import assets
 
 class UI:
     def __init__(self, screen_width, screen_height):
         self.screen_width = screen_width
         self.screen_height = screen_height
         
-        # Font setup
-        pygame.font.init()
-        self.font = pygame.font.SysFont('Arial', 24)
-        self.large_font = pygame.font.SysFont('Arial', 36)
-        self.small_font = pygame.font.SysFont('Arial', 18)
+        # Font setup (font files are resolved once and cached by the asset manager)
+        self.font = assets.font('Arial', 24)
+        self.large_font = assets.font('Arial', 36)
+        self.small_font = assets.font('Arial', 18)
         
         # Colors
         self.text_color = (255, 255, 255)
@@ -28,149 +28,184 @@ class UI:
             self.button_width, 
             self.button_height
         )
+        
+        # Menu and game over buttons
+        self.play_button_rect = pygame.Rect(
+            screen_width // 2 - self.button_width // 2,
+            screen_height // 2 - self.button_height // 2,
+            self.button_width,
+            self.button_height
+        )
+        self.menu_sound_button_rect = pygame.Rect(
+            screen_width // 2 - self.button_width // 2,
+            screen_height // 2 + 60,
+            self.button_width,
+            self.button_height
+        )
+        self.restart_button_rect = pygame.Rect(
+            screen_width // 2 - self.button_width - 10,
+            screen_height // 2 + 20,
+            self.button_width,
+            self.button_height
+        )
+        self.menu_button_rect = pygame.Rect(
+            screen_width // 2 + 10,
+            screen_height // 2 + 20,
+            self.button_width,
+            self.button_height
+        )
+        
+        # Semi-transparent overlays, filled once
+        self.hud_overlay = pygame.Surface((screen_width, 40), pygame.SRCALPHA)
+        self.hud_overlay.fill(self.bg_color)
+        self.complete_overlay = pygame.Surface((300, 100), pygame.SRCALPHA)
+        self.complete_overlay.fill((0, 0, 0, 200))  # More opaque black
+        self.game_over_overlay = pygame.Surface((screen_width, screen_height), pygame.SRCALPHA)
+        self.game_over_overlay.fill((0, 0, 0, 180))  # Semi-transparent black
+        
+        # Star outlines for the HUD, drawn once as a filled and an empty star
+        self.star_positions = [(screen_width - 120 + i*30, 0) for i in range(3)]
+        star_points = [
+            (15, 10),  # Top point
+            (20, 20),  # Right point
+            (30, 22),  # Bottom right
+            (22, 30),  # Bottom
+            (15, 25),  # Bottom left
+            (8, 30),   # Bottom
+            (0, 22),   # Bottom left
+            (10, 20),  # Left point
+        ]
+        self.star_images = []
+        for color in (self.star_color, self.empty_star_color):
+            star = pygame.Surface((31, 31), pygame.SRCALPHA)
+            pygame.draw.polygon(star, color, star_points)
+            self.star_images.append(star)
+        
+        # Rendered text per slot, with the value it shows: slot -> (value, surface)
+        self.labels = {}
+        
+        # The HUD as one blit list, rebuilt only when a value it shows changes
+        self.hud_shown = None
+        self.hud_blits = None
+    
+    def label(self, slot, value, text_format, font, color):
+        # Text is only rendered again when the value it shows changes
+        cached = self.labels.get(slot)
+        if cached is None or cached[0] != value:
+            cached = self.labels[slot] = (value, font.render(text_format.format(value), True, color))
+        return cached[1]
     
     def render(self, screen, level_number, scrolls_remaining, level_time, level_complete, stars, sound_enabled):
-        # Create a semi-transparent overlay for the UI
-        ui_overlay = pygame.Surface((self.screen_width, 40), pygame.SRCALPHA)
-        ui_overlay.fill(self.bg_color)
-        screen.blit(ui_overlay, (0, 0))
+        # Drawn in one blits() call that returns no rects, so an unchanged HUD
+        # allocates nothing
+        seconds = int(level_time)
+        shown = self.hud_shown
+        if (shown is None or shown[0] != level_number or shown[1] != scrolls_remaining or shown[2] != seconds or
+                shown[3] != level_complete or shown[4] != stars or shown[5] != sound_enabled):
+            self.hud_shown = (level_number, scrolls_remaining, seconds, level_complete, stars, sound_enabled)
+            self.hud_blits = self.build_hud(*self.hud_shown)
+        screen.blits(self.hud_blits, False)
+    
+    def build_hud(self, level_number, scrolls_remaining, seconds, level_complete, stars, sound_enabled):
+        # Semi-transparent overlay for the UI
+        blits = [(self.hud_overlay, (0, 0))]
         
         # Render level number
-        level_text = f"Level: {level_number}"
-        level_surface = self.font.render(level_text, True, self.text_color)
-        screen.blit(level_surface, (10, 10))
+        level_surface = self.label('level', level_number, "Level: {}", self.font, self.text_color)
+        blits.append((level_surface, (10, 10)))
         
         # Render scrolls remaining
-        scroll_text = f"Scrolls: {scrolls_remaining}"
-        scroll_surface = self.font.render(scroll_text, True, self.text_color)
-        screen.blit(scroll_surface, (150, 10))
+        scroll_surface = self.label('scrolls', scrolls_remaining, "Scrolls: {}", self.font, self.text_color)
+        blits.append((scroll_surface, (150, 10)))
         
         # Render timer
-        minutes = int(level_time) // 60
-        seconds = int(level_time) % 60
-        timer_text = f"Time: {minutes:02d}:{seconds:02d}"
-        timer_surface = self.font.render(timer_text, True, self.text_color)
-        screen.blit(timer_surface, (300, 10))
+        timer = divmod(seconds, 60)
+        timer_surface = self.label('timer', timer, "Time: {0[0]:02d}:{0[1]:02d}", self.font, self.text_color)
+        blits.append((timer_surface, (300, 10)))
         
         # Render stars
-        star_x = self.screen_width - 120
         for i in range(3):
-            color = self.star_color if i < stars else self.empty_star_color
-            pygame.draw.polygon(screen, color, [
-                (star_x + i*30 + 15, 10),  # Top point
-                (star_x + i*30 + 20, 20),  # Right point
-                (star_x + i*30 + 30, 22),  # Bottom right
-                (star_x + i*30 + 22, 30),  # Bottom
-                (star_x + i*30 + 15, 25),  # Bottom left
-                (star_x + i*30 + 8, 30),   # Bottom
-                (star_x + i*30 + 0, 22),   # Bottom left
-                (star_x + i*30 + 10, 20),  # Left point
-            ])
+            blits.append((self.star_images[0 if i < stars else 1], self.star_positions[i]))
         
         # Render sound status
-        sound_text = "Sound: ON" if sound_enabled else "Sound: OFF"
-        sound_surface = self.small_font.render(sound_text, True, self.text_color)
-        screen.blit(sound_surface, (self.screen_width - 100, 10))
+        sound_surface = self.label('sound', sound_enabled, "Sound: ON" if sound_enabled else "Sound: OFF",
+                                   self.small_font, self.text_color)
+        blits.append((sound_surface, (self.screen_width - 100, 10)))
         
         # Render level complete message
         if level_complete:
-            complete_overlay = pygame.Surface((300, 100), pygame.SRCALPHA)
-            complete_overlay.fill((0, 0, 0, 200))  # More opaque black
-            screen.blit(complete_overlay, (self.screen_width // 2 - 150, self.screen_height // 2 - 50))
+            blits.append((self.complete_overlay, (self.screen_width // 2 - 150, self.screen_height // 2 - 50)))
             
-            complete_text = "Level Complete!"
-            complete_surface = self.font.render(complete_text, True, self.text_color)
-            screen.blit(complete_surface, (self.screen_width // 2 - complete_surface.get_width() // 2, 
-                                          self.screen_height // 2 - 30))
+            complete_surface = self.label('complete', None, "Level Complete!", self.font, self.text_color)
+            blits.append((complete_surface, (self.screen_width // 2 - complete_surface.get_width() // 2, 
+                                             self.screen_height // 2 - 30)))
             
-            stars_text = f"Stars: {stars}/3"
-            stars_surface = self.font.render(stars_text, True, self.star_color)
-            screen.blit(stars_surface, (self.screen_width // 2 - stars_surface.get_width() // 2, 
-                                       self.screen_height // 2 + 10))
+            stars_surface = self.label('stars', stars, "Stars: {}/3", self.font, self.star_color)
+            blits.append((stars_surface, (self.screen_width // 2 - stars_surface.get_width() // 2, 
+                                          self.screen_height // 2 + 10)))
         
         # Render controls help at the bottom
-        controls_text = "Controls: W/A/S/D to move, Ctrl to hide"
-        controls_surface = self.small_font.render(controls_text, True, self.text_color)
-        screen.blit(controls_surface, (10, self.screen_height - 25))
+        controls_surface = self.label('controls', None, "Controls: W/A/S/D to move, Ctrl to hide",
+                                      self.small_font, self.text_color)
+        blits.append((controls_surface, (10, self.screen_height - 25)))
+        return blits
     
     def render_menu(self, screen, sound_enabled):
         # Fill screen with dark background
         screen.fill((20, 20, 40))
         
         # Title
-        title = self.large_font.render("OPENSTATE - NINJA STEALTH", True, (255, 255, 255))
+        title = self.label('title', None, "OPENSTATE - NINJA STEALTH", self.large_font, (255, 255, 255))
         screen.blit(title, (self.screen_width // 2 - title.get_width() // 2, 100))
         
         # Play button
-        play_button_rect = pygame.Rect(
-            self.screen_width // 2 - self.button_width // 2,
-            self.screen_height // 2 - self.button_height // 2,
-            self.button_width,
-            self.button_height
-        )
+        play_button_rect = self.play_button_rect
         pygame.draw.rect(screen, self.button_color, play_button_rect, border_radius=5)
-        play_text = self.font.render("PLAY", True, self.text_color)
+        play_text = self.label('play', None, "PLAY", self.font, self.text_color)
         screen.blit(play_text, (play_button_rect.centerx - play_text.get_width() // 2, 
                                play_button_rect.centery - play_text.get_height() // 2))
         
         # Sound toggle button
-        sound_button_rect = pygame.Rect(
-            self.screen_width // 2 - self.button_width // 2,
-            self.screen_height // 2 + 60,
-            self.button_width,
-            self.button_height
-        )
+        sound_button_rect = self.menu_sound_button_rect
         pygame.draw.rect(screen, self.button_color, sound_button_rect, border_radius=5)
-        sound_text = self.font.render("SOUND: " + ("ON" if sound_enabled else "OFF"), True, self.text_color)
+        sound_text = self.label('menu_sound', sound_enabled, "SOUND: ON" if sound_enabled else "SOUND: OFF",
+                                self.font, self.text_color)
         screen.blit(sound_text, (sound_button_rect.centerx - sound_text.get_width() // 2, 
                                 sound_button_rect.centery - sound_text.get_height() // 2))
         
         # Controls info
-        controls_text = "Controls: W/A/S/D to move, Ctrl to hide"
-        controls_surface = self.small_font.render(controls_text, True, self.text_color)
+        controls_surface = self.label('controls', None, "Controls: W/A/S/D to move, Ctrl to hide",
+                                      self.small_font, self.text_color)
         screen.blit(controls_surface, (self.screen_width // 2 - controls_surface.get_width() // 2, 
                                       self.screen_height - 50))
         
         return play_button_rect, sound_button_rect
     
     def render_game_over(self, screen, reason):
-        # Create a semi-transparent overlay
-        overlay = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))  # Semi-transparent black
-        screen.blit(overlay, (0, 0))
+        # Semi-transparent overlay
+        screen.blit(self.game_over_overlay, (0, 0))
         
         # Game over text
-        game_over_text = "GAME OVER"
-        game_over_surface = self.large_font.render(game_over_text, True, (255, 0, 0))
+        game_over_surface = self.label('game_over', None, "GAME OVER", self.large_font, (255, 0, 0))
         screen.blit(game_over_surface, (self.screen_width // 2 - game_over_surface.get_width() // 2, 
                                        self.screen_height // 2 - 100))
         
         # Reason text
-        reason_surface = self.font.render(reason, True, self.text_color)
+        reason_surface = self.label('reason', reason, "{}", self.font, self.text_color)
         screen.blit(reason_surface, (self.screen_width // 2 - reason_surface.get_width() // 2, 
                                     self.screen_height // 2 - 40))
         
         # Restart button
-        restart_button_rect = pygame.Rect(
-            self.screen_width // 2 - self.button_width - 10,
-            self.screen_height // 2 + 20,
-            self.button_width,
-            self.button_height
-        )
+        restart_button_rect = self.restart_button_rect
         pygame.draw.rect(screen, self.button_color, restart_button_rect, border_radius=5)
-        restart_text = self.font.render("RESTART", True, self.text_color)
+        restart_text = self.label('restart', None, "RESTART", self.font, self.text_color)
         screen.blit(restart_text, (restart_button_rect.centerx - restart_text.get_width() // 2, 
                                   restart_button_rect.centery - restart_text.get_height() // 2))
         
         # Menu button
-        menu_button_rect = pygame.Rect(
-            self.screen_width // 2 + 10,
-            self.screen_height // 2 + 20,
-            self.button_width,
-            self.button_height
-        )
+        menu_button_rect = self.menu_button_rect
         pygame.draw.rect(screen, self.button_color, menu_button_rect, border_radius=5)
-        menu_text = self.font.render("MENU", True, self.text_color)
+        menu_text = self.label('menu', None, "MENU", self.font, self.text_color)
         screen.blit(menu_text, (menu_button_rect.centerx - menu_text.get_width() // 2, 
                                menu_button_rect.centery - menu_text.get_height() // 2))
         
@@ -0,0 +1,102 @@
+import math
+
+# Transforms from octant-local (dx, dy) to grid offsets for the 8 octants
+OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+def shadowcast(is_opaque, origin_x, origin_y, radius):
+    """Recursive shadowcasting: all tiles visible from the origin tile.
+    
+    is_opaque(x, y) must return True for walls and for tiles outside the map.
+    radius is in tiles and may be fractional; distance is measured between
+    tile centers.
+    """
+    visible = {(origin_x, origin_y)}
+    max_row = int(math.ceil(radius))
+    radius_sq = radius * radius
+    for xx, xy, yx, yy in OCTANTS:
+        cast_light(is_opaque, visible, origin_x, origin_y, 1, 1.0, 0.0, max_row, radius_sq, xx, xy, yx, yy)
+    return visible
+
+def cast_light(is_opaque, visible, cx, cy, row, start, end, max_row, radius_sq, xx, xy, yx, yy):
+    if start < end:
+        return
+    
+    new_start = start
+    for j in range(row, max_row + 1):
+        dx = -j - 1
+        dy = -j
+        blocked = False
+        while dx <= 0:
+            dx += 1
+            x = cx + dx * xx + dy * xy
+            y = cy + dx * yx + dy * yy
+            left_slope = (dx - 0.5) / (dy + 0.5)
+            right_slope = (dx + 0.5) / (dy - 0.5)
+            if start < right_slope:
+                continue
+            if end > left_slope:
+                break
+            
+            if dx * dx + dy * dy <= radius_sq:
+                visible.add((x, y))
+            
+            if blocked:
+                # Scanning a run of opaque tiles
+                if is_opaque(x, y):
+                    new_start = right_slope
+                    continue
+                blocked = False
+                start = new_start
+            elif is_opaque(x, y) and j < max_row:
+                # Start of an opaque run: scan the lit part beyond it as a child
+                blocked = True
+                cast_light(is_opaque, visible, cx, cy, j + 1, start, left_slope,
+                           max_row, radius_sq, xx, xy, yx, yy)
+                new_start = right_slope
+        if blocked:
+            break
+
+def vision_cone(is_opaque, origin_x, origin_y, direction, vision_range, vision_angle, tile_size):
+    """Tiles a guard on the origin tile can see, limited to its range and cone.
+    
+    direction and vision_angle are in degrees (clockwise from right, like
+    Guard.direction); vision_range is in pixels.
+    """
+    half_angle = vision_angle / 2
+    cone = set()
+    for x, y in shadowcast(is_opaque, origin_x, origin_y, vision_range / tile_size):
+        dx = x - origin_x
+        dy = y - origin_y
+        if dx == 0 and dy == 0:
+            cone.add((x, y))
+            continue
+        angle = math.degrees(math.atan2(dy, dx)) % 360
+        angle_diff = abs((angle - direction) % 360)
+        if angle_diff <= half_angle or angle_diff >= 360 - half_angle:
+            cone.add((x, y))
+    return frozenset(cone)
+
+def cone_polygon(is_opaque, center, direction, vision_range, vision_angle, tile_size, rays=16, step=4):
+    """Outline of the vision cone, cut off where rays hit an opaque tile.
+    
+    Returns points relative to center, starting with (0, 0).
+    """
+    points = [(0, 0)]
+    start_angle = direction - vision_angle / 2
+    for i in range(rays + 1):
+        angle = math.radians(start_angle + vision_angle * i / rays)
+        cos_a = math.cos(angle)
+        sin_a = math.sin(angle)
+        distance = 0
+        while distance < vision_range:
+            next_distance = min(vision_range, distance + step)
+            px = center[0] + cos_a * next_distance
+            py = center[1] + sin_a * next_distance
+            if is_opaque(int(px // tile_size), int(py // tile_size)):
+                break
+            distance = next_distance
+        points.append((cos_a * distance, sin_a * distance))
+    return points
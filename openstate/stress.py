@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Scalability stress scenarios.
+
+Builds levels past the normal difficulty caps (grid size, guards, moving walls,
+scrolls), runs them headless and reports tick time and memory as curves, so we
+can see which subsystem stops scaling linearly first.
+
+Examples:
+    python stress.py                                  # sweep every parameter
+    python stress.py --sweep guards --values 1,4,16,64
+    python stress.py --output curves.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tracemalloc
+
+# Run without a window or audio device
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from src.game import Game, GameState
+from src.level import Level
+from src.player import Player
+
+# Scenario used as the starting point of every sweep
+BASE_SCENARIO = {
+    'grid': 25,         # Grid width in tiles (height keeps the 4:3 screen ratio)
+    'guards': 3,
+    'walls': 5,
+    'scrolls': 5,
+}
+
+# Default values swept for each parameter (entity counts must fit in the
+# free cells of the base grid, since placements never overlap)
+DEFAULT_SWEEPS = {
+    'grid': [25, 50, 100, 200],
+    'guards': [1, 4, 16, 64],
+    'walls': [1, 5, 20, 80],
+    'scrolls': [5, 20, 80, 160],
+}
+
+# Subsystems reported per tick (phase names from the frame profiler)
+SUBSYSTEMS = ('player', 'moving_walls', 'guards', 'detection', 'scrolls',
+              'level_render', 'guard_render', 'ui')
+
+# Local slope on a log-log curve above which a subsystem counts as superlinear
+SUPERLINEAR_SLOPE = 1.2
+
+# Ignore subsystems that are too cheap for their slope to mean anything
+MIN_SIGNIFICANT_MS = 0.02
+
+def build_stress_level(grid, guards, walls, scrolls, level_number=10, seed=0):
+    random.seed(seed)
+    grid_width = grid
+    grid_height = max(9, grid * 3 // 4)
+    return Level(level_number, grid_width * 32, grid_height * 32,
+                 num_guards=guards, num_moving_walls=walls, num_scrolls=scrolls)
+
+def run_scenario(scenario, ticks, seed):
+    # Level construction time and memory
+    tracemalloc.start()
+    start = time.perf_counter()
+    level = build_stress_level(seed=seed, **scenario)
+    build_ms = (time.perf_counter() - start) * 1000.0
+    level_bytes, build_peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    # Drive the real Game loop on an offscreen surface of the same size
+    screen = pygame.Surface((level.width, level.height))
+    game = Game(screen, GameState.MENU)
+    game.load_sounds()
+    game.level = level
+    game.player = Player(level.player_start_pos)
+    game.state = GameState.PLAYING
+    profiler = game.profiler
+    profiler.enabled = True
+    
+    def tick():
+        profiler.begin_frame()
+        game.update()
+        game.render()
+        profiler.end_frame()
+        
+        # Captures would end the run early; keep playing so every tick does the same work
+        game.state = GameState.PLAYING
+    
+    # Timed ticks run untraced since tracemalloc slows allocation-heavy code a lot
+    for _ in range(ticks):
+        tick()
+    tick_ms = sum(profiler.frame_samples) / len(profiler.frame_samples)
+    subsystem_ms = {s: sum(profiler.samples[s]) / len(profiler.samples[s]) for s in SUBSYSTEMS}
+    
+    # A few extra traced ticks for the per-tick memory high-water mark
+    tracemalloc.start()
+    for _ in range(min(ticks, 10)):
+        tick()
+    _, tick_peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    result = {
+        'build_ms': build_ms,
+        'level_kb': level_bytes / 1024.0,
+        'build_peak_kb': build_peak_bytes / 1024.0,
+        'tick_peak_kb': tick_peak_bytes / 1024.0,
+        'tick_ms': tick_ms,
+        'actual': {
+            'tiles': level.grid_width * level.grid_height,
+            'guards': len(level.guards),
+            'walls': len(level.moving_walls),
+            'scrolls': len(level.scrolls),
+        },
+    }
+    for subsystem in SUBSYSTEMS:
+        result[subsystem + '_ms'] = subsystem_ms[subsystem]
+    return result
+
+def sweep_x(parameter, point):
+    # The independent variable of a curve is what was actually built, not what was asked for
+    if parameter == 'grid':
+        return point['actual']['tiles']
+    return point['actual'][parameter]
+
+def local_slopes(xs, ys):
+    # Slope between consecutive points on a log-log scale (1.0 = linear)
+    slopes = []
+    for i in range(1, len(xs)):
+        if xs[i] <= xs[i - 1] or ys[i] <= 0 or ys[i - 1] <= 0:
+            slopes.append(None)
+            continue
+        slopes.append(math.log(ys[i] / ys[i - 1]) / math.log(xs[i] / xs[i - 1]))
+    return slopes
+
+def analyze(parameter, points):
+    xs = [sweep_x(parameter, point) for point in points]
+    curves = {}
+    first = None
+    for subsystem in SUBSYSTEMS + ('build',):
+        key = subsystem + '_ms'
+        ys = [point[key] for point in points]
+        slopes = local_slopes(xs, ys)
+        curves[subsystem] = slopes
+        
+        # Earliest sweep step where this subsystem grows faster than linearly
+        for i, slope in enumerate(slopes):
+            if slope is not None and slope > SUPERLINEAR_SLOPE and ys[i + 1] >= MIN_SIGNIFICANT_MS:
+                if first is None or i < first[1] or (i == first[1] and slope > first[2]):
+                    first = (subsystem, i, slope)
+                break
+    return xs, curves, first
+
+def print_sweep(parameter, values, points, xs, curves, first):
+    print(f'\n=== sweep: {parameter} ===')
+    columns = ['value', 'x', 'tick_ms', 'build_ms', 'level_kb', 'tick_peak_kb'] + [s + '_ms' for s in SUBSYSTEMS]
+    print(' '.join(f'{c:>14}' for c in columns))
+    for value, x, point in zip(values, xs, points):
+        row = [value, x] + [point[c] for c in columns[2:]]
+        print(' '.join(f'{v:>14.3f}' if isinstance(v, float) else f'{v:>14}' for v in row))
+    
+    print('log-log slope between consecutive points (1.0 = linear):')
+    for subsystem, slopes in curves.items():
+        text = ' '.join('     -' if s is None else f'{s:6.2f}' for s in slopes)
+        print(f'  {subsystem:<14} {text}')
+    
+    if first:
+        subsystem, step, slope = first
+        print(f'first superlinear: {subsystem} (slope {slope:.2f} between '
+              f'{parameter}={values[step]} and {parameter}={values[step + 1]})')
+    else:
+        print('first superlinear: none')
+    
+    # Also name the steepest significant curve so there is always a next suspect
+    steepest = None
+    for subsystem, slopes in curves.items():
+        key = subsystem + '_ms'
+        for i, slope in enumerate(slopes):
+            if slope is not None and points[i + 1][key] >= MIN_SIGNIFICANT_MS:
+                if steepest is None or slope > steepest[1]:
+                    steepest = (subsystem, slope)
+    if steepest:
+        print(f'steepest: {steepest[0]} (slope {steepest[1]:.2f})')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Openstate scalability stress scenarios")
+    parser.add_argument('--sweep', action='append', choices=list(DEFAULT_SWEEPS),
+                        help="parameter to sweep (can be repeated, default: all)")
+    parser.add_argument('--values', help="comma-separated values for a single --sweep")
+    parser.add_argument('--ticks', type=int, default=120, help="ticks simulated per scenario (default: 120)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for level generation")
+    parser.add_argument('--output', metavar='PATH', help="write the curves as JSON to PATH")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    sweeps = args.sweep or list(DEFAULT_SWEEPS)
+    if args.values and len(sweeps) != 1:
+        sys.exit("--values needs exactly one --sweep")
+    
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    
+    report = {'base': BASE_SCENARIO, 'ticks': args.ticks, 'seed': args.seed, 'sweeps': {}}
+    for parameter in sweeps:
+        values = [int(v) for v in args.values.split(',')] if args.values else DEFAULT_SWEEPS[parameter]
+        points = []
+        for value in values:
+            scenario = dict(BASE_SCENARIO)
+            scenario[parameter] = value
+            points.append(run_scenario(scenario, args.ticks, args.seed))
+        
+        xs, curves, first = analyze(parameter, points)
+        print_sweep(parameter, values, points, xs, curves, first)
+        report['sweeps'][parameter] = {
+            'values': values,
+            'x': xs,
+            'points': points,
+            'slopes': curves,
+            'first_superlinear': first[0] if first else None,
+        }
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import random
+
+import pygame
+
+import benchmark
+from src.level import Level
+from src.simulation import BlendedSnapshot, RenderSnapshot
+
+def test_frame_phases_stay_within_allocation_budgets():
+    # The same scripted frames as benchmark.py --alloc-check
+    pygame.init()
+    pygame.display.set_mode((800, 600))
+    tracker = benchmark.measure_allocations(frames=240, warmup=120)
+    assert set(tracker.PHASES) == set(benchmark.ALLOCATION_BUDGETS)
+    assert benchmark.check_allocations(tracker, benchmark.ALLOCATION_BUDGETS) == []
+    
+    # Nothing should pile up from frame to frame either
+    assert sum(tracker.retained) / len(tracker.retained) < 64
+
+def test_sprite_lists_are_reused_and_snapshots_keep_their_copy():
+    random.seed(3)
+    level = Level(4, 800, 600)
+    guards = level.guard_sprites()
+    copy = tuple(guards)
+    for _ in range(30):
+        level.update_moving_elements()
+        for guard in level.guards:
+            guard.update(level)
+    
+    # Same list objects, refilled in place; the earlier copy is untouched
+    assert level.guard_sprites() is guards
+    assert level.map_sprites() is level.map_sprites()
+    assert list(copy) != guards
+    assert all(len(sprite) == 2 for sprite in copy)
+
+def test_blending_reuses_its_buffers_and_leaves_snapshots_alone():
+    level = object()
+    image = object()
+    previous = RenderSnapshot('playing', level, ((image, (0, 0)), (image, (300, 40))), (), ((image, (10, 10)),),
+                              None, None, True)
+    current = previous._replace(map_sprites=((image, (10, 0)), (image, (300, 500))))
+    blended = BlendedSnapshot()
+    drawn = blended.interpolate(previous, current, 0.5)
+    slots = drawn.map_sprites
+    assert slots == [[image, [5, 0]], [image, [300, 500]]]
+    assert drawn.player_sprites == [[image, [10, 10]]]
+    assert drawn.state == 'playing' and drawn.sound_enabled
+    
+    # The next frame overwrites the same slots; the snapshots never change
+    assert blended.interpolate(previous, current, 0.25).map_sprites is slots
+    assert slots[0][1] == [2, 0]
+    assert current.map_sprites == ((image, (10, 0)), (image, (300, 500)))
+    assert blended.interpolate(previous, current, 1.0) is current
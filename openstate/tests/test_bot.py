@@ -0,0 +1,45 @@
+import random
+
+from src.level import Level
+from src.bot import PlaytestBot
+
+def test_search_tries_every_scroll_order():
+    # Collecting the scrolls in the order they are first reached strands the
+    # bot here; a different order gets out
+    random.seed(81)
+    bot = PlaytestBot(Level(2, 800, 600))
+    moves = bot.plan()
+    assert moves is not None, bot.failure
+    result = bot.play(moves)
+    assert result['completed'] and result['stars'] == 3
+    assert result['deviations'] == []
+
+def test_replay_plans_again_when_a_guard_reacts():
+    # Make crouched steps as loud as walking, which the plan doesn't expect
+    random.seed(0)
+    level = Level(1, 800, 600)
+    level.noise.crouch_loudness = level.noise.walk_loudness
+    heard = []
+    guard = level.guards[0]
+    listen = guard.listen
+    def record_listen(level):
+        if listen(level):
+            heard.append(level.tick)
+            return True
+        return False
+    guard.listen = record_listen
+    
+    result = PlaytestBot(level).run()
+    assert result['deviations'][0] == {'tick': heard[0], 'reason': "guard 0 heard a footstep"}
+    assert result['completed'], result
+
+def test_failure_counts_unreachable_scrolls():
+    random.seed(81)
+    level = Level(2, 800, 600)
+    
+    # Wall the start in: no scroll can be reached
+    x, y = level.player_start_tile
+    bot = PlaytestBot(level)
+    bot.passable &= ~bot.dilate(1 << bot.index(x, y)) | 1 << bot.index(x, y)
+    assert bot.plan() is None
+    assert bot.failure.startswith("no safe route to {0} of {0} scrolls".format(len(level.scrolls)))
@@ -0,0 +1,67 @@
+import random
+from types import SimpleNamespace
+
+import pygame
+
+from src.colliders import merge_wall_rects
+from src.level import Level
+from src.player import Player
+from src.tile import Tile
+
+def covered_tiles(rects, tile_size):
+    # Every tile covered by the rects, failing on overlaps
+    tiles = set()
+    for rect in rects:
+        assert rect.x % tile_size == 0 and rect.y % tile_size == 0
+        for y in range(rect.top // tile_size, rect.bottom // tile_size):
+            for x in range(rect.left // tile_size, rect.right // tile_size):
+                assert (x, y) not in tiles
+                tiles.add((x, y))
+    return tiles
+
+def wall_tiles(grid):
+    return {(x, y) for y, row in enumerate(grid) for x, tile in enumerate(row) if tile == Tile.WALL}
+
+def test_rects_cover_exactly_the_wall_tiles():
+    rng = random.Random(39)
+    grids = [[[Tile.WALL if rng.random() < density else Tile.EMPTY for _ in range(17)] for _ in range(11)]
+             for density in (0.0, 0.3, 0.7, 1.0)]
+    for seed in range(5):
+        random.seed(seed)
+        grids.append(Level(1 + seed, 800, 600).grid)
+    for grid in grids:
+        rects = merge_wall_rects(grid, 32)
+        assert covered_tiles(rects, 32) == wall_tiles(grid)
+    
+    # A full grid is one rect
+    assert len(merge_wall_rects(grids[3], 32)) == 1
+
+def test_generated_levels_need_fewer_colliders():
+    for seed in range(5):
+        random.seed(seed)
+        level = Level(5, 800, 600)
+        assert len(level.static_walls) * 3 < len(wall_tiles(level.grid))
+        assert level.walls[:len(level.static_walls)] == level.static_walls
+        assert level.walls[len(level.static_walls):] == [wall.rect for wall in level.moving_walls]
+
+def test_collision_matches_per_tile_rects():
+    random.seed(3)
+    level = Level(6, 800, 600)
+    tile_size = level.tile_size
+    per_tile = SimpleNamespace(
+        walls=[pygame.Rect(x * tile_size, y * tile_size, tile_size, tile_size)
+               for x, y in sorted(wall_tiles(level.grid))] + [wall.rect for wall in level.moving_walls],
+        width=level.width, height=level.height)
+    merged = Player(level.player_start_pos)
+    tiles = Player(level.player_start_pos)
+    
+    rng = random.Random(4)
+    for tick in range(5000):
+        if tick % 20 == 0:
+            velocity = (rng.choice((-1, 0, 1)) * merged.speed, rng.choice((-1, 0, 1)) * merged.speed)
+        level.update_moving_elements()
+        for player, walls in ((merged, level), (tiles, per_tile)):
+            player.vel_x, player.vel_y = velocity
+            player.move_with_collision(walls)
+        assert merged.rect == tiles.rect
+        assert (merged.x, merged.y) == (tiles.x, tiles.y)
@@ -0,0 +1,100 @@
+import random
+from collections import deque
+
+from src.corridor_graph import CorridorGraph, NO_EDGE
+from src.guard import Guard
+from src.level import Level
+from src.tile import Tile
+
+def bfs_distances(grid, source):
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if (0 <= ny < len(grid) and 0 <= nx < len(grid[0]) and grid[ny][nx] != Tile.WALL and
+                    (nx, ny) not in distances):
+                distances[(nx, ny)] = distances[(x, y)] + 1
+                queue.append((nx, ny))
+    return distances
+
+def assert_walk(grid, path, start, goal):
+    assert path[0] == start and path[-1] == goal
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        assert abs(x1 - x0) + abs(y1 - y0) == 1
+        assert grid[y1][x1] != Tile.WALL
+
+def test_every_passable_tile_is_a_node_or_on_one_corridor():
+    for seed in range(5):
+        random.seed(seed)
+        level = Level(1 + seed, 800, 600)
+        graph = level.get_corridor_graph()
+        for i in range(graph.width * graph.height):
+            if graph.passable[i]:
+                assert (graph.node_of[i] >= 0) != (graph.edge_of[i] != NO_EDGE)
+            else:
+                assert graph.node_of[i] < 0 and graph.edge_of[i] == NO_EDGE
+        for edge, (a, b, tiles) in enumerate(graph.edges):
+            for offset, i in enumerate(tiles):
+                assert (graph.edge_of[i], graph.offset_of[i]) == (edge, offset)
+
+def test_paths_are_shortest():
+    rng = random.Random(47)
+    for seed in range(8):
+        random.seed(seed)
+        level = Level(1 + seed, 800, 600)
+        graph = level.get_corridor_graph()
+        free = [(x, y) for y in range(level.grid_height) for x in range(level.grid_width)
+                if level.grid[y][x] != Tile.WALL]
+        for _ in range(40):
+            start = rng.choice(free)
+            distances = bfs_distances(level.grid, start)
+            goal = rng.choice(free)
+            path = graph.find_path(start, goal)
+            if goal not in distances:
+                assert path == []
+                continue
+            assert len(path) == distances[goal] + 1
+            assert_walk(level.grid, path, start, goal)
+
+def test_loops_walls_and_unreachable_goals():
+    rows = [
+        '#######',
+        '#.....#',
+        '#.###.#',
+        '#.....#',
+        '#######',
+        '#..#..#',
+        '#######',
+    ]
+    grid = [[Tile.WALL if c == '#' else Tile.EMPTY for c in row] for row in rows]
+    graph = CorridorGraph(grid)
+    
+    # The ring has no junction, so one of its tiles stands in for one
+    assert len(graph.nodes) >= 1
+    path = graph.find_path((1, 1), (5, 3))
+    assert len(path) == 7
+    assert_walk(grid, path, (1, 1), (5, 3))
+    assert graph.find_path((2, 1), (2, 1)) == [(2, 1)]
+    assert graph.find_path((1, 1), (0, 0)) == []
+    assert graph.find_path((1, 1), (4, 5)) == []
+    assert graph.find_path((1, 5), (2, 5)) == [(1, 5), (2, 5)]
+
+def test_guard_follows_corridors_around_walls():
+    random.seed(5)
+    level = Level(4, 800, 600)
+    tile_size = level.tile_size
+    start = level.analysis.start_tile
+    goal = level.analysis.exit_tile
+    guard = Guard((start[0] * tile_size + 4, start[1] * tile_size + 4), [(0, 0)])
+    
+    steps = level.analysis.exit_path_length
+    for _ in range(int(steps * tile_size / guard.speed) + 100):
+        guard.follow_path(goal, level, guard.speed)
+        guard.rect.x = int(guard.x)
+        guard.rect.y = int(guard.y)
+        center = (guard.rect.centerx // tile_size, guard.rect.centery // tile_size)
+        assert level.grid[center[1]][center[0]] != Tile.WALL
+        if center == goal:
+            break
+    assert center == goal
@@ -0,0 +1,69 @@
+import random
+from collections import Counter
+
+from src.free_cells import FreeCellIndex
+from src.level import Level
+from src.tile import Tile
+
+def make_grid(width, height, seed):
+    rng = random.Random(seed)
+    return [[Tile.WALL if rng.random() < 0.4 else Tile.EMPTY for _ in range(width)] for _ in range(height)]
+
+def test_sample_hands_out_each_free_cell_once():
+    grid = make_grid(20, 15, 1)
+    index = FreeCellIndex(grid)
+    inside = {(x, y) for y in range(3, 10) for x in range(4, 16) if grid[y][x] == Tile.EMPTY}
+    
+    random.seed(1)
+    seen = set()
+    while True:
+        cell = index.sample(4, 3, 15, 9)
+        if cell is None:
+            break
+        assert cell in inside
+        assert cell not in seen
+        seen.add(cell)
+    assert seen == inside
+    assert index.count == sum(row.count(Tile.EMPTY) for row in grid) - len(inside)
+
+def test_sample_keeps_min_distance_when_crowded():
+    grid = make_grid(20, 15, 2)
+    index = FreeCellIndex(grid)
+    avoid = [(10, 7), (3, 3)]
+    random.seed(2)
+    picked = []
+    while True:
+        # A radius that rules out most of the map, so the enumeration fallback runs
+        cell = index.sample(0, 0, 19, 14, avoid=avoid, min_distance=9)
+        if cell is None:
+            break
+        picked.append(cell)
+    expected = {(x, y) for y in range(15) for x in range(20) if grid[y][x] == Tile.EMPTY and
+                all(abs(x - ax) + abs(y - ay) >= 9 for ax, ay in avoid)}
+    assert set(picked) == expected
+    assert len(picked) == len(expected)
+
+def test_sample_is_uniform():
+    grid = make_grid(12, 8, 3)
+    index = FreeCellIndex(grid)
+    random.seed(3)
+    draws = 20000
+    counts = Counter(index.sample(0, 0, 11, 7, claim=False) for _ in range(draws))
+    expected = draws / index.count
+    assert len(counts) == index.count
+    assert all(abs(count - expected) < expected * 0.35 for count in counts.values())
+
+def test_levels_place_entities_on_distinct_free_cells():
+    for seed in range(20):
+        random.seed(seed)
+        level = Level(1 + seed % 10, 800, 600)
+        data = level.to_data()
+        cells = [tuple(data['player_start']), tuple(data['exit'])]
+        cells += [tuple(cell) for cell in data['scrolls']]
+        cells += [tuple(wall['start']) for wall in data['moving_walls']]
+        guards = [tuple(guard['patrol'][0]) for guard in data['guards']]
+        cells += guards
+        assert len(set(cells)) == len(cells)
+        assert all(level.grid[y][x] != Tile.WALL for x, y in cells)
+        start_x, start_y = level.player_start_tile
+        assert all(abs(x - start_x) + abs(y - start_y) > 5 for x, y in guards)
@@ -0,0 +1,137 @@
+import random
+from collections import deque
+from types import SimpleNamespace
+
+import pygame
+
+from src.level import Level, MovingWall
+from src.level_analysis import LevelAnalysis, UNREACHABLE
+from src.tile import Tile
+
+def track_tiles(wall, tile_size=32):
+    # Every tile the wall's rect touches over one period, tick by tick
+    tiles = set()
+    for tick in range(int(wall.period) + 2):
+        rect = wall.rect_at(tick)
+        for y in range(rect.top // tile_size, (rect.bottom - 1) // tile_size + 1):
+            for x in range(rect.left // tile_size, (rect.right - 1) // tile_size + 1):
+                tiles.add((x, y))
+    return tiles
+
+def reference_distances(grid, source, moving_walls=(), exit=None):
+    # Plain dict BFS over the grid, never stepping between two tiles of one wall's
+    # track and never walking on from the exit
+    tracks = [track_tiles(wall) for wall in moving_walls]
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        x, y = queue.popleft()
+        if (x, y) == exit != source:
+            continue
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if any((x, y) in tiles and (nx, ny) in tiles for tiles in tracks):
+                continue
+            if (0 <= ny < len(grid) and 0 <= nx < len(grid[0]) and grid[ny][nx] != Tile.WALL and
+                    (nx, ny) not in distances):
+                distances[(nx, ny)] = distances[(x, y)] + 1
+                queue.append((nx, ny))
+    return distances
+
+def fake_level(rows, start, exit, scrolls=(), moving_walls=()):
+    # rows use '#' for walls; tiles are 32 pixels like in the game
+    grid = [[Tile.WALL if c == '#' else Tile.EMPTY for c in row] for row in rows]
+    return SimpleNamespace(
+        grid=grid, grid_width=len(grid[0]), grid_height=len(grid), tile_size=32,
+        player_start_pos=(start[0] * 32 + 4, start[1] * 32 + 4),
+        exit_rect=pygame.Rect(exit[0] * 32, exit[1] * 32, 32, 32),
+        scrolls=[SimpleNamespace(rect=pygame.Rect(x * 32 + 8, y * 32 + 8, 16, 16)) for x, y in scrolls],
+        moving_walls=[MovingWall((x0 * 32, y0 * 32), (x1 * 32, y1 * 32)) for (x0, y0), (x1, y1) in moving_walls],
+    )
+
+ROWS = [
+    '#########',
+    '#...#...#',
+    '#.#.#.#.#',
+    '#.#...#.#',
+    '#########',
+    '#.......#',
+    '#########',
+]
+
+def test_distance_fields_match_bfs():
+    for seed in range(10):
+        random.seed(seed)
+        level = Level(1 + seed, 800, 600)
+        analysis = level.analysis
+        for field, source in ((analysis.start_distance, analysis.start_tile),
+                              (analysis.exit_distance, analysis.exit_tile)):
+            expected = reference_distances(level.grid, source, level.moving_walls, analysis.exit_tile)
+            for y in range(level.grid_height):
+                for x in range(level.grid_width):
+                    assert field[analysis.index(x, y)] == expected.get((x, y), UNREACHABLE)
+
+def test_components_and_solvability():
+    analysis = LevelAnalysis(fake_level(ROWS, (1, 1), (7, 1), scrolls=[(3, 3)]))
+    assert analysis.solvable
+    assert analysis.exit_path_length == 10
+    assert analysis.scroll_path_lengths == [4]
+    assert analysis.scroll_to_exit_lengths == [6]
+    assert analysis.component_sizes == [13, 2, 7]
+    assert analysis.component_of(1, 5) != analysis.component_of(1, 1)
+    assert not analysis.is_reachable(4, 5)
+    
+    # A scroll or an exit in the sealed corridor makes the level unsolvable
+    assert not LevelAnalysis(fake_level(ROWS, (1, 1), (7, 1), scrolls=[(3, 5)])).solvable
+    assert not LevelAnalysis(fake_level(ROWS, (1, 1), (7, 5))).solvable
+    
+    # So does a scroll in the dead end behind the exit, since the level ends on the exit
+    behind = LevelAnalysis(fake_level(ROWS, (1, 1), (7, 1), scrolls=[(7, 3)]))
+    assert not behind.solvable
+    assert not behind.is_reachable(7, 3)
+    assert behind.scroll_to_exit_lengths == [2]
+
+BRIDGE = [
+    '###########',
+    '#...#.#...#',
+    '#.........#',
+    '#...#.#...#',
+    '###########',
+]
+
+def test_wall_sliding_along_a_corridor_blocks_it():
+    # The only way between the rooms is the bridge on row 2
+    assert LevelAnalysis(fake_level(BRIDGE, (1, 1), (9, 3))).solvable
+    
+    # A wall sliding along the bridge is always somewhere on it
+    blocked = LevelAnalysis(fake_level(BRIDGE, (1, 1), (9, 3), moving_walls=[((4, 2), (6, 2))]))
+    assert not blocked.solvable
+    assert not blocked.is_reachable(9, 3)
+    assert blocked.is_reachable(4, 2) and blocked.is_reachable(1, 3)
+    
+    # One sliding across it only blocks the crossing part of the time
+    crossing = LevelAnalysis(fake_level(BRIDGE, (1, 1), (9, 3), moving_walls=[((5, 1), (5, 3))]))
+    assert crossing.solvable
+    assert crossing.exit_path_length == 10
+
+
+def test_path_to_exit_is_a_shortest_walk():
+    analysis = LevelAnalysis(fake_level(ROWS, (1, 1), (7, 1)))
+    path = analysis.path_to_exit()
+    assert path[0] == (1, 1) and path[-1] == (7, 1)
+    assert len(path) == analysis.exit_path_length + 1
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        assert abs(x1 - x0) + abs(y1 - y0) == 1
+        assert ROWS[y1][x1] != '#'
+
+def test_generated_levels_are_solvable():
+    # The first generated layouts of the next three were cut in two by a moving
+    # wall, and the last two had a scroll only reachable through the exit
+    cases = [(seed, 1 + seed % 10) for seed in range(30)] + [(160, 1), (270, 1), (102, 3), (121, 2), (150, 1)]
+    for seed, level_number in cases:
+        random.seed(seed)
+        level = Level(level_number, 800, 600)
+        assert level.analysis.solvable
+        reachable = reference_distances(level.grid, level.analysis.start_tile, level.moving_walls,
+                                        level.analysis.exit_tile)
+        assert level.analysis.exit_tile in reachable
+        assert all(tile in reachable for tile in level.analysis.scroll_tiles)
@@ -0,0 +1,79 @@
+import random
+
+import pygame
+
+from src.level import Level, MovingWall
+
+def stepped_offsets(distance, speed, ticks):
+    # Reference: walk the path one tick at a time, bouncing off both ends
+    if distance == 0:
+        return [0.0] * (ticks + 1)
+    offset = 0.0
+    heading = 1
+    offsets = [offset]
+    for _ in range(ticks):
+        offset += heading * speed
+        if offset > distance:
+            offset = 2 * distance - offset
+            heading = -1
+        elif offset < 0:
+            offset = -offset
+            heading = 1
+        offsets.append(offset)
+    return offsets
+
+WALLS = [
+    ((64, 96), (192, 96), 0.5),
+    ((320, 64), (320, 256), 0.75),
+    ((96, 96), (96, 96), 0.5),  # Doesn't move at all
+    ((0, 0), (96, 64), 1.3),
+]
+
+def test_position_matches_stepping():
+    for start, end, speed in WALLS:
+        wall = MovingWall(start, end, speed)
+        for tick, offset in enumerate(stepped_offsets(wall.distance, speed, 2000)):
+            assert abs(wall.offset_at(tick) - offset) < 1e-6
+            x, y = wall.position_at(tick)
+            assert abs(x - (start[0] + wall.unit[0] * offset)) < 1e-6
+            assert abs(y - (start[1] + wall.unit[1] * offset)) < 1e-6
+
+def test_update_moves_rect_to_tick():
+    for start, end, speed in WALLS:
+        wall = MovingWall(start, end, speed)
+        for tick in (0, 1, 17, 255, 256, 257, 1000, 123456):
+            wall.update(tick)
+            assert wall.rect == wall.rect_at(tick)
+
+def test_swept_rect_covers_every_tick():
+    random.seed(36)
+    for start, end, speed in WALLS:
+        wall = MovingWall(start, end, speed)
+        for _ in range(200):
+            t0 = random.randrange(2000)
+            t1 = t0 + random.randrange(1, 600)
+            swept = wall.swept_rect(t0, t1)
+            rects = [wall.rect_at(tick) for tick in range(t0, t1 + 1)]
+            assert all(swept.contains(rect) for rect in rects)
+            
+            # No wider than the path plus the wall itself
+            assert swept.width <= abs(end[0] - start[0]) + wall.width + 1
+            assert swept.height <= abs(end[1] - start[1]) + wall.height + 1
+            assert wall.swept_rect(t1, t0) == swept
+            
+            # Both ends are reached at some integer tick within a period
+            if t1 - t0 >= wall.period + 1:
+                assert swept.unionall(rects) == swept
+
+def test_level_jump_matches_stepping():
+    random.seed(7)
+    stepped = Level(8, 800, 600)
+    random.seed(7)
+    jumped = Level(8, 800, 600)
+    assert stepped.moving_walls
+    for _ in range(1500):
+        stepped.update_moving_elements()
+    jumped.update_moving_elements(1500)
+    assert stepped.tick == jumped.tick == 1500
+    assert [wall.rect for wall in stepped.moving_walls] == [wall.rect for wall in jumped.moving_walls]
+    assert stepped.moving_wall_tiles == jumped.moving_wall_tiles
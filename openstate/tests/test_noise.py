@@ -0,0 +1,65 @@
+import random
+
+from src.level import Level
+from src.player import Player
+from src.bot import PlaytestBot
+from src.tile import Tile
+
+def step_next_to(level, guard, crouching):
+    # Walk a player from a neighbouring tile onto the guard's own tile
+    tile_size = level.tile_size
+    x = guard.rect.centerx // tile_size
+    y = guard.rect.centery // tile_size
+    player = Player((x * tile_size + 4, y * tile_size + 4))
+    player.is_crouching = crouching
+    player.noise_tile = (x + 1, y)
+    player.make_noise(level)
+    assert player.footstep
+
+def test_crouched_footsteps_are_not_heard():
+    for seed in range(10):
+        random.seed(seed)
+        level = Level(1 + seed, 800, 600)
+        for guard in level.guards:
+            step_next_to(level, guard, crouching=True)
+            assert not guard.listen(level)
+            assert not guard.is_alerted
+
+def test_walking_footsteps_are_heard():
+    random.seed(41)
+    level = Level(3, 800, 600)
+    guard = level.guards[0]
+    step_next_to(level, guard, crouching=False)
+    assert guard.listen(level)
+    assert guard.is_alerted
+
+def test_bot_plans_survive_replay():
+    # Both were captured after a guard heard the bot's crouched steps
+    for seed, level_number in ((67, 8), (123, 4)):
+        random.seed(seed)
+        result = PlaytestBot(Level(level_number, 800, 600)).run()
+        assert result['completed'], result
+
+def test_guard_walks_to_the_noise_and_back_to_its_patrol():
+    random.seed(41)
+    level = Level(3, 800, 600)
+    guard = level.guards[0]
+    tile_size = level.tile_size
+    x = guard.rect.centerx // tile_size
+    y = guard.rect.centery // tile_size
+    source = (x + 2, y)
+    assert level.grid[y][x + 2] != Tile.WALL
+    level.noise.emit(source[0], source[1], level.noise.walk_loudness, level.tick)
+    
+    tiles = []
+    while guard.is_alerted or guard.returning_to_patrol or not tiles:
+        guard.update(level)
+        level.tick += 1
+        tile = (guard.rect.centerx // tile_size, guard.rect.centery // tile_size)
+        assert level.grid[tile[1]][tile[0]] != Tile.WALL
+        tiles.append(tile)
+        assert len(tiles) < 1000
+    
+    # Along the corridors to the noise, then back onto a patrol point
+    assert source in tiles
+    assert (guard.x, guard.y) == guard.patrol_points[guard.current_point]
@@ -0,0 +1,136 @@
+import time
+import random
+import socket
+
+import pygame
+import pytest
+
+from src.game import Game, GameState
+from src.spectator import SpectatorServer, SpectatorClient, SpectatorView, GuardFlag, PlayerFlag
+
+MOVES = (pygame.K_d, pygame.K_s, pygame.K_a, pygame.K_w)
+KEYS = (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_LCTRL, pygame.K_RCTRL)
+
+@pytest.fixture
+def game():
+    pygame.display.init()
+    pygame.font.init()
+    random.seed(48)
+    game = Game(pygame.display.set_mode((800, 600)), GameState.MENU)
+    game.sound_enabled = False
+    game.restart_level()
+    game.state = GameState.PLAYING
+    return game
+
+def tick(game, held):
+    if game.state != GameState.PLAYING:
+        # Caught or finished: a new level, so a new keyframe
+        game.restart_level()
+        game.state = GameState.PLAYING
+    game.input_keys = dict.fromkeys(KEYS, False)
+    game.input_keys[held] = True
+    game.update()
+
+def wait_for(client, game, timeout=5.0):
+    # Polls until the client has applied the game's latest tick
+    deadline = time.perf_counter() + timeout
+    while not (client.view.keyframes and client.view.tick == game.level.tick and client.view.deltas):
+        assert time.perf_counter() < deadline, "spectator stream stalled"
+        client.poll()
+        time.sleep(0.001)
+    client.poll()
+
+def assert_matches(view, game):
+    level = game.level
+    assert view.level_number == level.level_number
+    assert view.grid == [list(row) for row in level.grid]
+    assert view.tick == level.tick
+    assert view.state == game.state
+    assert view.stars == game.stars
+    
+    # Decoded against the entities themselves, not the encoder's helpers
+    x, y, flags = view.player
+    player = game.player
+    assert (x, y) == player.rect.topleft
+    assert bool(flags & PlayerFlag.FACING_RIGHT) == player.facing_right
+    assert bool(flags & PlayerFlag.CROUCHING) == player.is_crouching
+    assert bool(flags & PlayerFlag.HIDDEN) == player.is_hidden
+    assert len(view.guards) == len(level.guards)
+    for (x, y, flags), guard in zip(view.guards, level.guards):
+        assert (x, y) == guard.rect.topleft
+        assert (flags & 3) * 90 == guard.direction % 360
+        assert bool(flags & GuardFlag.PURSUING) == guard.is_pursuing
+        assert bool(flags & GuardFlag.ALERTED) == guard.is_alerted
+        assert bool(flags & GuardFlag.RETURNING) == guard.returning_to_patrol
+    assert view.walls == [wall.rect.topleft for wall in level.moving_walls]
+    shown = {view.scroll_positions[i] for i in range(len(view.scroll_positions)) if view.scrolls >> i & 1}
+    assert shown == {scroll.rect.topleft for scroll in level.scrolls}
+
+def test_loopback_stream_matches_game(game, tmp_path):
+    address = str(tmp_path / 'spectate.sock')
+    server = SpectatorServer(address, max_pending=4096)
+    server.start()
+    game.spectators = server
+    try:
+        steady = SpectatorClient(address)
+        late = None
+        for frame in range(900):
+            tick(game, MOVES[frame // 45 % 4])
+            wait_for(steady, game)
+            assert_matches(steady.view, game)
+            
+            if frame == 300:
+                # A viewer that joins late and doesn't read: with a small socket
+                # buffer its backlog soon passes max_pending
+                late = SpectatorClient(address)
+                while len(server.spectators) < 2:
+                    time.sleep(0.001)
+                server.spectators[1].connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        assert server.resyncs >= 1
+        
+        # Once it reads again it is resynced with a keyframe and catches up
+        for frame in range(60):
+            tick(game, MOVES[frame // 45 % 4])
+            wait_for(steady, game)
+            late.poll()
+        wait_for(late, game)
+        assert_matches(late.view, game)
+        assert_matches(steady.view, game)
+        steady.close()
+        late.close()
+    finally:
+        server.close()
+
+def test_view_reassembles_chunks(game, tmp_path):
+    # The stream split at arbitrary points decodes to the same state
+    server = SpectatorServer(str(tmp_path / 'spectate.sock'))
+    server.start()
+    game.spectators = server
+    try:
+        client = SpectatorClient(str(tmp_path / 'spectate.sock'))
+        received = bytearray()
+        for frame in range(120):
+            tick(game, MOVES[frame // 30 % 4])
+            deadline = time.perf_counter() + 5.0
+            view = SpectatorView()
+            while True:
+                try:
+                    data = client.connection.recv(65536)
+                except BlockingIOError:
+                    data = b''
+                received += data
+                view = SpectatorView()
+                view.feed(bytes(received))
+                if view.keyframes and view.tick == game.level.tick:
+                    break
+                assert time.perf_counter() < deadline, "spectator stream stalled"
+                time.sleep(0.001)
+        
+        chunked = SpectatorView()
+        for start in range(0, len(received), 7):
+            chunked.feed(received[start:start + 7])
+        assert_matches(chunked, game)
+        assert chunked.deltas == view.deltas
+        client.close()
+    finally:
+        server.close()
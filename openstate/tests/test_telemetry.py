@@ -0,0 +1,90 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src import telemetry
+from src.telemetry import Telemetry, Event, read_events
+
+def fake_level(level_number, width, height):
+    grid = [[(x + y) % 2 for x in range(width)] for y in range(height)]
+    return SimpleNamespace(level_number=level_number, tick=0, grid_width=width, grid_height=height, grid=grid)
+
+def play(path):
+    # Three runs: level 1, a restart of level 1 on a bigger maze, and level 257
+    # (which a one-byte level field would fold onto level 1)
+    log = Telemetry(str(path))
+    log.start()
+    log.level_start(fake_level(1, 4, 3))
+    log.record(Event.PLAYER_TILE, 1, 1, 1)
+    log.record(Event.PLAYER_TILE, 2, 1, 1)
+    log.record(Event.DEATH, 3, 1, 1)
+    log.level_start(fake_level(1, 8, 6))
+    log.record(Event.PLAYER_TILE, 1, 7, 5)
+    log.record(Event.DETECTION, 2, 7, 5, guard=2)
+    log.record(Event.EXIT, 90, 7, 0, guard=3)
+    log.level_start(fake_level(257, 4, 3))
+    log.record(Event.PLAYER_TILE, 1, 2, 2)
+    log.record(Event.PLAYER_TILE, 2, 9, 9)  # Outside the grid, ignored
+    log.close()
+    return log
+
+def counts(heatmap, width):
+    # (x, y) -> count for every non-zero cell, from a NumPy or flat heatmap
+    cells = list(heatmap.ravel()) if hasattr(heatmap, 'ravel') else list(heatmap)
+    return {(i % width, i // width): int(count) for i, count in enumerate(cells) if count}
+
+def check_runs(log):
+    assert sorted(log.heatmaps) == [1, 2, 3]
+    first, restart, wrapped = (log.heatmaps[run] for run in (1, 2, 3))
+    assert (first['level'], first['size']) == (1, (4, 3))
+    assert (restart['level'], restart['size']) == (1, (8, 6))
+    assert (wrapped['level'], wrapped['size']) == (257, (4, 3))
+    
+    assert counts(first['presence'], 4) == {(1, 1): 2}
+    assert counts(first['deaths'], 4) == {(1, 1): 1}
+    assert counts(first['detections'], 4) == {}
+    assert counts(restart['presence'], 8) == {(7, 5): 1}
+    assert counts(restart['detections'], 8) == {(7, 5): 1}
+    assert counts(wrapped['presence'], 4) == {(2, 2): 1}
+    assert log.exit_ticks == {2: [90]}
+    assert log.layouts[2] == fake_level(1, 8, 6).grid
+
+def test_runs_without_numpy(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry, 'np', None)
+    log = play(tmp_path / 'session.bin')
+    check_runs(log)
+    
+    log.save_heatmaps(str(tmp_path / 'heat.json'))
+    with open(tmp_path / 'heat.json') as f:
+        runs = json.load(f)['runs']
+    assert runs['2']['level'] == 1
+    assert runs['2']['presence'][5][7] == 1
+    assert runs['2']['grid'] == log.layouts[2]
+
+def test_runs_with_numpy(tmp_path):
+    np = pytest.importorskip('numpy')
+    assert telemetry.np is np
+    log = play(tmp_path / 'session.bin')
+    check_runs(log)
+    
+    log.save_heatmaps(str(tmp_path / 'heat.npz'))
+    arrays = np.load(tmp_path / 'heat.npz')
+    assert int(arrays['run3_level']) == 257
+    assert arrays['run2_presence'].shape == (6, 8)
+    assert arrays['run2_grid'].tolist() == log.layouts[2]
+    assert arrays['run2_exit_ticks'].tolist() == [90]
+
+def test_log_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry, 'np', None)
+    path = tmp_path / 'session.bin'
+    play(path)
+    events = list(read_events(path))
+    assert len(events) == 11
+    assert events[0] == (Event.LEVEL_START, 1, 1, 0, 4, 3)
+    assert events[7] == (Event.EXIT, 3, 2, 90, 7, 0)
+    
+    # A second session appended to the same log continues the run ids
+    log = play(path)
+    assert sorted(log.heatmaps) == [12, 13, 14]
+    assert [run for kind, _, run, _, _, _ in read_events(path) if kind == Event.LEVEL_START] == [1, 2, 3, 12, 13, 14]